@@ -9,8 +9,9 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 
 import os
 
+from config.settings.base import ENV
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bizzlers.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', f'config.settings.{ENV}')
 
 application = get_asgi_application()
@@ -16,8 +16,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from utils.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/users/', include('users.urls')),
-    path('api/business/', include('business.urls'))
+    path('api/business/', include('business.urls')),
+    path('api/async/business/', include('business.async_urls')),
+    path('metrics/', metrics_view, name='metrics')
 ]
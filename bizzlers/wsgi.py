@@ -9,8 +9,9 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/wsgi/
 
 import os
 
+from config.settings.base import ENV
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bizzlers.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', f'config.settings.{ENV}')
 
 application = get_wsgi_application()
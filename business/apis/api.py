@@ -4,6 +4,7 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 
 from business.models.models import Business, Invitation
+from business.context import get_business_context
 from business.permissions import IsBusinessOwner
 from users.models import UserBusinessMapping,User
 
@@ -51,20 +52,9 @@ class InviteToBusinessAPIView(APIView):
     permission_classes = [IsAuthenticated,IsBusinessOwner]
 
     def post(self, request):
-        business_id = int(request.META["HTTP_X_BUSINESS_ID"])
-        if not business_id:
-            return Response({"error": "Business ID is required."}, status=status.HTTP_400_BAD_REQUEST)
-
-        try:
-            business = Business.objects.get(id=business_id)
-        except Business.DoesNotExist:
-            return Response({"error": "Business not found"}, status=status.HTTP_404_NOT_FOUND)
-
+        # IsBusinessOwner has already resolved the business and checked the inviter owns it
+        business = get_business_context(request).business
         inviter = request.user
-        try:
-            inviter_mapping = UserBusinessMapping.objects.get(user=inviter, business=business, role='OWNER')
-        except UserBusinessMapping.DoesNotExist:
-            return Response({"error": "You must be an owner of this business to send invites"}, status=status.HTTP_403_FORBIDDEN)
 
         invitee_email = request.data.get('email')
         invitee_role = request.data.get('role')
@@ -82,7 +72,10 @@ class InviteToBusinessAPIView(APIView):
         invitee = User.objects.filter(email=invitee_email).first()
 
         if invitee:
-            UserBusinessMapping.objects.create(user=invitee, business=business, role=invitee_role)
+            # one mapping per user and business (unique_user_business_mapping), the owner included
+            _, created = UserBusinessMapping.objects.get_or_create(user=invitee, business=business, defaults={'role': invitee_role})
+            if not created:
+                return Response({"message": "User is already associated with this business."}, status=status.HTTP_200_OK)
             return Response({"message": "User has been added to the business"}, status=status.HTTP_201_CREATED)
         else:
             Invitation.objects.create(email=invitee_email, business=business, role=invitee_role, invited_by=inviter)
@@ -107,14 +100,13 @@ class AcceptDeclineInviteAPIView(APIView):
             return Response({"error": "Invitation not found."}, status=status.HTTP_404_NOT_FOUND)
 
         if action == 'ACCEPT':
-            if UserBusinessMapping.objects.filter(user=user, business=invitation.business).exists():
-                return Response({"message": "User is already associated with this business."}, status=status.HTTP_200_OK)
-            
-            UserBusinessMapping.objects.create(
+            _, created = UserBusinessMapping.objects.get_or_create(
                 user=user,
                 business=invitation.business,
-                role=invitation.role
+                defaults={'role': invitation.role},
             )
+            if not created:
+                return Response({"message": "User is already associated with this business."}, status=status.HTTP_200_OK)
             invitation.status = Invitation.ACCEPTED
             invitation.save()
 
@@ -0,0 +1,185 @@
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from django.http import Http404
+from django.utils import timezone
+
+from business.models.subscription_models import Subscriber, Subscription
+from business.context import aget_business_context
+from business.permissions import IsBusinessMember, HasSubscriptionType, IsPlanValid
+from business.serializers import AddSubscriberSerializer, RenewSubscriptionSerializer
+from business.services.archive import history_data
+from business.services.plan_catalog import aget_catalog, plan_data
+from business.services.renewals import IdempotencyKeyReused, renew_subscription as renew
+from business.services.subscribers import add_subscriber as create_subscriber
+from utils.async_api import APIResponse, async_api_view
+from utils.common import first_error_message
+
+# Async variants of the endpoints in subscription_api, for deployments served by bizzlers.asgi.
+# Responses are identical to the DRF views.
+
+
+@async_api_view(['GET'], [IsBusinessMember, HasSubscriptionType])
+async def get_plan(request):
+    business_id = (await aget_business_context(request)).business_id
+    plan_id= request.GET.get('id')
+    
+    plan = (await aget_catalog(business_id)).get(plan_id)
+    if plan is None:
+        return APIResponse({"message":"Failed to fetch the plan, invalid ID."}, status=status.HTTP_404_NOT_FOUND)
+    
+    return APIResponse({"message":"plan fetched successfuly", "plan":plan_data(plan)},status=status.HTTP_200_OK)
+
+
+@async_api_view(['POST'], [IsBusinessMember, HasSubscriptionType, IsPlanValid])
+async def add_subscriber(request):
+    user=request.user
+    business = await (await aget_business_context(request)).abusiness()
+    
+    serializer = AddSubscriberSerializer(data=request.data)
+    if not serializer.is_valid():
+        return APIResponse({"message": first_error_message(serializer.errors)}, status=400)
+    data = serializer.validated_data
+    
+    plan_id = data.get('plan')
+    start_date = data.get('start_date') or timezone.now().date()
+    end_date = data.get('end_date')
+    amount=data.get('amount')
+    
+    plan = None
+    if plan_id:
+        plan = (await aget_catalog(business.id)).get(plan_id)
+        if plan is None:
+            return APIResponse({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    
+    if end_date is None:
+        try:
+            end_date = plan.end_date(start_date)
+        except ValueError as e:
+            return APIResponse({"message": str(e)}, status=400)
+    
+    # the atomic block needs a single connection, so the writes run in a thread
+    subscription = await sync_to_async(create_subscriber)(
+        business, user, data.get('name'), data.get('email'), data.get('phone'), plan, start_date, end_date, amount,
+    )
+    subscriber = subscription.subscriber
+    transaction = subscription.transaction
+    
+    subscriber_data = {
+        "id": subscriber.id,
+        "name": subscriber.name,
+        "business": business.id,
+        "email": subscriber.email,
+        "phone": subscriber.phone,
+    }
+    subscription_data={
+        "id":subscription.id,
+        "plan": plan.id if plan else "-",
+        "plan_start_date": subscription.plan_start_date,
+        "plan_end_date": subscription.plan_end_date,
+        'transaction':transaction.id
+    }
+    
+    return APIResponse({"message": "Subscriber added successfully", "subscriber_details": subscriber_data,"subscription_details":subscription_data},status=status.HTTP_201_CREATED)
+
+
+@async_api_view(['GET'], [IsBusinessMember, HasSubscriptionType])
+async def get_subscriber(request):
+    business_id = (await aget_business_context(request)).business_id
+    subscriber_id= request.GET.get('id')
+    
+    try:
+        subscriber = await Subscriber.objects.aget(id=subscriber_id, business_id=business_id)
+    except (Subscriber.DoesNotExist, ValueError):
+        return APIResponse({"message":"Failed to fetch the subscriber, invalid ID."}, status=status.HTTP_404_NOT_FOUND)
+    
+    subscriber_data = {
+            "id": subscriber.id,
+            "name": subscriber.name,
+            "email": subscriber.email,
+            "phone": subscriber.phone,
+        }
+    active_subscription = await Subscription.objects.filter(
+        subscriber=subscriber, active=True
+    ).select_related('plan').order_by('-plan_start_date').afirst()
+    if active_subscription:
+        active_subscription_data={
+            "id":active_subscription.id,
+            "plan":active_subscription.plan.name if active_subscription.plan else "-",
+            "duration":active_subscription.plan.duration if active_subscription.plan else "-",
+            "start_date":active_subscription.plan_start_date,
+            "end_date":active_subscription.plan_end_date,
+        }
+    else:
+        active_subscription_data= None
+    
+    data = {"message":"Subscriber fetched successfuly", "subscriber":subscriber_data,"active_subscription":active_subscription_data}
+    # ?history=true adds every subscription, including those moved to the archive
+    if request.GET.get('history') in ('true', '1'):
+        data["subscriptions"] = await sync_to_async(history_data)(subscriber.id)
+    
+    return APIResponse(data,status=status.HTTP_200_OK)
+
+
+@async_api_view(['POST'], [IsBusinessMember, HasSubscriptionType, IsPlanValid])
+async def renew_subscription(request):
+    user=request.user
+    business = await (await aget_business_context(request)).abusiness()
+    
+    serializer = RenewSubscriptionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return APIResponse({"message": first_error_message(serializer.errors)}, status=400)
+    data = serializer.validated_data
+    
+    plan_id = data.get('plan')
+    
+    plan = None
+    if plan_id:
+        plan = (await aget_catalog(business.id)).get(plan_id)
+        if plan is None:
+            return APIResponse({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    
+    # the row lock and the atomic block need a single connection, so the renewal runs in a thread
+    try:
+        renewal = await sync_to_async(renew)(
+            business,
+            user,
+            data.get('subscriber'),
+            plan=plan,
+            start_date=data.get('start_date'),
+            end_date=data.get('end_date'),
+            amount=data.get('amount'),
+            idempotency_key=request.META.get('HTTP_IDEMPOTENCY_KEY'),
+        )
+    except IdempotencyKeyReused as e:
+        return APIResponse({"message": str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    except Http404:
+        return APIResponse({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    except ValueError as e:
+        return APIResponse({"message": str(e)}, status=400)
+    
+    subscriber = renewal.subscriber
+    subscription = renewal.subscription
+    
+    subscriber_data = {
+        "id": subscriber.id,
+        "name": subscriber.name,
+        "business": subscriber.business_id,
+        "email": subscriber.email,
+        "phone": subscriber.phone,
+    }
+    subscription_data={
+        "id":subscription.id,
+        "plan": subscription.plan_id if subscription.plan_id else "-",
+        "plan_start_date": subscription.plan_start_date,
+        "plan_end_date": subscription.plan_end_date,
+        'transaction':renewal.transaction.id
+    }
+    
+    return APIResponse(
+                    {"message": "Subscription renewed successfully",
+                     "qued": renewal.qued,
+                     "subscriber_details": subscriber_data,
+                     "previos_subscription":"Previous Subscription found." if renewal.qued else "Didn't have previously active subscription",
+                     "new_subscription_details":subscription_data},
+                      status=status.HTTP_201_CREATED
+                      )
@@ -1,17 +1,33 @@
-import json
+import codecs
+import csv
+
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Exists, OuterRef, Prefetch, Subquery
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from datetime import datetime
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 
-from business.models.subscription_models import Plan, Subscriber, Transaction, Subscription
-from business.models.models import Business
+from business.models.subscription_models import Plan, Subscriber, Subscription
+from business.context import get_business_context
 from business.permissions import IsBusinessOwner, IsBusinessMember, HasSubscriptionType, IsPlanValid
-from utils.common import validate_required_fields, parse_duration
+from business.serializers import AddSubscriberSerializer, RenewSubscriptionSerializer, SubscriberListQuerySerializer, DashboardQuerySerializer, AnalyticsQuerySerializer, LedgerExportQuerySerializer, BulkRenewalSerializer
+from business.services.analytics import get_analytics
+from business.services.archive import history_data
+from business.services.bulk_renewal import BulkRenewal, cohort
+from business.services.ledger import ledger_rows, csv_lines, ndjson_lines
+from business.services.plan_catalog import get_catalog, plan_data
+from business.services.renewals import IdempotencyKeyReused, renew_subscription as renew
+from business.services.rollups import dashboard
+from business.services.subscriber_import import SubscriberImport, csv_rows
+from business.services.subscribers import add_subscriber as create_subscriber
+from utils.common import validate_required_fields, first_error_message
 
 
 
@@ -19,10 +35,9 @@ from utils.common import validate_required_fields, parse_duration
 @permission_classes([IsAuthenticated,IsBusinessOwner,HasSubscriptionType])
 def add_plan(request):
     
-    business_id = int(request.META.get("HTTP_X_BUSINESS_ID"))
-    business = get_object_or_404(Business, id=business_id)
+    business = get_business_context(request).business
     
-    data = json.loads(request.body)
+    data = request.data
     
     required_fields = ['name', 'duration', 'type', 'price']
     try:
@@ -38,6 +53,12 @@ def add_plan(request):
     if duration_type.upper() not in ['MONTHLY','YEARLY','DAILY','M','Y','D']:
         return Response({"message": "Invalid type, choices are: MONTHLY or M, YEARLY or Y, DAILY or D."}, status=status.HTTP_400_BAD_REQUEST)
     
+    try:
+        if int(duration) < 1:
+            raise ValueError
+    except (TypeError, ValueError):
+        return Response({"message": "Invalid duration, it must be a positive whole number."}, status=status.HTTP_400_BAD_REQUEST)
+    
     existing_plan = Plan.objects.filter(name=name, business=business).first()
     if existing_plan:
         existing_plan_data = {
@@ -45,12 +66,12 @@ def add_plan(request):
             "name": existing_plan.name,
             "duration": existing_plan.duration,
             "price": str(existing_plan.price),
-            "added_by": existing_plan.added_by.id,
-            "business": existing_plan.business.id
+            "added_by": existing_plan.added_by_id,
+            "business": existing_plan.business_id
         }
         return Response({"message": "Plan already exists.", "plan": existing_plan_data}, status=status.HTTP_409_CONFLICT)
     
-    plan = Plan.objects.create(
+    plan = Plan(
     name=name,
     price=price,
     added_by=request.user,
@@ -58,7 +79,12 @@ def add_plan(request):
     )
     
     plan.set_duration(duration, duration_type)
-    plan.save()
+    try:
+        with db_transaction.atomic():
+            plan.save()
+    except IntegrityError:
+        # a concurrent request added the same name first
+        return Response({"message": "Plan already exists."}, status=status.HTTP_409_CONFLICT)
     
     return Response({"message": "Plan added successfuly.", "id": plan.id}, status=status.HTTP_201_CREATED)
 
@@ -66,30 +92,20 @@ def add_plan(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated,IsBusinessMember, HasSubscriptionType])
 def get_plan(request):
-    business_id = int(request.META.get("HTTP_X_BUSINESS_ID"))
+    business_id = get_business_context(request).business_id
     plan_id= request.GET.get('id')
     
-    try:
-        plan=Plan.objects.get(id=plan_id,business_id=business_id)
-    except:
+    plan = get_catalog(business_id).get(plan_id)
+    if plan is None:
         return Response({"message":"Failed to fetch the plan, invalid ID."}, status=status.HTTP_404_NOT_FOUND)
     
-    plan_data = {
-            "id": plan.id,
-            "name": plan.name,
-            "duration": plan.duration,
-            "price": str(plan.price),
-            "added_by": plan.added_by.id,
-            "business": plan.business.id
-        }
-    
-    return Response({"message":"plan fetched successfuly", "plan":plan_data},status=status.HTTP_200_OK)
+    return Response({"message":"plan fetched successfuly", "plan":plan_data(plan)},status=status.HTTP_200_OK)
 
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated, IsBusinessOwner, HasSubscriptionType])
 def delete_plan(request):
-    business_id = int(request.META.get("HTTP_X_BUSINESS_ID"))
+    business_id = get_business_context(request).business_id
     plan_id = request.GET.get('id')
     
     try:
@@ -106,24 +122,14 @@ def delete_plan(request):
 @permission_classes([IsAuthenticated, IsBusinessMember, HasSubscriptionType, IsPlanValid])
 def add_subscriber(request):
     user=request.user
-    business_id = request.META.get("HTTP_X_BUSINESS_ID")
+    business = get_business_context(request).business
     
-    data = json.loads(request.body)
-    
-    plan_id = data.get('plan') 
-    
-    if plan_id:
-        required_fields=['name', 'email']
-    else:
-        required_fields=['name', 'email', 'start_date','end_date','amount']
-        
-    
-    try:
-        validate_required_fields(required_fields=required_fields,data=data)
-    except ValidationError as e:
-        return Response(e.detail, status=400)
+    serializer = AddSubscriberSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({"message": first_error_message(serializer.errors)}, status=400)
+    data = serializer.validated_data
     
-    name = data.get('name')
+    plan_id = data.get('plan')
     name = data.get('name')
     email = data.get('email')
     phone = data.get('phone')
@@ -132,57 +138,23 @@ def add_subscriber(request):
     amount=data.get('amount')
     
     if plan_id:
-        plan = get_object_or_404(Plan, id=plan_id)
+        plan = get_catalog(business.id).get_or_404(plan_id)
     else:
         plan=None
-        
-    business = get_object_or_404(Business, id=business_id)
     
     if start_date is None:
         start_date = timezone.now().date()
-    else:
-        try:
-            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-        except:
-            return Response({"message": "Invalid start_date format. Use YYYY-MM-DD."}, status=400)
-            
     
     if end_date is None:
         try:
-            duration_timedelta = parse_duration(plan.duration)
-            end_date = start_date + duration_timedelta
+            end_date = plan.end_date(start_date)
         except ValueError as e:
             return Response({"message": str(e)}, status=400)
-    else:
-        try:
-            end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-        except ValueError:
-            return Response({"message": "Invalid end_date format. Use YYYY-MM-DD."}, status=400)
 
         
-    subscriber = Subscriber.objects.create(
-        name=name,
-        business=business,
-        email=email,
-        phone=phone,
-    )
-    
-    subscription= Subscription.objects.create(
-        subscriber=subscriber,
-        plan=plan,
-        plan_start_date=start_date,
-        plan_end_date=end_date
-        
-    )
-    transaction= Transaction.objects.create(
-        plan=subscription.plan,
-        conducted_by=user,
-        business=business,
-        amount= amount if amount else subscription.plan.price
-    )
-    
-    subscription.transaction=transaction
-    subscription.save()
+    subscription = create_subscriber(business, user, name, email, phone, plan, start_date, end_date, amount)
+    subscriber = subscription.subscriber
+    transaction = subscription.transaction
         
     subscriber_data = {
         "id": subscriber.id,
@@ -202,10 +174,32 @@ def add_subscriber(request):
     return Response({"message": "Subscriber added successfully", "subscriber_details": subscriber_data,"subscription_details":subscription_data},status=status.HTTP_201_CREATED)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsBusinessMember, HasSubscriptionType])
+def import_subscribers(request):
+    """
+    Bulk add subscribers from a JSON array of add-subscriber payloads or a CSV upload
+    (multipart field `file`, header: name,email,phone,plan,start_date,end_date,amount).
+    """
+    business = get_business_context(request).business
+    
+    upload = request.FILES.get('file')
+    if upload is not None:
+        rows = csv_rows(csv.DictReader(codecs.iterdecode(upload, 'utf-8-sig')))
+    elif isinstance(request.data, list):
+        rows = request.data
+    else:
+        return Response({"message": "Send a JSON array of subscribers or a CSV file."}, status=status.HTTP_400_BAD_REQUEST)
+    
+    summary = SubscriberImport(business, request.user).run(rows)
+    
+    return Response({"message": "Subscribers imported", **summary}, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated,IsBusinessMember, HasSubscriptionType])
 def get_subscriber(request):
-    business_id = int(request.META.get("HTTP_X_BUSINESS_ID"))
+    business_id = get_business_context(request).business_id
     subscriber_id= request.GET.get('id')
     
     try:
@@ -219,8 +213,10 @@ def get_subscriber(request):
             "email": subscriber.email,
             "phone": subscriber.phone,
         }
-    try:
-        active_subscription= Subscription.objects.get(subscriber=subscriber,active=True)
+    active_subscription = Subscription.objects.filter(
+        subscriber=subscriber, active=True
+    ).select_related('plan').order_by('-plan_start_date').first()
+    if active_subscription:
         active_subscription_data={
             "id":active_subscription.id,
             "plan":active_subscription.plan.name if active_subscription.plan else "-",
@@ -228,121 +224,256 @@ def get_subscriber(request):
             "start_date":active_subscription.plan_start_date,
             "end_date":active_subscription.plan_end_date,
         }
-    except:
+    else:
         active_subscription_data= None
     
-    return Response({"message":"Subscriber fetched successfuly", "subscriber":subscriber_data,"active_subscription":active_subscription_data},status=status.HTTP_200_OK)
+    data = {"message":"Subscriber fetched successfuly", "subscriber":subscriber_data,"active_subscription":active_subscription_data}
+    # ?history=true adds every subscription, including those moved to the archive
+    if request.GET.get('history') in ('true', '1'):
+        data["subscriptions"] = history_data(subscriber.id)
+    
+    return Response(data,status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated,IsBusinessMember, HasSubscriptionType])
+def list_subscribers(request):
+    """
+    Subscribers of the business ordered by id, paginated by keyset: pass the returned
+    `next_cursor` as `cursor` to fetch the following page. The plan and expiry filters apply
+    to the active subscription, or to the latest one with active=false.
+    """
+    business_id = get_business_context(request).business_id
+    
+    serializer = SubscriberListQuerySerializer(data=request.GET)
+    if not serializer.is_valid():
+        return Response({"message": first_error_message(serializer.errors)}, status=400)
+    params = serializer.validated_data
+    
+    subscribers = Subscriber.objects.filter(business_id=business_id)
+    if params.get('cursor'):
+        subscribers = subscribers.filter(id__gt=params['cursor'])
+    
+    subscription_filters = {}
+    if params.get('plan'):
+        subscription_filters['plan_id'] = params['plan']
+    if params.get('expires_after'):
+        subscription_filters['plan_end_date__gte'] = params['expires_after']
+    if params.get('expires_before'):
+        subscription_filters['plan_end_date__lte'] = params['expires_before']
+    
+    active_subscriptions = Subscription.objects.filter(subscriber=OuterRef('pk'), active=True)
+    if params['active'] is False:
+        subscribers = subscribers.filter(~Exists(active_subscriptions))
+        if subscription_filters:
+            # inactive subscribers have no active subscription to filter, their latest one is used
+            latest = Subscription.objects.filter(subscriber=OuterRef('pk')).order_by('-plan_end_date', '-id')
+            subscribers = subscribers.annotate(latest_subscription=Subquery(latest.values('id')[:1])).filter(
+                Exists(Subscription.objects.filter(id=OuterRef('latest_subscription'), **subscription_filters))
+            )
+    elif subscription_filters:
+        subscribers = subscribers.filter(Exists(active_subscriptions.filter(**subscription_filters)))
+    elif params['active'] is True:
+        subscribers = subscribers.filter(Exists(active_subscriptions))
+    
+    limit = params['limit']
+    page = list(
+        subscribers.order_by('id').prefetch_related(
+            Prefetch(
+                'subscription_set',
+                queryset=Subscription.objects.filter(active=True).select_related('plan').order_by('-plan_start_date'),
+                to_attr='active_subscriptions',
+            )
+        )[:limit + 1]
+    )
+    has_more = len(page) > limit
+    page = page[:limit]
+    
+    subscribers_data = []
+    for subscriber in page:
+        active_subscription = subscriber.active_subscriptions[0] if subscriber.active_subscriptions else None
+        subscribers_data.append({
+            "id": subscriber.id,
+            "name": subscriber.name,
+            "email": subscriber.email,
+            "phone": subscriber.phone,
+            "active_subscription": {
+                "id": active_subscription.id,
+                "plan": active_subscription.plan.name if active_subscription.plan else "-",
+                "start_date": active_subscription.plan_start_date,
+                "end_date": active_subscription.plan_end_date,
+            } if active_subscription else None,
+        })
+    
+    return Response({
+        "message": "Subscribers fetched successfuly",
+        "subscribers": subscribers_data,
+        "next_cursor": page[-1].id if has_more else None,
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsBusinessMember, HasSubscriptionType, IsPlanValid])
 def renew_subscription(request):
     user=request.user
-    business_id = request.META.get("HTTP_X_BUSINESS_ID")
-    
-    data = json.loads(request.body)
-    
-    plan_id = data.get('plan') 
-    
-    if plan_id:
-        required_fields=['subscriber']
-    else:
-        required_fields=['subscriber','start_date','end_date','amount']
-        
-    
-    try:
-        validate_required_fields(required_fields=required_fields,data=data)
-    except ValidationError as e:
-        return Response(e.detail, status=400)
+    business = get_business_context(request).business
     
-    start_date = data.get('start_date')
-    end_date = data.get('end_date')
-    amount=data.get('amount')
-    subscriber=data.get('subscriber')
+    serializer = RenewSubscriptionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({"message": first_error_message(serializer.errors)}, status=400)
+    data = serializer.validated_data
     
-    try:
-        existing_active_subscription = Subscription.objects.filter(
-        subscriber=subscriber,
-        active=True
-                    ).order_by('-created_at').first()
-        existing_active_subscription.check_and_update_status()
-        print('existing: ',existing_active_subscription)
-        
-    except:
-        existing_active_subscription=None
-        
+    plan_id = data.get('plan')
     
     if plan_id:
-        plan = get_object_or_404(Plan, id=plan_id)
+        plan = get_catalog(business.id).get_or_404(plan_id)
     else:
         plan=None
-        
-    business = get_object_or_404(Business, id=business_id)
-    
-    if start_date is None:
-        if existing_active_subscription:
-            start_date = existing_active_subscription.plan_end_date
-        else:
-            start_date=timezone.now().date()
-    else:
-        try:
-            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-        except:
-            return Response({"message": "Invalid start_date format. Use YYYY-MM-DD."}, status=400)
-            
-    
-    if end_date is None:
-        try:
-            duration_timedelta = parse_duration(plan.duration)
-            end_date = start_date + duration_timedelta
-        except ValueError as e:
-            return Response({"message": str(e)}, status=400)
-    else:
-        try:
-            end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-        except ValueError:
-            return Response({"message": "Invalid end_date format. Use YYYY-MM-DD."}, status=400)
-
-        
-    subscriber = get_object_or_404(Subscriber, id=subscriber)
     
-    subscription= Subscription.objects.create(
-        subscriber=subscriber,
-        plan=plan,
-        plan_start_date=start_date,
-        plan_end_date=end_date
-        
-    )
-    transaction= Transaction.objects.create(
-        plan=subscription.plan,
-        conducted_by=user,
-        business=business,
-        amount= amount if amount else subscription.plan.price
-    )
-    
-    subscription.transaction=transaction
-    subscription.save()
+    try:
+        renewal = renew(
+            business,
+            user,
+            data.get('subscriber'),
+            plan=plan,
+            start_date=data.get('start_date'),
+            end_date=data.get('end_date'),
+            amount=data.get('amount'),
+            idempotency_key=request.META.get('HTTP_IDEMPOTENCY_KEY'),
+        )
+    except IdempotencyKeyReused as e:
+        return Response({"message": str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    except ValueError as e:
+        return Response({"message": str(e)}, status=400)
+    
+    subscriber = renewal.subscriber
+    subscription = renewal.subscription
         
     subscriber_data = {
         "id": subscriber.id,
         "name": subscriber.name,
-        "business": subscriber.business.id,
+        "business": subscriber.business_id,
         "email": subscriber.email,
         "phone": subscriber.phone,
     }
     subscription_data={
         "id":subscription.id,
-        "plan": subscription.plan.id if plan else "-",
+        "plan": subscription.plan_id if subscription.plan_id else "-",
         "plan_start_date": subscription.plan_start_date,
         "plan_end_date": subscription.plan_end_date,
-        'transaction':transaction.id
+        'transaction':renewal.transaction.id
     }
         
     return Response(
                     {"message": "Subscription renewed successfully",
-                     "qued": True if existing_active_subscription else False,
+                     "qued": renewal.qued,
                      "subscriber_details": subscriber_data,
-                     "previos_subscription":"Previous Subscription found." if existing_active_subscription else "Didn't have previously active subscription",
+                     "previos_subscription":"Previous Subscription found." if renewal.qued else "Didn't have previously active subscription",
                      "new_subscription_details":subscription_data},
                       status=status.HTTP_201_CREATED
-                      )
\ No newline at end of file
+                      )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsBusinessMember, HasSubscriptionType, IsPlanValid])
+def bulk_renew_subscriptions(request):
+    """
+    Renew many subscribers at once, given as a list of ids (`subscribers`) or a `filter`
+    on their active subscription ({"plan": id, "expires_before": "YYYY-MM-DD"}).
+    """
+    business = get_business_context(request).business
+    
+    serializer = BulkRenewalSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({"message": first_error_message(serializer.errors)}, status=400)
+    data = serializer.validated_data
+    
+    plan = get_catalog(business.id).get_or_404(data['plan']) if data.get('plan') else None
+    
+    if 'filter' in data:
+        limit = BulkRenewalSerializer.MAX_SUBSCRIBERS
+        subscriber_ids = list(cohort(
+            business,
+            plan_id=data['filter'].get('plan'),
+            expires_before=data['filter'].get('expires_before'),
+        )[:limit + 1])
+        if len(subscriber_ids) > limit:
+            return Response({"message": f"The filter matches more than {limit} subscribers, narrow it down."}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        subscriber_ids = data['subscribers']
+    
+    summary = BulkRenewal(business, request.user, plan=plan, amount=data.get('amount')).run(subscriber_ids)
+    
+    return Response({"message": "Subscriptions renewed", **summary}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated,IsBusinessMember, HasSubscriptionType])
+def subscription_dashboard(request):
+    business_id = get_business_context(request).business_id
+    
+    serializer = DashboardQuerySerializer(data=request.GET)
+    if not serializer.is_valid():
+        return Response({"message": first_error_message(serializer.errors)}, status=400)
+    params = serializer.validated_data
+    
+    dashboard_data = dashboard(
+        business_id,
+        expiring_days=params['expiring_days'],
+        group_by=params['group_by'],
+        since=params.get('since'),
+        until=params.get('until'),
+    )
+    
+    return Response({"message": "Dashboard fetched successfuly", "dashboard": dashboard_data}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated,IsBusinessMember, HasSubscriptionType])
+def subscription_analytics(request):
+    """MRR, churn, renewal rates and retention cohorts over the last `months` months, computed once a day."""
+    business_id = get_business_context(request).business_id
+    
+    serializer = AnalyticsQuerySerializer(data=request.GET)
+    if not serializer.is_valid():
+        return Response({"message": first_error_message(serializer.errors)}, status=400)
+    params = serializer.validated_data
+    
+    analytics = get_analytics(business_id, months=params['months'])
+    
+    return Response({"message": "Analytics fetched successfuly", "analytics": analytics}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated,IsBusinessOwner])
+def export_transactions(request):
+    business_id = get_business_context(request).business_id
+    
+    serializer = LedgerExportQuerySerializer(data=request.GET)
+    if not serializer.is_valid():
+        return Response({"message": first_error_message(serializer.errors)}, status=400)
+    params = serializer.validated_data
+    
+    rows = ledger_rows(business_id, since=params.get('since'), until=params.get('until'), history=params['history'])
+    if params['output'] == 'ndjson':
+        response = StreamingHttpResponse(ndjson_lines(rows), content_type='application/x-ndjson')
+    else:
+        response = StreamingHttpResponse(csv_lines(rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="transactions-{business_id}.{params["output"]}"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated,IsBusinessMember, HasSubscriptionType])
+def list_plans(request):
+    catalog = get_catalog(get_business_context(request).business_id)
+    etag = quote_etag(catalog.etag)
+    
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        return not_modified
+    
+    response = Response({"message": "Plans fetched successfuly", "plans": catalog.listing}, status=status.HTTP_200_OK)
+    response['ETag'] = etag
+    return response
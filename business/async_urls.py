@@ -0,0 +1,10 @@
+from django.urls import path
+
+from business.apis.async_subscription_api import get_plan, add_subscriber, get_subscriber, renew_subscription
+
+urlpatterns = [
+    path('subscribers/get-plan/', get_plan, name='async-get-plan'),
+    path('subscribers/add--subscription/', add_subscriber, name='async-add-subscriber'),
+    path('subscribers/renew-subscription/', renew_subscription, name='async-renew-subscription'),
+    path('subscribers/get-subscriber/', get_subscriber, name='async-get-subscriber')
+]
@@ -0,0 +1,133 @@
+from django.conf import settings
+
+from business.models.models import Business
+from users.models import UserBusinessMapping
+from users.tokens import BUSINESSES_CLAIM
+from utils.cache import cache_backend
+
+# (user_id, business_id) -> (role, business type), invalidated in every process by business.signals
+role_cache = cache_backend(
+    getattr(settings, 'BUSINESS_CONTEXT_CACHE_ALIAS', None),
+    maxsize=getattr(settings, 'BUSINESS_CONTEXT_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'BUSINESS_CONTEXT_CACHE_TTL', 30),
+    layered=True,
+)
+
+
+def cache_key(user_id, business_id):
+    return f'business-role:{user_id}:{business_id}'
+
+
+def forget_membership(user_id, business_id):
+    """Drop a cached role, for writes that send no signals such as QuerySet.update()."""
+    role_cache.delete(cache_key(user_id, business_id))
+
+
+class BusinessContext:
+    def __init__(self, business_id, role, business_type, business=None):
+        self.business_id = business_id
+        self.role = role
+        self.business_type = business_type
+        self._business = business
+
+    @property
+    def business(self):
+        if self._business is None:
+            self._business = Business.objects.get(id=self.business_id)
+        return self._business
+
+    async def abusiness(self):
+        if self._business is None:
+            self._business = await Business.objects.aget(id=self.business_id)
+        return self._business
+
+    @property
+    def is_owner(self):
+        return self.role == 'OWNER'
+
+    @property
+    def is_subscription_based(self):
+        return self.business_type == Business.SUBSCRIPTION_BASED
+
+
+def get_business_id(request):
+    business_id = request.META.get("HTTP_X_BUSINESS_ID")
+    if business_id is None:
+        return None
+    try:
+        return int(business_id)
+    except ValueError:
+        return None
+
+
+def context_from_token(request, business_id):
+    """Membership embedded in the access token (JWT_EMBED_BUSINESS_MEMBERSHIPS), if any."""
+    token = getattr(request, 'auth', None)
+    memberships = token.get(BUSINESSES_CLAIM) if token is not None and hasattr(token, 'get') else None
+    if not memberships or str(business_id) not in memberships:
+        return None
+    role, business_type = memberships[str(business_id)]
+    return BusinessContext(business_id, role, business_type)
+
+
+def resolve_business_context(user, business_id):
+    key = cache_key(user.id, business_id)
+    cached = role_cache.get(key)
+    if cached is not None:
+        role, business_type = cached
+        return BusinessContext(business_id, role, business_type)
+
+    mapping = UserBusinessMapping.objects.filter(
+        user=user, business_id=business_id
+    ).select_related('business').order_by('role').first()
+    if mapping is None:
+        return None
+
+    role_cache.set(key, (mapping.role, mapping.business.type))
+    return BusinessContext(business_id, mapping.role, mapping.business.type, mapping.business)
+
+
+async def aresolve_business_context(user, business_id):
+    key = cache_key(user.id, business_id)
+    cached = role_cache.get(key)
+    if cached is not None:
+        role, business_type = cached
+        return BusinessContext(business_id, role, business_type)
+
+    mapping = await UserBusinessMapping.objects.filter(
+        user=user, business_id=business_id
+    ).select_related('business').order_by('role').afirst()
+    if mapping is None:
+        return None
+
+    role_cache.set(key, (mapping.role, mapping.business.type))
+    return BusinessContext(business_id, mapping.role, mapping.business.type, mapping.business)
+
+
+def get_business_context(request):
+    """
+    The caller's membership in the business named by the X-Business-Id header, or None.
+    Resolved once per request and shared by the permission classes and the view.
+    """
+    if not hasattr(request, '_business_context'):
+        business_id = get_business_id(request)
+        if business_id is None or not request.user or not request.user.is_authenticated:
+            request._business_context = None
+        else:
+            request._business_context = (
+                context_from_token(request, business_id) or resolve_business_context(request.user, business_id)
+            )
+    return request._business_context
+
+
+async def aget_business_context(request):
+    """Async counterpart of get_business_context for views served under ASGI."""
+    if not hasattr(request, '_business_context'):
+        business_id = get_business_id(request)
+        if business_id is None or not request.user or not request.user.is_authenticated:
+            request._business_context = None
+        else:
+            request._business_context = (
+                context_from_token(request, business_id) or await aresolve_business_context(request.user, business_id)
+            )
+    return request._business_context
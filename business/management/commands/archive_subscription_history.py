@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from business.services.archive import archive_subscriptions, archive_transactions
+
+
+class Command(BaseCommand):
+    help = (
+        'Move subscriptions that ended more than --subscription-days ago (except each subscriber\'s '
+        'latest) and transactions older than --transaction-days that no remaining subscription '
+        'references into the archive tables, in batches. Read them back with ?history=true.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscription-days', type=int, default=90)
+        parser.add_argument('--transaction-days', type=int, default=365)
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows moved per transaction.')
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        subscriptions = 0
+        for moved in archive_subscriptions(today - timedelta(days=options['subscription_days']), options['batch_size']):
+            subscriptions += moved
+            self.stdout.write(f'Archived {subscriptions} subscriptions')
+
+        # after the subscriptions, so their transactions are no longer referenced from the hot table
+        transactions = 0
+        for moved in archive_transactions(timezone.now() - timedelta(days=options['transaction_days']), options['batch_size']):
+            transactions += moved
+            self.stdout.write(f'Archived {transactions} transactions')
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {subscriptions} subscriptions and {transactions} transactions'))
@@ -0,0 +1,230 @@
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from business.models.models import Invitation
+from business.models.subscription_models import Plan
+from business.services.seed_data import PASSWORD, seed
+from users.models import User
+from utils.common import percentile
+
+
+class Scenarios:
+    """
+    One request builder per route of users/urls.py and business/urls.py. Each returns
+    (client, method, url, payload); data a request consumes is created before timing starts.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.business = data.businesses[0]
+        self.owner = data.owners[0]
+        self.plan = data.plans[self.business.id][0]
+        self.subscribers = data.subscribers[self.business.id]
+
+        self.anonymous = APIClient()
+        self.owner_client = self.client_for(self.owner, self.business.id)
+        self.invitee = User.objects.create_user(email=f'bench-{data.tag}-invitee@bizzlers.local', password=PASSWORD)
+        self.invitee_client = self.client_for(self.invitee)
+
+    def client_for(self, user, business_id=None):
+        client = APIClient()
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+        if business_id:
+            headers['HTTP_X_BUSINESS_ID'] = str(business_id)
+        client.credentials(**headers)
+        return client
+
+    def all(self):
+        return {
+            'login': self.login,
+            'signup': self.signup,
+            'create-business': self.create_business,
+            'invite-to-business': self.invite,
+            'invite-action': self.invite_action,
+            'add-plan': self.add_plan,
+            'get-plan': self.get_plan,
+            'list-plans': self.list_plans,
+            'delete-plan': self.delete_plan,
+            'add-subscriber': self.add_subscriber,
+            'import-subscribers': self.import_subscribers,
+            'renew-subscription': self.renew_subscription,
+            'bulk-renew-subscriptions': self.bulk_renew_subscriptions,
+            'get-subscriber': self.get_subscriber,
+            'list-subscribers': self.list_subscribers,
+            'subscription-dashboard': self.dashboard,
+            'subscription-analytics': self.analytics,
+            'export-transactions': self.export_transactions,
+        }
+
+    def login(self, i):
+        return self.anonymous, 'post', reverse('login'), {'email': self.owner.email, 'password': PASSWORD}
+
+    def signup(self, i):
+        return self.anonymous, 'post', reverse('signup'), {'email': f'bench-{self.data.tag}-signup{i}@bizzlers.local', 'password': PASSWORD}
+
+    def create_business(self, i):
+        return self.owner_client, 'post', reverse('create-business'), {'name': f'Bench new {i}', 'type': 'SUBSCRIPTION'}
+
+    def invite(self, i):
+        return self.owner_client, 'post', reverse('invite-to-business'), {'email': f'bench-{self.data.tag}-staff{i}@bizzlers.local', 'role': 'STAFF'}
+
+    def invite_action(self, i):
+        invitation = Invitation.objects.create(
+            email=self.invitee.email, business=self.data.businesses[i % len(self.data.businesses)], role='STAFF', invited_by=self.owner
+        )
+        return self.invitee_client, 'post', reverse('invite-action'), {'action': 'decline', 'invitation_id': invitation.id}
+
+    def add_plan(self, i):
+        return self.owner_client, 'post', reverse('add-plan'), {'name': f'bench plan {i}', 'duration': 1, 'type': 'M', 'price': '99.00'}
+
+    def get_plan(self, i):
+        return self.owner_client, 'get', reverse('get-plan'), {'id': self.plan.id}
+
+    def list_plans(self, i):
+        return self.owner_client, 'get', reverse('list-plans'), None
+
+    def delete_plan(self, i):
+        plan = Plan.objects.create(name=f'bench doomed {i}', duration_count=1, duration_unit=Plan.MONTHLY, price=1, added_by=self.owner, business=self.business)
+        return self.owner_client, 'delete', f"{reverse('delete-plan')}?id={plan.id}", None
+
+    def add_subscriber(self, i):
+        return self.owner_client, 'post', reverse('add-subscriber'), {'name': f'new {i}', 'email': f'bench-{self.data.tag}-new{i}@bizzlers.local', 'plan': self.plan.id}
+
+    def import_subscribers(self, i):
+        return self.owner_client, 'post', reverse('import-subscribers'), [
+            {'name': f'imported {i}-{j}', 'email': f'bench-{self.data.tag}-imp{i}-{j}@bizzlers.local', 'plan': self.plan.id}
+            for j in range(50)
+        ]
+
+    def renew_subscription(self, i):
+        return self.owner_client, 'post', reverse('renew-subscription'), {'subscriber': self.subscribers[i % len(self.subscribers)].id, 'plan': self.plan.id}
+
+    def bulk_renew_subscriptions(self, i):
+        return self.owner_client, 'post', reverse('bulk-renew-subscriptions'), {
+            'subscribers': [subscriber.id for subscriber in self.subscribers[:100]], 'plan': self.plan.id
+        }
+
+    def get_subscriber(self, i):
+        return self.owner_client, 'get', reverse('get-subscriber'), {'id': self.subscribers[i % len(self.subscribers)].id}
+
+    def list_subscribers(self, i):
+        return self.owner_client, 'get', reverse('list-subscribers'), {'limit': 50, 'active': 'true'}
+
+    def dashboard(self, i):
+        return self.owner_client, 'get', reverse('subscription-dashboard'), {'group_by': 'month'}
+
+    def analytics(self, i):
+        return self.owner_client, 'get', reverse('subscription-analytics'), {'months': 12}
+
+    def export_transactions(self, i):
+        return self.owner_client, 'get', reverse('export-transactions'), {'output': 'csv'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a dataset and drive every API route through the test client, reporting p50/p95/p99 '
+        'latency, queries and allocated memory per request. Runs against the configured database '
+        '(SQLite or a local MySQL) inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--businesses', type=int, default=5)
+        parser.add_argument('--subscribers', type=int, default=1000, help='Subscribers per business.')
+        parser.add_argument('--iterations', type=int, default=30, help='Requests per route.')
+        parser.add_argument('--only', action='append', help='Only run this route name (repeatable).')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--baseline', help='JSON results of an earlier run to compare against.')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 slowdown against the baseline (0.25 = 25%%).')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            results = self.run(options)
+            transaction.set_rollback(True)
+
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['tolerance'])
+
+    def send(self, client, method, url, payload):
+        response = getattr(client, method)(url, payload, format='json' if method != 'get' else None)
+        if response.streaming:
+            # streamed bodies run their queries while being consumed
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    def run(self, options):
+        data = seed(businesses=options['businesses'], subscribers_per_business=options['subscribers'])
+        scenarios = Scenarios(data).all()
+        if options['only']:
+            scenarios = {name: scenario for name, scenario in scenarios.items() if name in options['only']}
+
+        results = {}
+        for name, scenario in scenarios.items():
+            # warm up caches (business context, plans) with one untimed request
+            self.send(*scenario(options['iterations']))
+
+            latencies, queries, allocations, errors = [], [], [], 0
+            for i in range(options['iterations']):
+                request = scenario(i)
+                # every other request is traced for allocations so tracing does not skew latency
+                traced = i % 2 == 1
+                if traced:
+                    tracemalloc.start()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = self.send(*request)
+                    elapsed = time.perf_counter() - started
+                if traced:
+                    allocations.append(tracemalloc.get_traced_memory()[1])
+                    tracemalloc.stop()
+                else:
+                    latencies.append(elapsed * 1000)
+                queries.append(len(captured))
+                errors += response.status_code >= 400
+
+            results[name] = {
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'queries': max(queries),
+                'peak_kib': round(max(allocations) / 1024, 1) if allocations else None,
+                'errors': errors,
+            }
+        return results
+
+    def report(self, results):
+        self.stdout.write(f"{'route':<24}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'peak KiB':>10}{'errors':>8}")
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<24}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{row['queries']:>9}{str(row['peak_kib']):>10}{row['errors']:>8}"
+            )
+
+    def compare(self, results, baseline_path, tolerance):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+        regressions = []
+        for name, row in results.items():
+            before = baseline.get(name)
+            if not before:
+                continue
+            if row['queries'] > before['queries']:
+                regressions.append(f"{name}: {before['queries']} -> {row['queries']} queries")
+            if row['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{name}: p95 {before['p95_ms']} -> {row['p95_ms']} ms")
+
+        if regressions:
+            raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
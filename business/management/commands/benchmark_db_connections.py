@@ -0,0 +1,99 @@
+import threading
+import time
+from copy import deepcopy
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from utils.common import percentile
+from utils.pool import PooledDatabaseWrapper, get_pool, pools
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate requests of a few queries each against the configured database with connections '
+        'opened per request (CONN_MAX_AGE=0), kept per thread (persistent) and taken from the '
+        'in-process pool of utils.pool, reporting physical connects and per-request latency. '
+        '--threaded runs every request in a new thread, as ASGI does.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--queries', type=int, default=3, help='Queries per request.')
+        parser.add_argument('--threaded', action='store_true', help='Serve each request from a new thread.')
+
+    def wrapper_class(self, alias, pooled):
+        backend = type(connections[alias])
+        command = self
+
+        class Counted(backend):
+            def get_new_connection(self, conn_params):
+                command.connects += 1
+                return super().get_new_connection(conn_params)
+
+        return type('Pooled', (PooledDatabaseWrapper, Counted), {}) if pooled else Counted
+
+    def run_mode(self, alias, options, max_age, pooled):
+        settings_dict = deepcopy(connections.settings[alias])
+        settings_dict.update(CONN_MAX_AGE=max_age, CONN_HEALTH_CHECKS=True)
+        wrapper_class = self.wrapper_class(alias, pooled)
+        pool_alias = f'{alias}-benchmark'
+        local = threading.local()
+        opened = []
+        self.connects = 0
+
+        def request():
+            # what a request does with django.db.connection: queries, then request_finished
+            if not hasattr(local, 'connection'):
+                local.connection = wrapper_class(settings_dict, pool_alias)
+                opened.append(local.connection)
+            connection = local.connection
+            connection.close_if_unusable_or_obsolete()
+            started = time.perf_counter()
+            with connection.cursor() as cursor:
+                for _ in range(options['queries']):
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            connection.close_if_unusable_or_obsolete()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        latencies = []
+        for _ in range(options['requests']):
+            if options['threaded']:
+                thread = threading.Thread(target=request)
+                thread.start()
+                thread.join()
+            else:
+                request()
+
+        # connections left behind by finished threads are what leaks under ASGI
+        for connection in opened:
+            connection.inc_thread_sharing()
+            connection.close()
+        if pooled:
+            get_pool(pool_alias, settings_dict).clear()
+            pools.pop(pool_alias, None)
+
+        return {
+            'connects': self.connects,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'total_ms': round(sum(latencies), 1),
+        }
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        modes = {
+            'per request': (0, False),
+            'persistent': (None, False),
+            'pooled': (0, True),
+        }
+        self.stdout.write(
+            f"{connections[alias].vendor}, {options['requests']} requests of {options['queries']} queries"
+            f"{', one thread each' if options['threaded'] else ''}"
+        )
+        self.stdout.write(f"{'mode':<14}{'connects':>10}{'p50 ms':>10}{'p95 ms':>10}{'total ms':>11}")
+        for name, (max_age, pooled) in modes.items():
+            row = self.run_mode(alias, options, max_age, pooled)
+            self.stdout.write(f"{name:<14}{row['connects']:>10}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['total_ms']:>11}")
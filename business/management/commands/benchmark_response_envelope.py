@@ -0,0 +1,62 @@
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from utils.renderers import EnvelopeJSONRenderer, FastEnvelopeJSONRenderer
+
+
+def sample_payload(rows):
+    return {
+        "message": "Subscribers fetched successfuly",
+        "subscribers": [
+            {"id": i, "name": f"subscriber {i}", "email": f"subscriber{i}@bizzlers.local",
+             "plan_end_date": date(2024, 1, 1), "amount": Decimal('499.00')}
+            for i in range(rows)
+        ],
+    }
+
+
+def render_twice(payload):
+    # what HeadersMiddleware used to do: render the view's response, then rebuild and render the envelope
+    response = Response(dict(payload), status=200)
+    JSONRenderer().render(response.data)
+    data = response.data
+    message = data.pop('message')
+    res = Response({"status_code": 1, "message": message, "data": data}, status=200)
+    res.accepted_renderer = JSONRenderer()
+    res.accepted_media_type = "application/json"
+    res.renderer_context = {}
+    res.render()
+    return res.content
+
+
+def render_once(renderer):
+    def render(payload):
+        response = Response(payload, status=200)
+        return renderer.render(payload, 'application/json', {'response': response})
+    return render
+
+
+class Command(BaseCommand):
+    help = 'Measure per-response envelope overhead of the old middleware re-render against the envelope renderers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--responses', type=int, default=2000)
+        parser.add_argument('--rows', type=int, default=20, help='Rows in each sample payload.')
+
+    def handle(self, *args, **options):
+        payload = sample_payload(options['rows'])
+        for label, render in [
+            ('middleware re-render', render_twice),
+            ('EnvelopeJSONRenderer', render_once(EnvelopeJSONRenderer())),
+            ('FastEnvelopeJSONRenderer', render_once(FastEnvelopeJSONRenderer())),
+        ]:
+            started = time.perf_counter()
+            for _ in range(options['responses']):
+                render(payload)
+            per_response = (time.perf_counter() - started) / options['responses'] * 1e6
+            self.stdout.write(f'{label:<26} {per_response:8.1f} us/response')
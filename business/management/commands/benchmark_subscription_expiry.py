@@ -0,0 +1,68 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from business.models.models import Business
+from business.models.subscription_models import Subscriber, Subscription
+from business.services.expiry import expire_subscriptions
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compare the per-row subscription expiry loop with the bulk expiry engine. All seeded data is rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscriptions', type=int, default=10000)
+        parser.add_argument('--expired-ratio', type=float, default=0.5)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def seed(self, count, expired_ratio):
+        today = timezone.now().date()
+        owner = User.objects.create(email=f'expiry-bench-{time.time_ns()}@bizzlers.local')
+        business = Business.objects.create(name='Expiry benchmark', owner=owner, type=Business.SUBSCRIPTION_BASED)
+        Subscriber.objects.bulk_create(
+            Subscriber(name=f'subscriber {i}', business=business, email=f'expiry-bench-{business.id}-{i}@bizzlers.local')
+            for i in range(count)
+        )
+        # read back, bulk_create sets no ids on backends without RETURNING (MySQL)
+        subscribers = Subscriber.objects.filter(business=business).order_by('id')
+        expired = int(count * expired_ratio)
+        Subscription.objects.bulk_create(
+            Subscription(
+                subscriber=subscriber,
+                plan_start_date=today - timedelta(days=60),
+                plan_end_date=today - timedelta(days=1) if i < expired else today + timedelta(days=30),
+            )
+            for i, subscriber in enumerate(subscribers)
+        )
+
+    def timed(self, count, expired_ratio, run):
+        with transaction.atomic():
+            self.seed(count, expired_ratio)
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return elapsed
+
+    def handle(self, *args, **options):
+        count = options['subscriptions']
+        ratio = options['expired_ratio']
+
+        def loop():
+            for subscription in Subscription.objects.all():
+                subscription.check_and_update_status()
+
+        def bulk():
+            for _ in expire_subscriptions(batch_size=options['batch_size']):
+                pass
+
+        loop_time = self.timed(count, ratio, loop)
+        bulk_time = self.timed(count, ratio, bulk)
+
+        self.stdout.write(f'per-row loop: {loop_time:.3f}s')
+        self.stdout.write(f'bulk engine:  {bulk_time:.3f}s')
+        self.stdout.write(self.style.SUCCESS(f'speedup: {loop_time / bulk_time:.1f}x'))
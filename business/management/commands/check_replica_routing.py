@@ -0,0 +1,89 @@
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from business.models.models import Business
+from business.models.subscription_models import Plan
+from business.services.seed_data import seed
+from middlewares.replicas import pinned_users
+from utils.routers import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Send requests through the test client and check which database each one reads from: '
+        'GETs on a replica, writes and everything after them on the primary, and a user who just '
+        'wrote pinned to the primary. Needs a replica in DATABASES, e.g. DJANGO_ENV=replicas. '
+        'The seeded businesses are deleted afterwards.'
+    )
+
+    def client_for(self, user, business_id):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}',
+            HTTP_X_BUSINESS_ID=str(business_id),
+        )
+        return client
+
+    def queries(self, send):
+        """Run `send` and count the statements it sent to each alias."""
+        with ExitStack() as stack:
+            captured = {alias: stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections}
+            response = send()
+        return response, {alias: len(queries) for alias, queries in captured.items()}
+
+    def handle(self, *args, **options):
+        aliases = replicas()
+        if not aliases:
+            raise CommandError('No read replica configured in DATABASES.')
+
+        checks = []
+
+        def check(name, passed, counts=None):
+            checks.append(passed)
+            detail = f' {counts}' if counts is not None else ''
+            self.stdout.write((self.style.SUCCESS('ok  ') if passed else self.style.ERROR('FAIL')) + f' {name}{detail}')
+
+        def on_replica(counts):
+            return sum(counts[alias] for alias in aliases)
+
+        check('reads outside requests use the primary', router.db_for_read(Plan) == DEFAULT_DB_ALIAS)
+
+        data = seed(businesses=2, plans_per_business=1, subscribers_per_business=1, expired_ratio=0)
+        try:
+            writer = self.client_for(data.owners[0], data.businesses[0].id)
+            reader = self.client_for(data.owners[1], data.businesses[1].id)
+            get_plan = reverse('get-plan')
+
+            # warm the user cache, whose misses always read the primary
+            writer.get(get_plan, {'id': 0})
+            reader.get(get_plan, {'id': 0})
+
+            _, counts = self.queries(lambda: writer.get(get_plan, {'id': 0}))
+            check('GET reads from a replica', on_replica(counts) > 0 and counts[DEFAULT_DB_ALIAS] == 0, counts)
+
+            _, counts = self.queries(lambda: writer.post(
+                reverse('add-plan'), {'name': 'routing check', 'duration': 1, 'type': 'M', 'price': '1.00'}, format='json'
+            ))
+            check('POST uses only the primary', on_replica(counts) == 0 and counts[DEFAULT_DB_ALIAS] > 0, counts)
+
+            _, counts = self.queries(lambda: writer.get(get_plan, {'id': 0}))
+            check('GET right after a write stays on the primary', on_replica(counts) == 0, counts)
+
+            _, counts = self.queries(lambda: reader.get(get_plan, {'id': 0}))
+            check('other users still read from a replica', on_replica(counts) > 0, counts)
+        finally:
+            for owner in data.owners:
+                pinned_users.delete(str(owner.id))
+            Business.objects.filter(id__in=[business.id for business in data.businesses]).delete()
+            for owner in data.owners:
+                owner.delete()
+
+        if not all(checks):
+            raise CommandError('Read replica routing is not working as expected.')
+        self.stdout.write(self.style.SUCCESS('Read replica routing works.'))
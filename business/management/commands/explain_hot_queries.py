@@ -0,0 +1,82 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from business.models.idempotency_models import IdempotencyKey
+from business.models.models import Invitation
+from business.models.subscription_models import Plan, Subscriber, Subscription, Transaction
+from users.models import UserBusinessMapping
+
+
+def hot_queries():
+    today = timezone.now().date()
+    return {
+        'plan by name': Plan.objects.filter(name='gold', business_id=1),
+        'plan in business': Plan.objects.filter(id=1, business_id=1),
+        'active subscription': Subscription.objects.filter(subscriber_id=1, active=True).order_by('-plan_start_date'),
+        'renewal predecessor': Subscription.objects.filter(subscriber_id=1, plan_end_date__gte=today).order_by('-plan_end_date'),
+        'expiring range': Subscription.objects.filter(active=True, plan_end_date__gte=today, plan_end_date__lte=today + timedelta(days=7)),
+        'pending activation': Subscription.objects.filter(active=False, plan_end_date__gt=today, plan_start_date__lte=today),
+        'subscriber page': Subscriber.objects.filter(business_id=1, id__gt=0).order_by('id'),
+        'invitation by business': Invitation.objects.filter(email='a@bizzlers.local', business_id=1),
+        'pending invitations': Invitation.objects.filter(email='a@bizzlers.local', status=Invitation.PENDING),
+        'membership': UserBusinessMapping.objects.filter(user_id=1, business_id=1).order_by('role'),
+        'membership with role': UserBusinessMapping.objects.filter(user_id=1, business_id=1, role='OWNER'),
+        'ledger range': Transaction.objects.filter(business_id=1, created_at__gte=timezone.now()).order_by('created_at', 'id'),
+        'idempotency key': IdempotencyKey.objects.filter(user_id=1, key='k'),
+    }
+
+
+def full_scans(queryset):
+    """Tables the backend's plan reads without an index."""
+    if connection.vendor == 'mysql':
+        plan = json.loads(queryset.explain(format='json'))
+        tables = []
+
+        def walk(node):
+            if isinstance(node, dict):
+                if node.get('access_type') == 'ALL':
+                    tables.append(node.get('table_name'))
+                for value in node.values():
+                    walk(value)
+            elif isinstance(node, list):
+                for value in node:
+                    walk(value)
+
+        walk(plan)
+        return tables, json.dumps(plan, indent=2)
+
+    plan = queryset.explain()
+    if connection.vendor == 'postgresql':
+        return [line.split(' on ')[1].split()[0] for line in plan.splitlines() if 'Seq Scan on ' in line], plan
+    # sqlite: "SCAN table" without an index is a full scan, "SEARCH ... USING INDEX" is not
+    return [line.split('SCAN ')[1].split()[0] for line in plan.splitlines() if 'SCAN ' in line and 'INDEX' not in line], plan
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the lookups every request makes and fail if any of them reads a table without an index. '
+        'PostgreSQL may pick a sequential scan on tiny tables, so run it against production sized data there.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan of every query.')
+
+    def handle(self, *args, **options):
+        failures = []
+        for name, queryset in hot_queries().items():
+            tables, plan = full_scans(queryset)
+            if tables:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'{name}: full scan of {", ".join(tables)}'))
+            else:
+                self.stdout.write(f'{name}: indexed')
+            if options['verbose_plans'] or tables:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries are not using an index.')
+        self.stdout.write(self.style.SUCCESS('All hot queries use an index.'))
@@ -0,0 +1,58 @@
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from utils.common import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive concurrent requests at a running server and report throughput and latency. '
+        'Start the app under WSGI (e.g. gunicorn bizzlers.wsgi) and ASGI (e.g. uvicorn bizzlers.asgi:application) '
+        'against the same local database and compare /api/business/... with /api/async/business/...'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Full endpoint URL, e.g. http://127.0.0.1:8000/api/async/business/subscribers/get-plan/?id=1')
+        parser.add_argument('--token', required=True, help='JWT access token.')
+        parser.add_argument('--business', required=True, help='X-Business-Id header value.')
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--body', help='JSON request body.')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, **options):
+        body = json.dumps(json.loads(options['body'])).encode() if options['body'] else None
+        headers = {
+            'Authorization': f"Bearer {options['token']}",
+            'X-Business-Id': options['business'],
+            'Content-Type': 'application/json',
+        }
+
+        def call(_):
+            request = urllib.request.Request(options['url'], data=body, headers=headers, method=options['method'])
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            return time.perf_counter() - started, status
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(call, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency * 1000 for latency, _ in results]
+        errors = sum(1 for _, status in results if status >= 400)
+        self.stdout.write(f"{len(results)} requests, concurrency {options['concurrency']}, {errors} errors")
+        self.stdout.write(f"throughput: {len(results) / elapsed:.1f} req/s")
+        self.stdout.write(
+            f"latency ms: p50 {percentile(latencies, 50):.1f}  p95 {percentile(latencies, 95):.1f}  p99 {percentile(latencies, 99):.1f}"
+        )
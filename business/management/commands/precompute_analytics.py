@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from business.models.models import Business
+from business.models.rollup_models import BusinessAnalytics
+from business.services.analytics import get_analytics
+
+
+class Command(BaseCommand):
+    help = (
+        'Compute today\'s analytics of every subscription business (or the given ones) ahead of '
+        'the first request and delete stored analytics older than --keep-days. Run it daily, '
+        'shortly after midnight.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, action='append', help='Only this business id (repeatable).')
+        parser.add_argument('--months', type=int, default=12)
+        parser.add_argument('--keep-days', type=int, default=7)
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        businesses = Business.objects.filter(type=Business.SUBSCRIPTION_BASED)
+        if options['business']:
+            businesses = businesses.filter(id__in=options['business'])
+
+        started = time.perf_counter()
+        computed = 0
+        for business_id in businesses.order_by('id').values_list('id', flat=True).iterator():
+            get_analytics(business_id, months=options['months'], today=today, refresh=True)
+            computed += 1
+
+        removed, _ = BusinessAnalytics.objects.filter(day__lt=today - timedelta(days=options['keep_days'])).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Computed analytics of {computed} businesses in {time.perf_counter() - started:.1f}s, removed {removed} old ones'
+        ))
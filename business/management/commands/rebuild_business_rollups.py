@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from business.services.rollups import rebuild_rollups
+
+class Command(BaseCommand):
+    help = 'Recompute the per business daily summaries from transactions and subscriptions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business', type=int, action='append', help='Only rebuild this business id (repeatable).')
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollups(options['business'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} daily summaries'))
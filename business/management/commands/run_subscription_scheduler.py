@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from business.services.scheduler import SubscriptionScheduler
+
+class Command(BaseCommand):
+    help = 'Activate queued subscriptions when they start and expire them when they end'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single tick and exit (for cron).')
+        parser.add_argument('--interval', type=int, default=60, help='Seconds between ticks when running as a worker.')
+        parser.add_argument('--horizon-days', type=int, default=7, help='Days of upcoming events kept in memory.')
+
+    def handle(self, *args, **options):
+        scheduler = SubscriptionScheduler(horizon_days=options['horizon_days'])
+        while True:
+            activated, expired = scheduler.tick()
+            if activated or expired or options['once']:
+                self.stdout.write(self.style.SUCCESS(f'{activated} subscriptions activated, {expired} expired'))
+            if options['once']:
+                return
+            time.sleep(options['interval'])
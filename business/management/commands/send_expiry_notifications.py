@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from business.services.notifications import notify_expiring
+
+class Command(BaseCommand):
+    help = 'Notify subscribers whose subscription ends within the next days, once per subscription'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Notify subscriptions ending within this many days.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Subscriptions read per query.')
+        parser.add_argument('--rate', type=float, default=None, help='Maximum messages per second.')
+        parser.add_argument('--limit', type=int, default=None, help='Maximum messages per run.')
+        parser.add_argument('--once', action='store_true', help='Run a single pass and exit (for cron).')
+        parser.add_argument('--interval', type=int, default=3600, help='Seconds between passes when running as a worker.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            sent = businesses = 0
+            for _, count in notify_expiring(
+                days=options['days'],
+                batch_size=options['batch_size'],
+                rate=options['rate'],
+                limit=options['limit'],
+            ):
+                sent += count
+                businesses += 1
+            if sent or options['once']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'{sent} expiry notifications sent for {businesses} business groups in {time.perf_counter() - started:.1f}s'
+                ))
+            if options['once']:
+                return
+            time.sleep(options['interval'])
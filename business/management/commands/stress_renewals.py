@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from business.models.models import Business
+from business.models.subscription_models import Subscription, Transaction
+from business.services.renewals import renew_subscription
+from business.services.seed_data import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Renew one subscriber from many threads at once and check that the periods chain without '
+        'overlapping and that retries sharing an idempotency key charge once. Needs a database with '
+        'row locks (MySQL/PostgreSQL); the seeded business is deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--renewals', type=int, default=40, help='Renewals without a key, spread over the threads.')
+        parser.add_argument('--retries', type=int, default=8, help='Concurrent requests sharing one idempotency key.')
+
+    def run_concurrently(self, threads, count, renew):
+        def worker(i):
+            try:
+                return renew(i).transaction.id
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            return list(pool.map(worker, range(count)))
+
+    def check_chain(self, subscriber):
+        periods = list(
+            Subscription.objects.filter(subscriber=subscriber)
+            .order_by('plan_start_date', 'id')
+            .values_list('plan_start_date', 'plan_end_date')
+        )
+        return [
+            (previous, current) for previous, current in zip(periods, periods[1:])
+            if current[0] < previous[1]
+        ]
+
+    def handle(self, *args, **options):
+        if not connection.features.has_select_for_update:
+            raise CommandError(f'{connection.vendor} does not support SELECT ... FOR UPDATE.')
+
+        data = seed(businesses=1, plans_per_business=1, subscribers_per_business=1, expired_ratio=0)
+        business = data.businesses[0]
+        owner = data.owners[0]
+        plan = data.plans[business.id][0]
+        subscriber = data.subscribers[business.id][0]
+        try:
+            self.run_concurrently(
+                options['threads'], options['renewals'],
+                lambda i: renew_subscription(business, owner, subscriber.id, plan=plan),
+            )
+            overlaps = self.check_chain(subscriber)
+            created = Subscription.objects.filter(subscriber=subscriber).count() - 1
+
+            key = f'stress-{data.tag}'
+            replayed = set(self.run_concurrently(
+                options['threads'], options['retries'],
+                lambda i: renew_subscription(business, owner, subscriber.id, plan=plan, idempotency_key=key),
+            ))
+            charged = Transaction.objects.filter(business=business, idempotency_key=key).count()
+        finally:
+            Business.objects.filter(id=business.id).delete()
+            owner.delete()
+
+        self.stdout.write(f"{created} renewals for {options['renewals']} requests, {len(overlaps)} overlapping periods")
+        for previous, current in overlaps[:10]:
+            self.stdout.write(f"  {previous[0]}..{previous[1]} overlaps {current[0]}..{current[1]}")
+        self.stdout.write(f"{charged} transaction(s) for {options['retries']} retries sharing one key")
+
+        if overlaps or created != options['renewals'] or charged != 1 or len(replayed) != 1:
+            raise CommandError('Concurrent renewals are not serialized.')
+        self.stdout.write(self.style.SUCCESS('Renewals are serialized and idempotent.'))
@@ -1,11 +1,26 @@
 from django.core.management.base import BaseCommand
-from business.models.subscription_models import Subscription
+from business.services.expiry import expire_subscriptions
 
 class Command(BaseCommand):
     help = 'Update the status of all subscriptions based on the plan_end_date'
 
-    def handle(self, *args, **kwargs):
-        subscriptions = Subscription.objects.all()
-        for subscription in subscriptions:
-            subscription.check_and_update_status()
-        self.stdout.write(self.style.SUCCESS('Successfully updated subscription statuses'))
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help='Primary key window updated per statement.')
+        parser.add_argument('--start-after', type=int, default=0, help='Resume after this subscription id.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the subscriptions that would expire.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        total = 0
+        for first_id, last_id, rows in expire_subscriptions(
+            batch_size=options['batch_size'],
+            start_after=options['start_after'],
+            dry_run=dry_run,
+        ):
+            total += rows
+            self.stdout.write(f'ids {first_id}-{last_id}: {rows} {"to expire" if dry_run else "expired"}')
+
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f'{total} subscriptions would be expired'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Successfully updated subscription statuses, {total} expired'))
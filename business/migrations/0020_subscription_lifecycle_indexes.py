@@ -0,0 +1,25 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0019_subscription_active'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['subscriber', 'active', 'plan_start_date'], name='subscription_lifecycle_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['active', 'plan_start_date'], name='subscription_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['active', 'plan_end_date'], name='subscription_end_idx'),
+        ),
+    ]
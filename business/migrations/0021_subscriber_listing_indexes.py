@@ -0,0 +1,21 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0020_subscription_lifecycle_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscriber',
+            index=models.Index(fields=['business', 'id'], name='subscriber_business_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['subscriber', 'active', 'plan_end_date'], name='subscription_expiry_idx'),
+        ),
+    ]
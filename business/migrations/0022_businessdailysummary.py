@@ -0,0 +1,35 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0021_subscriber_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessDailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('transactions', models.PositiveIntegerField(default=0)),
+                ('subscriptions_started', models.PositiveIntegerField(default=0)),
+                ('subscriptions_ending', models.PositiveIntegerField(default=0)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='business.business')),
+            ],
+            options={
+                'verbose_name': 'Business daily summary',
+                'verbose_name_plural': 'Business daily summaries',
+                'db_table': 'subscription_daily_rollups',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='businessdailysummary',
+            constraint=models.UniqueConstraint(fields=('business', 'day'), name='unique_business_day_rollup'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:18
+
+import re
+
+from django.db import migrations, models
+
+
+def split_duration(apps, schema_editor):
+    Plan = apps.get_model('business', 'Plan')
+    db_alias = schema_editor.connection.alias
+    for plan in Plan.objects.using(db_alias).exclude(duration__isnull=True).only('id', 'duration').iterator():
+        match = re.match(r'(\d+)\s*([DMY])', plan.duration)
+        if match:
+            Plan.objects.using(db_alias).filter(id=plan.id).update(duration_count=int(match.group(1)), duration_unit=match.group(2))
+
+
+def join_duration(apps, schema_editor):
+    Plan = apps.get_model('business', 'Plan')
+    db_alias = schema_editor.connection.alias
+    for plan in Plan.objects.using(db_alias).exclude(duration_count__isnull=True).only('id', 'duration_count', 'duration_unit').iterator():
+        Plan.objects.using(db_alias).filter(id=plan.id).update(duration=f"{plan.duration_count} {plan.duration_unit}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0022_businessdailysummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plan',
+            name='duration_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='plan',
+            name='duration_unit',
+            field=models.CharField(blank=True, choices=[('D', 'DAILY'), ('M', 'MONTHLY'), ('Y', 'YEARLY')], max_length=1, null=True),
+        ),
+        migrations.RunPython(split_duration, join_duration),
+        migrations.RemoveField(
+            model_name='plan',
+            name='duration',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0025_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['business', 'created_at'], name='transaction_ledger_idx'),
+        ),
+    ]
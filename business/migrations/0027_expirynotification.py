@@ -0,0 +1,28 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0026_transaction_ledger_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpiryNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='business.business')),
+                ('subscription', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='business.subscription')),
+            ],
+            options={
+                'verbose_name': 'Expiry notification',
+                'verbose_name_plural': 'Expiry notifications',
+                'db_table': 'subscription_expiry_notifications',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:30
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def rename_duplicate_plans(apps, schema_editor):
+    # add_plan already refuses duplicate names, but older rows may still collide
+    Plan = apps.get_model('business', 'Plan')
+    db_alias = schema_editor.connection.alias
+    duplicates = Plan.objects.using(db_alias).exclude(name__isnull=True).values('business_id', 'name').annotate(rows=Count('id')).filter(rows__gt=1)
+    for duplicate in duplicates:
+        plans = Plan.objects.using(db_alias).filter(business_id=duplicate['business_id'], name=duplicate['name']).order_by('id')
+        for number, plan in enumerate(plans[1:], start=2):
+            Plan.objects.using(db_alias).filter(id=plan.id).update(name=f"{plan.name} ({number})"[:50])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0027_expirynotification'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invitation',
+            index=models.Index(fields=['email', 'business'], name='invitation_email_business_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invitation',
+            index=models.Index(fields=['email', 'status'], name='invitation_email_status_idx'),
+        ),
+        migrations.RunPython(rename_duplicate_plans, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='plan',
+            constraint=models.UniqueConstraint(fields=('business', 'name'), name='unique_plan_name_per_business'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('business', '0028_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('idempotency_key', models.CharField(blank=True, max_length=64, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='business.business')),
+                ('conducted_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('plan', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='business.plan')),
+            ],
+            options={
+                'verbose_name': 'Archived transaction',
+                'verbose_name_plural': 'Archived transactions',
+                'db_table': 'subscription_transactions_archive',
+                'indexes': [models.Index(fields=['business', 'created_at'], name='transaction_archive_ledger_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSubscription',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('plan_start_date', models.DateField()),
+                ('plan_end_date', models.DateField()),
+                ('transaction_id', models.BigIntegerField(null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('plan', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='business.plan')),
+                ('subscriber', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='business.subscriber')),
+            ],
+            options={
+                'verbose_name': 'Archived subscription',
+                'verbose_name_plural': 'Archived subscriptions',
+                'db_table': 'subscription_subscriptions_archive',
+                'indexes': [models.Index(fields=['subscriber', 'plan_start_date'], name='subscription_archive_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0029_subscription_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessAnalytics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('months', models.PositiveSmallIntegerField()),
+                ('data', models.JSONField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='business.business')),
+            ],
+            options={
+                'verbose_name': 'Business analytics',
+                'verbose_name_plural': 'Business analytics',
+                'db_table': 'subscription_analytics_snapshots',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='businessanalytics',
+            constraint=models.UniqueConstraint(fields=('business', 'day', 'months'), name='unique_business_analytics_day'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # the counters change meaning from subscriptions to subscriber coverage;
+    # refill existing summaries with `manage.py rebuild_business_rollups`
+
+    dependencies = [
+        ('business', '0030_business_analytics'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='businessdailysummary',
+            old_name='subscriptions_started',
+            new_name='subscribers_started',
+        ),
+        migrations.RenameField(
+            model_name='businessdailysummary',
+            old_name='subscriptions_ending',
+            new_name='subscribers_ending',
+        ),
+        migrations.AlterField(
+            model_name='businessdailysummary',
+            name='subscribers_started',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='businessdailysummary',
+            name='subscribers_ending',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='businessdailysummary',
+            name='subscribers_returned',
+            field=models.IntegerField(default=0),
+        ),
+    ]
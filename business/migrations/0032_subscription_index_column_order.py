@@ -0,0 +1,41 @@
+# Generated by Django 4.2.13 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0031_rollup_subscriber_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='subscription',
+            name='subscription_lifecycle_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='subscription',
+            name='subscription_start_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='subscription',
+            name='subscription_end_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='subscription',
+            name='subscription_expiry_idx',
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['subscriber', 'plan_start_date', 'active'], name='subscription_lifecycle_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['subscriber', 'plan_end_date', 'active'], name='subscription_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['plan_end_date', 'active'], name='subscription_end_idx'),
+        ),
+    ]
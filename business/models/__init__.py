@@ -1,2 +1,6 @@
 from business.models.models import *
 from business.models.subscription_models import *
+from business.models.rollup_models import *
+from business.models.idempotency_models import *
+from business.models.notification_models import *
+from business.models.archive_models import *
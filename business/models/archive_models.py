@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db import models
+
+from business.models.models import Business
+from business.models.subscription_models import Plan, Subscriber
+
+User = settings.AUTH_USER_MODEL
+
+
+class ArchivedTransaction(models.Model):
+    """
+    A transaction moved out of subscription_transactions by business.services.archive.
+    Keeps its id and timestamps, so the ledger reads it back in place when history is asked for.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    plan = models.ForeignKey(Plan, on_delete=models.CASCADE, null=True)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    conducted_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    business = models.ForeignKey(Business, on_delete=models.CASCADE)
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archived transaction"
+        verbose_name_plural = "Archived transactions"
+        db_table = 'subscription_transactions_archive'
+        indexes = [
+            models.Index(fields=['business', 'created_at'], name='transaction_archive_ledger_idx'),
+        ]
+
+
+class ArchivedSubscription(models.Model):
+    """
+    An ended, inactive subscription moved out of subscription_subscriptions. Its transaction
+    may be in either transaction table, so it is kept as a plain id.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    subscriber = models.ForeignKey(Subscriber, on_delete=models.CASCADE)
+    plan = models.ForeignKey(Plan, on_delete=models.CASCADE, null=True)
+    plan_start_date = models.DateField()
+    plan_end_date = models.DateField()
+    transaction_id = models.BigIntegerField(null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archived subscription"
+        verbose_name_plural = "Archived subscriptions"
+        db_table = 'subscription_subscriptions_archive'
+        indexes = [
+            models.Index(fields=['subscriber', 'plan_start_date'], name='subscription_archive_idx'),
+        ]
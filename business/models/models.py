@@ -51,5 +51,11 @@ class Invitation(Auditable,models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
     invited_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='invitations_sent')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['email', 'business'], name='invitation_email_business_idx'),
+            models.Index(fields=['email', 'status'], name='invitation_email_status_idx'),
+        ]
+
     def __str__(self):
         return f"Invitation to {self.email} for {self.business.name} as {self.role}"
\ No newline at end of file
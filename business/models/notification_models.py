@@ -0,0 +1,22 @@
+from django.db import models
+
+from business.models.models import Business
+from business.models.subscription_models import Subscription
+
+
+class ExpiryNotification(models.Model):
+    """
+    One row per subscription whose subscriber was told it is about to end. Written by
+    business.services.notifications after delivery; acts as the pipeline's checkpoint.
+    """
+    subscription = models.OneToOneField(Subscription, on_delete=models.CASCADE)
+    business = models.ForeignKey(Business, on_delete=models.CASCADE)
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Expiry notification"
+        verbose_name_plural = "Expiry notifications"
+        db_table = 'subscription_expiry_notifications'
+
+    def __str__(self):
+        return f"{self.subscription_id} notified at {self.sent_at}"
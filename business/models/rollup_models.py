@@ -0,0 +1,55 @@
+from django.db import models
+
+from business.models.models import Business
+
+
+class BusinessDailySummary(models.Model):
+    """
+    Per business and day: revenue and transactions booked that day, and subscribers whose
+    coverage starts or ends that day. A renewal continuing a subscriber's coverage moves its
+    end from one day to another, so each subscriber ends once, on the end of their latest
+    coverage; subscribers starting again after a lapse are counted as returned as well.
+    Dashboard counts are derived from these running totals.
+    """
+    business = models.ForeignKey(Business, on_delete=models.CASCADE)
+    day = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transactions = models.PositiveIntegerField(default=0)
+    subscribers_started = models.IntegerField(default=0)
+    subscribers_ending = models.IntegerField(default=0)
+    subscribers_returned = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Business daily summary"
+        verbose_name_plural = "Business daily summaries"
+        db_table = 'subscription_daily_rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['business', 'day'], name='unique_business_day_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.business_id} on {self.day}"
+
+
+class BusinessAnalytics(models.Model):
+    """
+    Revenue and churn analytics of a business as computed on `day` over the last `months`
+    months, by business.services.analytics. Serves repeated requests of the same day and is
+    filled ahead of time by precompute_analytics.
+    """
+    business = models.ForeignKey(Business, on_delete=models.CASCADE)
+    day = models.DateField()
+    months = models.PositiveSmallIntegerField()
+    data = models.JSONField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Business analytics"
+        verbose_name_plural = "Business analytics"
+        db_table = 'subscription_analytics_snapshots'
+        constraints = [
+            models.UniqueConstraint(fields=['business', 'day', 'months'], name='unique_business_analytics_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.business_id} on {self.day}"
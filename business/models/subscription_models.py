@@ -4,12 +4,24 @@ from django.conf import settings
 from business.models.models import Auditable, Business
 from django.utils import timezone
 
+from utils.common import add_duration
+
 User = settings.AUTH_USER_MODEL
 
 class Plan(Auditable,models.Model):
+    DAILY = 'D'
+    MONTHLY = 'M'
+    YEARLY = 'Y'
+    
+    DURATION_UNIT_CHOICES = [
+        (DAILY, 'DAILY'),
+        (MONTHLY, 'MONTHLY'),
+        (YEARLY, 'YEARLY'),
+    ]
     
     name=models.CharField(max_length=50,null=True)
-    duration = models.CharField(max_length=10, null=True, blank=True)
+    duration_count = models.PositiveIntegerField(null=True, blank=True)
+    duration_unit = models.CharField(max_length=1, choices=DURATION_UNIT_CHOICES, null=True, blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     added_by=models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     business = models.ForeignKey(Business,on_delete=models.CASCADE)
@@ -19,6 +31,15 @@ class Plan(Auditable,models.Model):
         verbose_name = "Subscriber"
         verbose_name_plural = "Subscribers"
         db_table='subscription_plans'
+        constraints = [
+            models.UniqueConstraint(fields=['business', 'name'], name='unique_plan_name_per_business'),
+        ]
+    
+    @property
+    def duration(self):
+        if self.duration_count is None or self.duration_unit is None:
+            return None
+        return f"{self.duration_count} {self.duration_unit}"
         
     def set_duration(self, count, d_type):
         duration_dict= {"MONTHLY":"M",
@@ -26,9 +47,16 @@ class Plan(Auditable,models.Model):
                  "DAILY":"D"
                  }
         
+        d_type = d_type.upper()
         d_type= d_type if not duration_dict.get(d_type) else duration_dict[d_type]
         
-        self.duration = f"{count} {d_type}"
+        self.duration_count = int(count)
+        self.duration_unit = d_type
+    
+    def end_date(self, start_date):
+        if self.duration is None:
+            raise ValueError("Invalid duration format")
+        return add_duration(start_date, self.duration_count, self.duration_unit)
         
         
 class Subscriber(Auditable,models.Model):
@@ -41,6 +69,9 @@ class Subscriber(Auditable,models.Model):
         verbose_name = "Subscriber"
         verbose_name_plural = "Subscribers"
         db_table='subscription_subscribers'
+        indexes = [
+            models.Index(fields=['business', 'id'], name='subscriber_business_page_idx'),
+        ]
         
 
     def __str__(self):
@@ -52,11 +83,18 @@ class Transaction(Auditable,models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     conducted_by = models.ForeignKey(User, on_delete=models.CASCADE)
     business = models.ForeignKey(Business,on_delete=models.CASCADE)  
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
 
     class Meta:
         verbose_name = "Transaction"
         verbose_name_plural = "Transactions"
         db_table='subscription_transactions'
+        constraints = [
+            models.UniqueConstraint(fields=['business', 'idempotency_key'], name='unique_transaction_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['business', 'created_at'], name='transaction_ledger_idx'),
+        ]
 
     def __str__(self):
         return f"Transaction by {self.customer.name} for {self.product.name}"
@@ -73,6 +111,13 @@ class Subscription(Auditable,models.Model):
         verbose_name = "Subscription"
         verbose_name_plural = "Subscriptions"
         db_table='subscription_subscriptions'
+        indexes = [
+            # active comes after the range and sort columns: SQLite filters on a bare "active"
+            # term, which cannot match an index column, and MySQL still filters it in the index
+            models.Index(fields=['subscriber', 'plan_start_date', 'active'], name='subscription_lifecycle_idx'),
+            models.Index(fields=['subscriber', 'plan_end_date', 'active'], name='subscription_expiry_idx'),
+            models.Index(fields=['plan_end_date', 'active'], name='subscription_end_idx'),
+        ]
         
 
     def __str__(self):
@@ -81,4 +126,4 @@ class Subscription(Auditable,models.Model):
     def check_and_update_status(self):
         if self.plan_end_date < timezone.now().date():
             self.active = False
-            self.save()
\ No newline at end of file
+            self.save(update_fields=['active', 'updated_at'])
\ No newline at end of file
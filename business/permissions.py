@@ -1,65 +1,66 @@
-import json
 from rest_framework.permissions import BasePermission
 
-from users.models import UserBusinessMapping, Business
-from business.models.subscription_models import Plan
+from business.context import get_business_context, aget_business_context
+from business.services.plan_catalog import get_catalog, aget_catalog
+
+# `ahas_permission` is the async counterpart used by views in business.apis.async_subscription_api
 
 class IsBusinessOwner(BasePermission):
     def has_permission(self, request, view):
-        business_id = request.META.get("HTTP_X_BUSINESS_ID")
-    
-        if business_id is None:
-            return False
+        context = get_business_context(request)
+        return context is not None and context.is_owner
 
-        try:
-            business_id = int(business_id)
-        except ValueError:
-            return False
-        
-        return UserBusinessMapping.objects.filter(user=request.user, business_id=business_id, role='OWNER').exists()
+    async def ahas_permission(self, request, view):
+        context = await aget_business_context(request)
+        return context is not None and context.is_owner
     
 class IsBusinessMember(BasePermission):
     def has_permission(self, request, view):
-        business_id = request.META.get("HTTP_X_BUSINESS_ID")
-    
-        if business_id is None:
-            return False
+        return get_business_context(request) is not None
 
-        try:
-            business_id = int(business_id)
-        except ValueError:
-            return False
-        
-        return UserBusinessMapping.objects.filter(user=request.user, business_id=business_id).exists()
+    async def ahas_permission(self, request, view):
+        return await aget_business_context(request) is not None
     
 class HasSubscriptionType(BasePermission):
     def has_permission(self, request, view):
-        business_id = request.META.get("HTTP_X_BUSINESS_ID")
-    
-        if business_id is None:
-            return False
+        context = get_business_context(request)
+        return context is not None and context.is_subscription_based
 
-        try:
-            business_id = int(business_id)
-        except ValueError:
-            return False
-        
-        return Business.objects.filter(id=business_id,type=Business.SUBSCRIPTION_BASED).exists()
+    async def ahas_permission(self, request, view):
+        context = await aget_business_context(request)
+        return context is not None and context.is_subscription_based
 
 
 class IsPlanValid(BasePermission):
+    def plan_id(self, request):
+        plan_id = request.data.get('plan') if isinstance(request.data, dict) else None
+        if plan_id is None:
+            return None
+
+        try:
+            return int(plan_id)
+        except (TypeError, ValueError):
+            # malformed ids are reported by the view's serializer
+            return None
+
     def has_permission(self, request, view):
-        business_id = request.META.get("HTTP_X_BUSINESS_ID")
-        plan_id=json.loads(request.body).get('plan')
-        if business_id is None:
+        context = get_business_context(request)
+        if context is None:
             return False
         
+        plan_id = self.plan_id(request)
         if plan_id is None:
             return True
+        
+        return get_catalog(context.business_id).get(plan_id) is not None
 
-        try:
-            business_id = int(business_id)
-        except ValueError:
+    async def ahas_permission(self, request, view):
+        context = await aget_business_context(request)
+        if context is None:
             return False
-        
-        return Plan.objects.filter(id=plan_id,business_id=business_id).exists()
\ No newline at end of file
+
+        plan_id = self.plan_id(request)
+        if plan_id is None:
+            return True
+
+        return (await aget_catalog(context.business_id)).get(plan_id) is not None
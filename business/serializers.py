@@ -0,0 +1,132 @@
+from rest_framework import serializers
+
+from utils.common import validate_required_fields
+
+
+class SubscriptionPeriodSerializer(serializers.Serializer):
+    """Fields shared by the subscribe and renew payloads. Without a plan the period and amount are required."""
+
+    plan = serializers.IntegerField(required=False, allow_null=True, error_messages={'invalid': 'Invalid plan.'})
+    start_date = serializers.DateField(
+        required=False, allow_null=True, input_formats=['%Y-%m-%d'],
+        error_messages={'invalid': 'Invalid start_date format. Use YYYY-MM-DD.'},
+    )
+    end_date = serializers.DateField(
+        required=False, allow_null=True, input_formats=['%Y-%m-%d'],
+        error_messages={'invalid': 'Invalid end_date format. Use YYYY-MM-DD.'},
+    )
+    amount = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, allow_null=True,
+        error_messages={'invalid': 'Invalid amount.'},
+    )
+
+    required_fields = []
+
+    def validate(self, data):
+        required_fields = list(self.required_fields)
+        if not data.get('plan'):
+            required_fields += ['start_date', 'end_date', 'amount']
+        validate_required_fields(required_fields=required_fields, data=data)
+        return data
+
+
+class AddSubscriberSerializer(SubscriptionPeriodSerializer):
+    name = serializers.CharField(required=False, allow_blank=True, max_length=255)
+    email = serializers.EmailField(required=False, allow_blank=True, error_messages={'invalid': 'Invalid email.'})
+    phone = serializers.CharField(required=False, allow_null=True, allow_blank=True, max_length=15)
+
+    required_fields = ['name', 'email']
+
+
+class RenewSubscriptionSerializer(SubscriptionPeriodSerializer):
+    subscriber = serializers.IntegerField(required=False, allow_null=True, error_messages={'invalid': 'Invalid subscriber.'})
+
+    required_fields = ['subscriber']
+
+
+class SubscriberListQuerySerializer(serializers.Serializer):
+    """Query parameters of the subscriber listing; `cursor` is the last subscriber id of the previous page."""
+
+    cursor = serializers.IntegerField(required=False, min_value=0, error_messages={'invalid': 'Invalid cursor.'})
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=200, default=50)
+    active = serializers.BooleanField(required=False, allow_null=True, default=None)
+    plan = serializers.IntegerField(required=False, error_messages={'invalid': 'Invalid plan.'})
+    expires_after = serializers.DateField(
+        required=False, input_formats=['%Y-%m-%d'],
+        error_messages={'invalid': 'Invalid expires_after format. Use YYYY-MM-DD.'},
+    )
+    expires_before = serializers.DateField(
+        required=False, input_formats=['%Y-%m-%d'],
+        error_messages={'invalid': 'Invalid expires_before format. Use YYYY-MM-DD.'},
+    )
+
+
+class DashboardQuerySerializer(serializers.Serializer):
+    expiring_days = serializers.IntegerField(required=False, min_value=0, max_value=366, default=7)
+    group_by = serializers.ChoiceField(choices=['day', 'month'], required=False, default='day')
+    since = serializers.DateField(
+        required=False, input_formats=['%Y-%m-%d'],
+        error_messages={'invalid': 'Invalid since format. Use YYYY-MM-DD.'},
+    )
+    until = serializers.DateField(
+        required=False, input_formats=['%Y-%m-%d'],
+        error_messages={'invalid': 'Invalid until format. Use YYYY-MM-DD.'},
+    )
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    months = serializers.IntegerField(required=False, min_value=1, max_value=36, default=12)
+
+
+class LedgerExportQuerySerializer(serializers.Serializer):
+    output = serializers.ChoiceField(
+        choices=['csv', 'ndjson'], required=False, default='csv',
+        error_messages={'invalid_choice': 'Invalid output. Use csv or ndjson.'},
+    )
+    since = serializers.DateField(
+        required=False, input_formats=['%Y-%m-%d'],
+        error_messages={'invalid': 'Invalid since format. Use YYYY-MM-DD.'},
+    )
+    until = serializers.DateField(
+        required=False, input_formats=['%Y-%m-%d'],
+        error_messages={'invalid': 'Invalid until format. Use YYYY-MM-DD.'},
+    )
+    history = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        if attrs.get('since') and attrs.get('until') and attrs['since'] > attrs['until']:
+            raise serializers.ValidationError('since must not be after until.')
+        return attrs
+
+
+class BulkRenewalFilterSerializer(serializers.Serializer):
+    """Selects subscribers by their active subscription: on `plan` and/or ending before `expires_before`."""
+
+    plan = serializers.IntegerField(required=False, error_messages={'invalid': 'Invalid filter plan.'})
+    expires_before = serializers.DateField(
+        required=False, input_formats=['%Y-%m-%d'],
+        error_messages={'invalid': 'Invalid expires_before format. Use YYYY-MM-DD.'},
+    )
+
+
+class BulkRenewalSerializer(serializers.Serializer):
+    """Renew either the listed `subscribers` or those matching `filter`. Without a plan each keeps its current one."""
+
+    MAX_SUBSCRIBERS = 10000
+
+    subscribers = serializers.ListField(
+        child=serializers.IntegerField(error_messages={'invalid': 'Invalid subscriber.'}),
+        required=False, allow_empty=False, max_length=MAX_SUBSCRIBERS,
+        error_messages={'max_length': f'At most {MAX_SUBSCRIBERS} subscribers can be renewed at once.'},
+    )
+    filter = BulkRenewalFilterSerializer(required=False)
+    plan = serializers.IntegerField(required=False, allow_null=True, error_messages={'invalid': 'Invalid plan.'})
+    amount = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, allow_null=True,
+        error_messages={'invalid': 'Invalid amount.'},
+    )
+
+    def validate(self, data):
+        if ('subscribers' in data) == ('filter' in data):
+            raise serializers.ValidationError('Send either subscribers or filter.')
+        return data
@@ -0,0 +1,213 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+from operator import itemgetter
+
+from django.db.models import DecimalField, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from business.models.archive_models import ArchivedSubscription, ArchivedTransaction
+from business.models.rollup_models import BusinessAnalytics
+from business.models.subscription_models import Subscription, Transaction
+from utils.common import add_duration
+
+# a subscriber renewing within this many days of the end of their subscription is not churned
+RENEWAL_GRACE_DAYS = 7
+DAYS_PER_MONTH = Decimal('30.4375')
+CENTS = Decimal('0.01')
+
+FIELDS = ['subscriber_id', 'plan_id', 'plan_start_date', 'plan_end_date', 'paid']
+
+
+def subscription_columns(business_id):
+    """
+    Subscriber, plan, start, end and amount paid of every subscription of a business, hot and
+    archived, read in one UNION query and returned as one list per column.
+    """
+    paid = Coalesce(
+        Subquery(Transaction.objects.filter(id=OuterRef('transaction_id')).values('amount')[:1]),
+        Subquery(ArchivedTransaction.objects.filter(id=OuterRef('transaction_id')).values('amount')[:1]),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+    querysets = [
+        model.objects.filter(subscriber__business_id=business_id, plan_end_date__gt=F('plan_start_date')).annotate(paid=paid).values_list(*FIELDS)
+        for model in [Subscription, ArchivedSubscription]
+    ]
+    rows = list(querysets[0].union(querysets[1], all=True))
+    return [list(column) for column in zip(*rows)] if rows else [[] for _ in FIELDS]
+
+
+def period_months(start, end):
+    """Length of a subscription in months: whole calendar months when it is one, else days / 30.4375."""
+    whole = (end.year - start.year) * 12 + end.month - start.month
+    if whole > 0 and add_duration(start, whole, 'M') == end:
+        return Decimal(whole)
+    return Decimal((end - start).days) / DAYS_PER_MONTH
+
+
+class Timeline:
+    """
+    Intervals [start, end) kept as sorted start and end columns with running totals of their
+    weights: how many are open on a day, and their total weight, take two binary searches.
+    """
+
+    def __init__(self, starts, ends, weights=None):
+        weights = weights if weights is not None else [1] * len(starts)
+        by_start = sorted(zip(starts, weights), key=itemgetter(0))
+        by_end = sorted(zip(ends, weights), key=itemgetter(0))
+        self.starts = [start for start, _ in by_start]
+        self.ends = [end for end, _ in by_end]
+        self.start_totals = [0, *accumulate(weight for _, weight in by_start)]
+        self.end_totals = [0, *accumulate(weight for _, weight in by_end)]
+
+    def count(self, day):
+        return bisect_right(self.starts, day) - bisect_right(self.ends, day)
+
+    def total(self, day):
+        return self.start_totals[bisect_right(self.starts, day)] - self.end_totals[bisect_right(self.ends, day)]
+
+
+def between(days, since, until):
+    """How many of the sorted `days` fall in [since, until)."""
+    return bisect_left(days, until) - bisect_left(days, since)
+
+
+def coverage(subscribers, starts, ends, grace):
+    """
+    Per subscriber, subscriptions that overlap or follow each other within `grace` merged into
+    spans of continuous coverage, as [subscriber, start, end] sorted by subscriber and start.
+    """
+    spans = []
+    for subscriber, start, end in sorted(zip(subscribers, starts, ends)):
+        if spans and spans[-1][0] == subscriber and start <= spans[-1][2] + grace:
+            spans[-1][2] = max(spans[-1][2], end)
+        else:
+            spans.append([subscriber, start, end])
+    return spans
+
+
+def renewal_outcomes(subscribers, starts, ends, grace, today):
+    """
+    (end, renewed) per subscription that was renewed, i.e. the subscriber's next subscription
+    starts by its end + `grace`, or whose grace period is over without one.
+    """
+    rows = sorted(zip(subscribers, starts, ends))
+    for (subscriber, _, end), following in zip(rows, rows[1:] + [None]):
+        renewed = following is not None and following[0] == subscriber and following[1] <= end + grace
+        if renewed or end + grace <= today:
+            yield end, renewed
+
+
+def months_until(today, months):
+    """First days of the last `months` months, the current one included, oldest first."""
+    first = today.replace(day=1)
+    return [add_duration(first, -offset, 'M') for offset in range(months - 1, -1, -1)]
+
+
+def money(value):
+    return str(Decimal(value).quantize(CENTS))
+
+
+def rate(count, total):
+    return round(count / total, 4) if total else None
+
+
+def compute(business_id, months=12, today=None):
+    """
+    MRR, churn, renewal rates and retention cohorts of a business over the last `months` months.
+    Each subscription contributes its amount spread over its length in months to the MRR of
+    every day it covers; monthly figures are taken on the last day of the month (today for the
+    current one). The subscription columns are read once and every figure is a binary search
+    over sorted columns, so the cost grows with the number of subscriptions, not of months.
+    """
+    today = today or timezone.now().date()
+    grace = timedelta(days=RENEWAL_GRACE_DAYS)
+    subscribers, plans, starts, ends, paid = subscription_columns(business_id)
+
+    values = [(amount or 0) / period_months(start, end) for amount, start, end in zip(paid, starts, ends)]
+    mrr = Timeline(starts, ends, values)
+
+    spans = coverage(subscribers, starts, ends, grace)
+    active = Timeline([span[1] for span in spans], [span[2] for span in spans])
+    lapsed = sorted(span[2] for span in spans if span[2] + grace <= today)
+    first_starts = {}
+    for subscriber, start, _ in spans:
+        first_starts.setdefault(subscriber, start)
+    joined = sorted(first_starts.values())
+
+    outcomes = list(renewal_outcomes(subscribers, starts, ends, grace, today))
+    due = sorted(end for end, _ in outcomes)
+    renewed = sorted(end for end, was_renewed in outcomes if was_renewed)
+
+    month_starts = months_until(today, months)
+    as_of = {month: min(add_duration(month, 1, 'M') - timedelta(days=1), today) for month in month_starts}
+
+    monthly = []
+    for month in month_starts:
+        following = add_duration(month, 1, 'M')
+        churned = between(lapsed, month, following)
+        renewals_due = between(due, month, following)
+        renewals = between(renewed, month, following)
+        monthly.append({
+            "month": month.strftime('%Y-%m'),
+            "mrr": money(mrr.total(as_of[month])),
+            "active_subscribers": active.count(as_of[month]),
+            "new_subscribers": between(joined, month, following),
+            "churned_subscribers": churned,
+            "churn_rate": rate(churned, active.count(month - timedelta(days=1))),
+            "renewals_due": renewals_due,
+            "renewed": renewals,
+            "renewal_rate": rate(renewals, renewals_due),
+        })
+
+    cohort_spans = defaultdict(lambda: ([], []))
+    for subscriber, start, end in spans:
+        cohort = first_starts[subscriber].replace(day=1)
+        if cohort >= month_starts[0]:
+            cohort_spans[cohort][0].append(start)
+            cohort_spans[cohort][1].append(end)
+    cohorts = []
+    for cohort in month_starts:
+        if cohort not in cohort_spans:
+            continue
+        size = between(joined, cohort, add_duration(cohort, 1, 'M'))
+        timeline = Timeline(*cohort_spans[cohort])
+        cohorts.append({
+            "cohort": cohort.strftime('%Y-%m'),
+            "subscribers": size,
+            "retention": [rate(timeline.count(as_of[month]), size) for month in month_starts if month >= cohort],
+        })
+
+    by_plan = defaultdict(Decimal)
+    for plan, start, end, value in zip(plans, starts, ends, values):
+        if start <= today < end:
+            by_plan[plan] += value
+
+    return {
+        "as_of": today.isoformat(),
+        "months": months,
+        "mrr": money(mrr.total(today)),
+        "active_subscribers": active.count(today),
+        "mrr_by_plan": [{"plan": plan, "mrr": money(value)} for plan, value in sorted(by_plan.items(), key=lambda item: -item[1])],
+        "monthly": monthly,
+        "cohorts": cohorts,
+    }
+
+
+def get_analytics(business_id, months=12, today=None, refresh=False):
+    """
+    Analytics of a business for today, computed once per day and months and kept in
+    BusinessAnalytics; later requests of the day read the stored copy unless `refresh`.
+    """
+    today = today or timezone.now().date()
+    if not refresh:
+        snapshot = BusinessAnalytics.objects.filter(business_id=business_id, day=today, months=months).first()
+        if snapshot is not None:
+            return snapshot.data
+
+    data = compute(business_id, months=months, today=today)
+    BusinessAnalytics.objects.update_or_create(business_id=business_id, day=today, months=months, defaults={'data': data})
+    return data
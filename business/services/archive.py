@@ -0,0 +1,77 @@
+from django.db import transaction as db_transaction
+from django.db.models import Exists, OuterRef, Value
+
+from business.models.archive_models import ArchivedSubscription, ArchivedTransaction
+from business.models.subscription_models import Subscription, Transaction
+
+SUBSCRIPTION_FIELDS = ['id', 'subscriber_id', 'plan_id', 'plan_start_date', 'plan_end_date', 'transaction_id', 'created_at', 'updated_at']
+TRANSACTION_FIELDS = ['id', 'plan_id', 'amount', 'conducted_by_id', 'business_id', 'idempotency_key', 'created_at', 'updated_at']
+HISTORY_FIELDS = ['id', 'plan_id', 'plan__name', 'plan_start_date', 'plan_end_date', 'transaction_id']
+
+
+def archivable_subscriptions(before):
+    """
+    Inactive subscriptions that ended before `before` and have been followed by a later one,
+    so every subscriber keeps its latest subscription (the plan renewals fall back to) hot.
+    """
+    later = Subscription.objects.filter(subscriber_id=OuterRef('subscriber_id'), plan_end_date__gt=OuterRef('plan_end_date'))
+    return Subscription.objects.filter(active=False, plan_end_date__lt=before).filter(Exists(later))
+
+
+def archivable_transactions(before):
+    """Transactions booked before `before` that no subscription left in the hot table points at."""
+    referenced = Subscription.objects.filter(transaction_id=OuterRef('id'))
+    return Transaction.objects.filter(created_at__lt=before).filter(~Exists(referenced))
+
+
+def move(candidates, archive_model, fields, batch_size):
+    """
+    Copy `candidates` into `archive_model` and delete them, one id-ordered batch per atomic
+    block with the batch's rows locked, so an interrupted run leaves every row in exactly one
+    table and a re-run carries on. Yields the number of rows moved per batch.
+    """
+    last_id = 0
+    while True:
+        with db_transaction.atomic():
+            rows = list(
+                candidates.filter(id__gt=last_id).order_by('id').select_for_update().values(*fields)[:batch_size]
+            )
+            if not rows:
+                return
+            archive_model.objects.bulk_create([archive_model(**row) for row in rows])
+            candidates.model.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        last_id = rows[-1]['id']
+        yield len(rows)
+
+
+def archive_subscriptions(before, batch_size=1000):
+    return move(archivable_subscriptions(before), ArchivedSubscription, SUBSCRIPTION_FIELDS, batch_size)
+
+
+def archive_transactions(before, batch_size=1000):
+    return move(archivable_transactions(before), ArchivedTransaction, TRANSACTION_FIELDS, batch_size)
+
+
+def subscription_history(subscriber_id):
+    """
+    Every subscription of a subscriber, newest first, read from the hot and the archive table
+    in one UNION query. Rows are (id, plan id, plan name, start, end, transaction id, archived).
+    """
+    hot = Subscription.objects.filter(subscriber_id=subscriber_id).annotate(archived=Value(False)).values_list(*HISTORY_FIELDS, 'archived')
+    archived = ArchivedSubscription.objects.filter(subscriber_id=subscriber_id).annotate(archived=Value(True)).values_list(*HISTORY_FIELDS, 'archived')
+    return hot.union(archived, all=True).order_by('-plan_start_date', '-id')
+
+
+def history_data(subscriber_id):
+    return [
+        {
+            "id": subscription_id,
+            "plan": plan_name or "-",
+            "plan_id": plan_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "transaction": transaction_id,
+            "archived": bool(archived),
+        }
+        for subscription_id, plan_id, plan_name, start_date, end_date, transaction_id, archived in subscription_history(subscriber_id)
+    ]
@@ -0,0 +1,155 @@
+import uuid
+
+from django.db import connection, transaction as db_transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from business.models.subscription_models import Subscriber, Subscription, Transaction
+from business.services.plan_catalog import get_catalog
+from business.services.rollups import record_subscriptions
+from utils.common import chunked
+
+
+def cohort(business, plan_id=None, expires_before=None):
+    """Ids of the subscribers whose active subscription is on `plan_id` and/or ends before `expires_before`."""
+    subscriptions = Subscription.objects.filter(subscriber__business=business, active=True)
+    if plan_id:
+        subscriptions = subscriptions.filter(plan_id=plan_id)
+    if expires_before:
+        subscriptions = subscriptions.filter(plan_end_date__lt=expires_before)
+    return subscriptions.order_by('subscriber_id').values_list('subscriber_id', flat=True).distinct()
+
+
+def failure(subscriber_id, message):
+    return {"subscriber": subscriber_id, "status": "failed", "message": message}
+
+
+class BulkRenewal:
+    """
+    Renews many subscribers of one business. Per chunk, the subscribers are locked and their
+    current end date and plan resolved in one query, the new periods are computed in memory
+    and the transactions and subscriptions are written with bulk_create, all in one atomic
+    block. Like renew_subscription, each new period starts where the latest unfinished
+    subscription ends, or today. Results are reported per subscriber.
+    """
+
+    def __init__(self, business, user, plan=None, amount=None, chunk_size=1000):
+        self.business = business
+        self.user = user
+        self.plan = plan
+        self.amount = amount
+        self.chunk_size = chunk_size
+        self.catalog = get_catalog(business.id)
+        self.results = []
+        self.renewed = 0
+
+    def run(self, subscriber_ids):
+        for chunk in chunked(dict.fromkeys(subscriber_ids), self.chunk_size):
+            self.renew_chunk(chunk)
+        return {"renewed": self.renewed, "failed": len(self.results) - self.renewed, "results": self.results}
+
+    def report(self, subscriber_ids, outcomes):
+        self.results.extend(outcomes[subscriber_id] for subscriber_id in subscriber_ids)
+
+    def current_periods(self, subscriber_ids, today):
+        """
+        subscriber id -> (end date of the latest unfinished subscription or None, plan id and end
+        date of the latest subscription)
+        """
+        unfinished = Subscription.objects.filter(subscriber=OuterRef('pk'), plan_end_date__gte=today).order_by('-plan_end_date')
+        latest = Subscription.objects.filter(subscriber=OuterRef('pk')).order_by('-plan_end_date', '-id')
+        rows = Subscriber.objects.select_for_update().filter(business=self.business, id__in=subscriber_ids).annotate(
+            current_end=Subquery(unfinished.values('plan_end_date')[:1]),
+            current_plan=Subquery(latest.values('plan_id')[:1]),
+            latest_end=Subquery(latest.values('plan_end_date')[:1]),
+        ).order_by('id').values_list('id', 'current_end', 'current_plan', 'latest_end')
+        return {subscriber_id: (current_end, current_plan, latest_end) for subscriber_id, current_end, current_plan, latest_end in rows}
+
+    def plan_periods(self, subscriber_ids, current, today, outcomes):
+        rows = []
+        for subscriber_id in subscriber_ids:
+            if subscriber_id not in current:
+                outcomes[subscriber_id] = failure(subscriber_id, "Subscriber not found.")
+                continue
+            current_end, current_plan, latest_end = current[subscriber_id]
+            plan = self.plan or self.catalog.get(current_plan)
+            if plan is None:
+                outcomes[subscriber_id] = failure(subscriber_id, "No plan to renew with.")
+                continue
+            start_date = current_end or today
+            try:
+                end_date = plan.end_date(start_date)
+            except ValueError as e:
+                outcomes[subscriber_id] = failure(subscriber_id, str(e))
+                continue
+            rows.append((subscriber_id, plan, start_date, end_date, current_end is not None, latest_end))
+        return rows
+
+    def renew_chunk(self, subscriber_ids):
+        today = timezone.now().date()
+        outcomes = {}
+        with db_transaction.atomic():
+            rows = self.plan_periods(subscriber_ids, self.current_periods(subscriber_ids, today), today, outcomes)
+            if not rows:
+                self.report(subscriber_ids, outcomes)
+                return
+
+            batch = uuid.uuid4().hex
+            transactions = Transaction.objects.bulk_create([
+                Transaction(
+                    plan=plan, conducted_by=self.user, business=self.business, amount=self.amount or plan.price,
+                    # lets the ids be read back on backends without RETURNING on bulk inserts (MySQL)
+                    idempotency_key=f'bulk-{batch}-{subscriber_id}',
+                )
+                for subscriber_id, plan, _, _, _, _ in rows
+            ])
+            if not connection.features.can_return_rows_from_bulk_insert:
+                ids = dict(Transaction.objects.filter(
+                    business=self.business, idempotency_key__startswith=f'bulk-{batch}-'
+                ).values_list('idempotency_key', 'id'))
+                for transaction in transactions:
+                    transaction.pk = ids[transaction.idempotency_key]
+
+            subscriptions = Subscription.objects.bulk_create([
+                Subscription(
+                    subscriber_id=subscriber_id,
+                    plan=plan,
+                    plan_start_date=start_date,
+                    plan_end_date=end_date,
+                    transaction=transaction,
+                    active=start_date <= today,
+                )
+                for transaction, (subscriber_id, plan, start_date, end_date, _, _) in zip(transactions, rows)
+            ])
+            if not connection.features.can_return_rows_from_bulk_insert:
+                ids = dict(Subscription.objects.filter(
+                    transaction_id__in=[transaction.pk for transaction in transactions]
+                ).values_list('transaction_id', 'id'))
+                for subscription in subscriptions:
+                    subscription.pk = ids[subscription.transaction_id]
+
+            started = [subscription for subscription in subscriptions if subscription.active]
+            if started:
+                # periods starting today replace the active subscription right away
+                Subscription.objects.filter(
+                    subscriber_id__in=[subscription.subscriber_id for subscription in started], active=True
+                ).exclude(id__in=[subscription.pk for subscription in started]).update(active=False, updated_at=timezone.now())
+
+            record_subscriptions(self.business.id, [
+                (start_date, end_date, transaction.amount, latest_end)
+                for transaction, (_, _, start_date, end_date, _, latest_end) in zip(transactions, rows)
+            ])
+
+        for subscription, transaction, (subscriber_id, plan, start_date, end_date, qued, _) in zip(subscriptions, transactions, rows):
+            outcomes[subscriber_id] = {
+                "subscriber": subscriber_id,
+                "status": "renewed",
+                "qued": qued,
+                "subscription": subscription.id,
+                "transaction": transaction.id,
+                "plan": plan.id,
+                "plan_start_date": start_date,
+                "plan_end_date": end_date,
+            }
+        self.report(subscriber_ids, outcomes)
+        self.renewed += len(rows)
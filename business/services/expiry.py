@@ -0,0 +1,36 @@
+from django.db.models import Min
+from django.utils import timezone
+
+from business.models.subscription_models import Subscription
+
+
+def expired_subscriptions(today=None):
+    today = today or timezone.now().date()
+    return Subscription.objects.filter(active=True, plan_end_date__lt=today)
+
+
+def expire_subscriptions(today=None, batch_size=10000, start_after=0, dry_run=False):
+    """
+    Flip `active` to False for every subscription whose plan_end_date is before `today`.
+
+    Work is done with one set-based UPDATE per primary-key window of `batch_size` ids,
+    so nothing is loaded into Python. Yields `(first_id, last_id, rows)` per batch; the
+    `last_id` of a batch can be passed back as `start_after` to resume an interrupted run.
+    With `dry_run` the matching rows are only counted.
+    """
+    today = today or timezone.now().date()
+    pending = expired_subscriptions(today)
+
+    lower = pending.filter(id__gt=start_after).aggregate(first=Min('id'))['first']
+    while lower is not None:
+        upper = lower + batch_size - 1
+        batch = pending.filter(id__gte=lower, id__lte=upper)
+
+        if dry_run:
+            rows = batch.count()
+        else:
+            rows = batch.update(active=False, updated_at=timezone.now())
+
+        yield lower, upper, rows
+
+        lower = pending.filter(id__gt=upper).aggregate(first=Min('id'))['first']
@@ -0,0 +1,102 @@
+import hashlib
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from business.models.idempotency_models import IdempotencyKey
+from utils.cache import cache_backend
+
+KEY_TTL = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 86400)
+# a first request still running after this long is treated as crashed and may be retried
+LOCK_TIMEOUT = getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 60)
+
+
+# (user_id, key, fingerprint) -> StoredResponse of a completed key, until the key expires
+response_cache = cache_backend(
+    getattr(settings, 'IDEMPOTENCY_CACHE_ALIAS', None),
+    maxsize=getattr(settings, 'IDEMPOTENCY_CACHE_SIZE', 10000),
+    ttl=KEY_TTL,
+)
+
+# what a replay needs and nothing else, so it pickles into a shared cache
+StoredResponse = namedtuple('StoredResponse', ['status_code', 'headers', 'content'])
+
+
+def cache_key(user_id, key, request_fingerprint):
+    # a request reusing the key for another body misses and is rejected from the stored row
+    return f'idempotency:{user_id}:{key}:{request_fingerprint}'
+
+
+def stored_response(record):
+    headers = (('Content-Type', record.content_type),) if record.content_type else ()
+    return StoredResponse(record.status_code, headers, bytes(record.content))
+
+
+def fingerprint(method, path, body):
+    digest = hashlib.sha256(f'{method} {path}\n'.encode())
+    digest.update(body or b'')
+    return digest.hexdigest()
+
+
+def begin(user_id, key, request_fingerprint):
+    """
+    Claim `key` for a new request. Returns None when the caller owns the key and should run
+    the view, a StoredResponse to replay when the same request already completed, otherwise
+    the existing IdempotencyKey: used for another request or still running.
+    """
+    cached = response_cache.get(cache_key(user_id, key, request_fingerprint))
+    if cached is not None:
+        return cached
+
+    record = IdempotencyKey.objects.filter(user_id=user_id, key=key).first()
+    if record is None:
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(user_id=user_id, key=key, fingerprint=request_fingerprint)
+            return None
+        except IntegrityError:
+            # a concurrent request claimed it first
+            return begin(user_id, key, request_fingerprint)
+
+    now = timezone.now()
+    stale = now - timedelta(seconds=LOCK_TIMEOUT if not record.completed else KEY_TTL)
+    if record.created_at < stale:
+        # expired or abandoned, hand the key to this request
+        claimed = IdempotencyKey.objects.filter(id=record.id, created_at=record.created_at).update(
+            fingerprint=request_fingerprint, status_code=None, content=None, content_type='', created_at=now,
+        )
+        if claimed:
+            return None
+        return begin(user_id, key, request_fingerprint)
+
+    if record.completed and record.fingerprint == request_fingerprint:
+        response = stored_response(record)
+        # cached no longer than the row lives
+        response_cache.set(cache_key(user_id, key, request_fingerprint), response, ttl=(record.created_at - stale).total_seconds())
+        return response
+    return record
+
+
+def complete(user_id, key, status_code, content, content_type):
+    IdempotencyKey.objects.filter(user_id=user_id, key=key).update(
+        status_code=status_code, content=content, content_type=content_type,
+    )
+
+
+def release(user_id, key):
+    """Forget a key whose request failed so the client can retry it."""
+    IdempotencyKey.objects.filter(user_id=user_id, key=key, status_code__isnull=True).delete()
+
+
+def purge_expired(batch_size=10000, now=None):
+    """Delete expired keys in primary key ordered batches. Returns the number of rows removed."""
+    cutoff = (now or timezone.now()) - timedelta(seconds=KEY_TTL)
+    removed = 0
+    while True:
+        ids = list(IdempotencyKey.objects.filter(created_at__lt=cutoff).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return removed
+        removed += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
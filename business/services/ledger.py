@@ -0,0 +1,81 @@
+import csv
+import heapq
+import json
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from business.models.archive_models import ArchivedTransaction
+from business.models.subscription_models import Transaction
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+COLUMNS = ['id', 'created_at', 'amount', 'plan_id', 'plan_name', 'conducted_by_id', 'conducted_by_email']
+FIELDS = ['id', 'created_at', 'amount', 'plan_id', 'plan__name', 'conducted_by_id', 'conducted_by__email']
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_default_timezone())
+
+
+def ledger_rows(business_id, since=None, until=None, batch_size=2000, history=False):
+    """
+    Transactions of a business in (created_at, id) order, with plan name and the email of
+    the user who booked them. Rows are fetched in keyset batches over the
+    (business, created_at) index, so memory stays flat however many rows are exported and
+    no driver has to buffer the full result. With `history`, archived transactions are
+    read the same way and merged in.
+    """
+    models = [Transaction, ArchivedTransaction] if history else [Transaction]
+    streams = []
+    for model in models:
+        transactions = model.objects.filter(business_id=business_id)
+        if since:
+            transactions = transactions.filter(created_at__gte=day_start(since))
+        if until:
+            transactions = transactions.filter(created_at__lt=day_start(until + timedelta(days=1)))
+        streams.append(keyset_rows(transactions.order_by('created_at', 'id').values_list(*FIELDS), batch_size))
+    if len(streams) == 1:
+        return streams[0]
+    return heapq.merge(*streams, key=lambda row: (row[1], row[0]))
+
+
+def keyset_rows(transactions, batch_size):
+    batch = list(transactions[:batch_size])
+    while batch:
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        last_created_at, last_id = batch[-1][1], batch[-1][0]
+        batch = list(transactions.filter(
+            Q(created_at__gt=last_created_at) | Q(created_at=last_created_at, id__gt=last_id)
+        )[:batch_size])
+
+
+class Echo:
+    """File-like object handing back what csv.writer writes, so each row can be streamed."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow([row[0], row[1].isoformat(), row[2], row[3], row[4], row[5], row[6]])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        record = dict(zip(COLUMNS, row))
+        record['created_at'] = record['created_at'].isoformat()
+        record['amount'] = str(record['amount'])
+        if orjson is not None:
+            yield orjson.dumps(record) + b'\n'
+        else:
+            yield json.dumps(record) + '\n'
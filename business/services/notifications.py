@@ -0,0 +1,161 @@
+import json
+import sys
+import time
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from business.models.models import Business
+from business.models.notification_models import ExpiryNotification
+from business.models.subscription_models import Subscription
+
+SUBJECT = 'Your {plan} subscription at {business} ends on {end_date:%d %b %Y}'
+BODY = (
+    'Hi {name},\n\n'
+    'your {plan} subscription at {business} ends on {end_date:%d %b %Y}. '
+    'Renew it before then to keep your access.\n'
+)
+
+FIELDS = ['id', 'plan_end_date', 'subscriber__business_id', 'subscriber__name', 'subscriber__email', 'plan__name']
+
+
+class Message:
+    def __init__(self, subscription_id, business_id, to, subject, body):
+        self.subscription_id = subscription_id
+        self.business_id = business_id
+        self.to = to
+        self.subject = subject
+        self.body = body
+
+    def as_dict(self):
+        return {'subscription': self.subscription_id, 'business': self.business_id, 'to': self.to, 'subject': self.subject, 'body': self.body}
+
+
+class ConsoleBackend:
+    """Writes messages to stdout, for development."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send_messages(self, messages):
+        for message in messages:
+            self.stream.write(f'To: {message.to}\nSubject: {message.subject}\n\n{message.body}\n{"-" * 40}\n')
+        self.stream.flush()
+        return len(messages)
+
+
+class FileBackend:
+    """Appends messages as JSON lines to EXPIRY_NOTIFICATION_FILE_PATH, for tests and dry runs."""
+
+    def __init__(self, path=None):
+        self.path = path or getattr(settings, 'EXPIRY_NOTIFICATION_FILE_PATH', 'expiry_notifications.jsonl')
+
+    def send_messages(self, messages):
+        with open(self.path, 'a') as output:
+            output.writelines(json.dumps(message.as_dict()) + '\n' for message in messages)
+        return len(messages)
+
+
+class EmailBackend:
+    """Sends messages through Django's configured email backend over one connection per group."""
+
+    def send_messages(self, messages):
+        connection = get_connection()
+        return connection.send_messages([
+            EmailMessage(message.subject, message.body, settings.DEFAULT_FROM_EMAIL, [message.to], connection=connection)
+            for message in messages
+        ]) or 0
+
+
+def get_backend():
+    return import_string(getattr(settings, 'EXPIRY_NOTIFICATION_BACKEND', 'business.services.notifications.ConsoleBackend'))()
+
+
+class Throttle:
+    """Sleeps as needed to keep the send rate at or below `rate` messages per second."""
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self.started = time.monotonic()
+        self.sent = 0
+
+    def wait(self, count):
+        if self.rate:
+            delay = (self.sent + count) / self.rate - (time.monotonic() - self.started)
+            if delay > 0:
+                time.sleep(delay)
+        self.sent += count
+
+
+def expiring_subscriptions(today, days):
+    """
+    Active subscriptions ending within `days` of `today` whose subscriber has neither been
+    notified nor renewed yet. The plan_end_date range is a scan of subscription_end_idx and
+    the renewal check a lookup in subscription_lifecycle_idx.
+    """
+    notified = ExpiryNotification.objects.filter(subscription_id=OuterRef('id'))
+    renewed = Subscription.objects.filter(subscriber_id=OuterRef('subscriber_id'), plan_start_date__gte=OuterRef('plan_end_date'))
+    return Subscription.objects.filter(
+        active=True,
+        plan_end_date__gte=today,
+        plan_end_date__lte=today + timedelta(days=days),
+    ).filter(~Exists(notified), ~Exists(renewed))
+
+
+def render(rows, business_names):
+    """Group a batch per business and build its messages with the business looked up once."""
+    rows = sorted(rows, key=lambda row: row[2])
+    for business_id, group in groupby(rows, key=lambda row: row[2]):
+        business = business_names[business_id]
+        messages = []
+        for subscription_id, end_date, _, name, email, plan in group:
+            context = {'name': name, 'plan': plan or 'current', 'business': business, 'end_date': end_date}
+            messages.append(Message(subscription_id, business_id, email, SUBJECT.format(**context), BODY.format(**context)))
+        yield business_id, messages
+
+
+def notify_expiring(days=7, today=None, batch_size=1000, rate=None, limit=None, backend=None):
+    """
+    Notify subscribers whose subscription ends within `days`. Subscriptions are read in
+    (plan_end_date, id) keyset batches, grouped per business and handed to the backend
+    one group at a time; each delivered group is recorded in ExpiryNotification, so a
+    re-run skips everything already sent and an interrupted run resends at most one group.
+    Yields `(business_id, sent)` per group.
+    """
+    today = today or timezone.now().date()
+    backend = backend or get_backend()
+    throttle = Throttle(rate)
+    pending = expiring_subscriptions(today, days).order_by('plan_end_date', 'id').values_list(*FIELDS)
+    business_names = {}
+    remaining = limit
+
+    cursor = None
+    while remaining is None or remaining > 0:
+        batch = pending
+        if cursor is not None:
+            batch = pending.filter(Q(plan_end_date__gt=cursor[0]) | Q(plan_end_date=cursor[0], id__gt=cursor[1]))
+        rows = list(batch[:batch_size if remaining is None else min(batch_size, remaining)])
+        if not rows:
+            return
+        cursor = (rows[-1][1], rows[-1][0])
+
+        missing = {row[2] for row in rows} - business_names.keys()
+        if missing:
+            business_names.update(Business.objects.filter(id__in=missing).values_list('id', 'name'))
+
+        for business_id, messages in render(rows, business_names):
+            throttle.wait(len(messages))
+            backend.send_messages(messages)
+            ExpiryNotification.objects.bulk_create(
+                [ExpiryNotification(subscription_id=message.subscription_id, business_id=business_id) for message in messages],
+                ignore_conflicts=True,
+            )
+            yield business_id, len(messages)
+
+        if remaining is not None:
+            remaining -= len(rows)
@@ -0,0 +1,81 @@
+import hashlib
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.http import Http404
+
+from business.models.subscription_models import Plan
+from utils.cache import cache_backend
+
+# business_id -> PlanCatalog, invalidated by business.signals when a plan is saved or deleted
+catalog_cache = cache_backend(
+    getattr(settings, 'PLAN_CATALOG_CACHE_ALIAS', None),
+    maxsize=getattr(settings, 'PLAN_CATALOG_CACHE_SIZE', 1000),
+    ttl=getattr(settings, 'PLAN_CATALOG_CACHE_TTL', 300),
+    layered=True,
+)
+
+
+def plan_data(plan):
+    return {
+        "id": plan.id,
+        "name": plan.name,
+        "duration": plan.duration,
+        "price": str(plan.price),
+        "added_by": plan.added_by_id,
+        "business": plan.business_id
+    }
+
+
+class PlanCatalog:
+    """
+    The plans of one business keyed by id, with their duration already split into count and
+    unit, plus the API listing and an ETag derived from it. Instances are shared between
+    requests and must not be modified.
+    """
+
+    def __init__(self, business_id, plans):
+        self.business_id = business_id
+        self.plans = {plan.id: plan for plan in plans}
+        self.listing = [plan_data(plan) for plan in plans]
+        self.etag = hashlib.sha1(repr(self.listing).encode()).hexdigest()
+
+    def get(self, plan_id):
+        try:
+            return self.plans.get(int(plan_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_or_404(self, plan_id):
+        plan = self.get(plan_id)
+        if plan is None:
+            raise Http404("No Plan matches the given query.")
+        return plan
+
+
+def cache_key(business_id):
+    return f'plan-catalog:{business_id}'
+
+
+def get_catalog(business_id):
+    """
+    The cached catalog of a business, loaded from the primary on a miss: one built from a
+    lagging read replica right after an invalidation would hide a new plan for the whole TTL.
+    """
+    catalog = catalog_cache.get(cache_key(business_id))
+    if catalog is None:
+        catalog = PlanCatalog(business_id, list(Plan.objects.db_manager(DEFAULT_DB_ALIAS).filter(business_id=business_id).order_by('id')))
+        catalog_cache.set(cache_key(business_id), catalog)
+    return catalog
+
+
+async def aget_catalog(business_id):
+    catalog = catalog_cache.get(cache_key(business_id))
+    if catalog is None:
+        catalog = PlanCatalog(business_id, [plan async for plan in Plan.objects.db_manager(DEFAULT_DB_ALIAS).filter(business_id=business_id).order_by('id')])
+        catalog_cache.set(cache_key(business_id), catalog)
+    return catalog
+
+
+def invalidate(business_id):
+    catalog_cache.delete(cache_key(business_id))
@@ -0,0 +1,98 @@
+from django.db import IntegrityError, transaction as db_transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from business.models.subscription_models import Subscriber, Subscription, Transaction
+from business.services.rollups import record_subscriptions
+
+
+class Renewal:
+    def __init__(self, subscriber, subscription, transaction, qued, replayed=False):
+        self.subscriber = subscriber
+        self.subscription = subscription
+        self.transaction = transaction
+        self.qued = qued
+        self.replayed = replayed
+
+
+class IdempotencyKeyReused(Exception):
+    """The idempotency key was first used to renew another subscriber or plan."""
+
+
+def replay(business, idempotency_key, subscriber_id, plan):
+    """
+    The renewal already recorded under `idempotency_key`, or None. Raises IdempotencyKeyReused
+    when that renewal was for another subscriber or plan than `subscriber_id` and `plan`.
+    """
+    transaction = Transaction.objects.filter(business=business, idempotency_key=idempotency_key).first()
+    if transaction is None:
+        return None
+    subscription = Subscription.objects.select_related('subscriber').get(transaction=transaction)
+    if subscription.subscriber_id != subscriber_id or subscription.plan_id != (plan.id if plan else None):
+        raise IdempotencyKeyReused("Idempotency-Key was already used for a different renewal.")
+    qued = Subscription.objects.filter(
+        subscriber_id=subscription.subscriber_id,
+        id__lt=subscription.id,
+        plan_end_date__gte=subscription.created_at.date(),
+    ).exists()
+    return Renewal(subscription.subscriber, subscription, transaction, qued, replayed=True)
+
+
+def renew_subscription(business, user, subscriber_id, plan=None, start_date=None, end_date=None, amount=None, idempotency_key=None):
+    """
+    Add a paid period to a subscriber in one atomic block. The subscriber row is locked with
+    SELECT ... FOR UPDATE so concurrent renewals of the same subscriber queue up and each
+    one starts where the previous ended. A period starting today replaces the active
+    subscription right away. A repeated `idempotency_key` returns the renewal
+    it first created instead of charging again. Raises Http404 for unknown subscribers,
+    IdempotencyKeyReused when the key was used for another renewal and ValueError when the
+    period cannot be computed.
+    """
+    try:
+        with db_transaction.atomic():
+            subscriber = get_object_or_404(Subscriber.objects.select_for_update(), id=subscriber_id, business=business)
+
+            if idempotency_key:
+                existing = replay(business, idempotency_key, subscriber.id, plan)
+                if existing is not None:
+                    return existing
+
+            today = timezone.now().date()
+            latest = Subscription.objects.filter(subscriber=subscriber).order_by('-plan_end_date').first()
+            # the latest subscription that has not ended yet, either active or queued behind one
+            previous = latest if latest is not None and latest.plan_end_date >= today else None
+
+            if start_date is None:
+                start_date = previous.plan_end_date if previous else today
+            if end_date is None:
+                end_date = plan.end_date(start_date)
+
+            transaction = Transaction.objects.create(
+                plan=plan,
+                conducted_by=user,
+                business=business,
+                amount=amount if amount else plan.price,
+                idempotency_key=idempotency_key or None,
+            )
+            subscription = Subscription.objects.create(
+                subscriber=subscriber,
+                plan=plan,
+                plan_start_date=start_date,
+                plan_end_date=end_date,
+                transaction=transaction,
+                active=start_date <= today <= end_date,
+            )
+            if subscription.active:
+                # hand over now instead of on the scheduler's next run, a subscriber has one active subscription
+                Subscription.objects.filter(subscriber=subscriber, active=True).exclude(id=subscription.id).update(
+                    active=False, updated_at=timezone.now()
+                )
+            record_subscriptions(business.id, [(start_date, end_date, transaction.amount, latest.plan_end_date if latest else None)])
+    except IntegrityError:
+        # a retry with the same key committed first
+        existing = replay(business, idempotency_key, subscriber.id, plan) if idempotency_key else None
+        if existing is None:
+            raise
+        return existing
+
+    return Renewal(subscriber, subscription, transaction, previous is not None)
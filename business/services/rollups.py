@@ -0,0 +1,160 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from business.models.archive_models import ArchivedSubscription, ArchivedTransaction
+from business.models.rollup_models import BusinessDailySummary
+from business.models.subscription_models import Subscription, Transaction
+
+COUNTERS = ['revenue', 'transactions', 'subscribers_started', 'subscribers_ending', 'subscribers_returned']
+
+
+def apply_deltas(business_id, deltas):
+    """
+    Add `deltas` ({day: {counter: amount}}) to the business's daily summaries: one SELECT of
+    the days that have a summary, one UPDATE for all of them and one INSERT for the rest,
+    however many days are touched.
+    """
+    deltas = {day: counters for day, counters in deltas.items() if any(counters.values())}
+    while deltas:
+        existing = dict(BusinessDailySummary.objects.filter(business_id=business_id, day__in=list(deltas)).values_list('day', 'id'))
+        if existing:
+            BusinessDailySummary.objects.bulk_update([
+                BusinessDailySummary(id=summary_id, **{field: F(field) + deltas[day].get(field, 0) for field in COUNTERS})
+                for day, summary_id in existing.items()
+            ], COUNTERS)
+        deltas = {day: counters for day, counters in deltas.items() if day not in existing}
+        if not deltas:
+            return
+        try:
+            with db_transaction.atomic():
+                BusinessDailySummary.objects.bulk_create([
+                    BusinessDailySummary(business_id=business_id, day=day, **counters) for day, counters in deltas.items()
+                ])
+            return
+        except IntegrityError:
+            # some were created concurrently, add on top of them
+            continue
+
+
+def record_subscriptions(business_id, periods):
+    """
+    Roll up newly written subscriptions. `periods` is an iterable of
+    (plan_start_date, plan_end_date, amount, previous_end) for subscriptions paid today, where
+    previous_end is the latest end date of the subscriber's earlier subscriptions (None for a
+    new subscriber). A period starting by previous_end continues the subscriber's coverage and
+    moves its end; any other starts a new coverage.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    today = timezone.now().date()
+    for start_date, end_date, amount, previous_end in periods:
+        deltas[today]['revenue'] += amount
+        deltas[today]['transactions'] += 1
+        if previous_end is not None and start_date <= previous_end:
+            if end_date > previous_end:
+                deltas[previous_end]['subscribers_ending'] -= 1
+                deltas[end_date]['subscribers_ending'] += 1
+        else:
+            deltas[start_date]['subscribers_started'] += 1
+            deltas[end_date]['subscribers_ending'] += 1
+            if previous_end is not None:
+                deltas[start_date]['subscribers_returned'] += 1
+    apply_deltas(business_id, deltas)
+
+
+def coverage_counters(rows, counters):
+    """
+    Add the coverage of subscribers to `counters` ({(business, day): {counter: amount}}) as
+    record_subscriptions would have, from (business, subscriber, start, end) rows ordered by
+    subscriber and start.
+    """
+    current = None
+    for business_id, subscriber_id, start_date, end_date in rows:
+        if current is not None and current[1] == subscriber_id and start_date <= current[2]:
+            current[2] = max(current[2], end_date)
+            continue
+        if current is not None:
+            counters[current[0], current[2]]['subscribers_ending'] += 1
+        counters[business_id, start_date]['subscribers_started'] += 1
+        if current is not None and current[1] == subscriber_id:
+            counters[business_id, start_date]['subscribers_returned'] += 1
+        current = [business_id, subscriber_id, end_date]
+    if current is not None:
+        counters[current[0], current[2]]['subscribers_ending'] += 1
+
+
+def rebuild_rollups(business_ids=None):
+    """Recompute daily summaries from the transaction and subscription tables and their archives."""
+    summaries = BusinessDailySummary.objects.all()
+    if business_ids:
+        summaries = summaries.filter(business_id__in=business_ids)
+
+    rows = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for transactions in [Transaction.objects.all(), ArchivedTransaction.objects.all()]:
+        if business_ids:
+            transactions = transactions.filter(business_id__in=business_ids)
+        for row in transactions.annotate(day=TruncDate('created_at')).values('business_id', 'day').annotate(
+            total=Sum('amount'), count=Count('id')
+        ):
+            counters = rows[row['business_id'], row['day']]
+            counters['revenue'] += row['total']
+            counters['transactions'] += row['count']
+
+    fields = ['subscriber__business_id', 'subscriber_id', 'plan_start_date', 'plan_end_date']
+    subscriptions = [Subscription.objects.all(), ArchivedSubscription.objects.all()]
+    if business_ids:
+        subscriptions = [queryset.filter(subscriber__business_id__in=business_ids) for queryset in subscriptions]
+    periods = subscriptions[0].values_list(*fields).union(subscriptions[1].values_list(*fields), all=True)
+    coverage_counters(periods.order_by('subscriber_id', 'plan_start_date').iterator(), rows)
+
+    with db_transaction.atomic():
+        summaries.delete()
+        BusinessDailySummary.objects.bulk_create(
+            [BusinessDailySummary(business_id=business_id, day=day, **counters) for (business_id, day), counters in rows.items()],
+            batch_size=1000,
+        )
+    return len(rows)
+
+
+
+def dashboard(business_id, expiring_days=7, group_by='day', since=None, until=None, today=None):
+    """
+    Subscriber counts and revenue for a business, read from the daily summaries only. Active
+    subscribers are covered today, expiring ones have coverage ending within `expiring_days`
+    without a renewal, expired ones had coverage that ended and have not come back.
+    """
+    today = today or timezone.now().date()
+    summaries = BusinessDailySummary.objects.filter(business_id=business_id)
+
+    totals = summaries.aggregate(
+        started=Sum('subscribers_started', filter=Q(day__lte=today)),
+        ended=Sum('subscribers_ending', filter=Q(day__lt=today)),
+        returned=Sum('subscribers_returned', filter=Q(day__lte=today)),
+        expiring=Sum('subscribers_ending', filter=Q(day__gte=today, day__lte=today + timedelta(days=expiring_days))),
+    )
+    ended = totals['ended'] or 0
+
+    revenue = summaries.filter(transactions__gt=0)
+    if since:
+        revenue = revenue.filter(day__gte=since)
+    if until:
+        revenue = revenue.filter(day__lte=until)
+    period = TruncMonth('day') if group_by == 'month' else F('day')
+    revenue = revenue.annotate(period=period).values('period').annotate(
+        revenue=Sum('revenue'), transactions=Sum('transactions')
+    ).order_by('period')
+
+    return {
+        "active_subscriptions": (totals['started'] or 0) - ended,
+        "expiring_subscriptions": totals['expiring'] or 0,
+        "expired_subscriptions": ended - (totals['returned'] or 0),
+        "expiring_within_days": expiring_days,
+        "revenue": [
+            {"period": row['period'], "revenue": str(row['revenue']), "transactions": row['transactions']}
+            for row in revenue
+        ],
+    }
@@ -0,0 +1,116 @@
+import heapq
+from datetime import timedelta
+
+from django.db.models import Max
+from django.utils import timezone
+
+from business.models.subscription_models import Subscription
+from business.services.expiry import expire_subscriptions
+
+ACTIVATE = 'activate'
+EXPIRE = 'expire'
+
+
+def pending_subscriptions(today=None):
+    """
+    Subscriptions created ahead of time (queued renewals) that have not been activated yet.
+    Retired subscriptions are inactive too, but end on or before the day their successor
+    started, so only inactive rows ending after today count.
+    """
+    today = today or timezone.now().date()
+    return Subscription.objects.filter(active=False, plan_end_date__gt=today)
+
+
+def activate_subscriptions(subscription_ids, today=None):
+    """
+    Activate the given pending subscriptions whose start date has arrived and retire the
+    subscription they were queued behind. Returns the number of subscriptions activated.
+    """
+    today = today or timezone.now().date()
+    due = pending_subscriptions(today).filter(id__in=subscription_ids, plan_start_date__lte=today)
+    activated = 0
+    for subscription_id, subscriber_id, start_date in due.values_list('id', 'subscriber_id', 'plan_start_date'):
+        Subscription.objects.filter(
+            subscriber_id=subscriber_id, active=True, plan_end_date__lte=start_date
+        ).exclude(id=subscription_id).update(active=False, updated_at=timezone.now())
+        activated += Subscription.objects.filter(id=subscription_id, active=False).update(
+            active=True, updated_at=timezone.now()
+        )
+    return activated
+
+
+class SubscriptionScheduler:
+    """
+    Time-indexed queue of subscription state changes.
+
+    Pending subscriptions are queued for activation on their plan_start_date and active ones
+    for expiry on the day after their plan_end_date. Only events within `horizon_days` are
+    kept in memory; the queue is refilled from the database when the horizon is reached and
+    topped up with subscriptions created since the last sync, so a tick costs O(due events).
+    """
+
+    def __init__(self, horizon_days=7):
+        self.horizon = timedelta(days=horizon_days)
+        self.queue = []
+        self.loaded_until = None
+        self.last_seen_id = 0
+
+    def push(self, due, action, subscription_id):
+        heapq.heappush(self.queue, (due, action, subscription_id))
+
+    def load(self, today, subscriptions, until):
+        for subscription_id, active, start_date, end_date in subscriptions.values_list(
+            'id', 'active', 'plan_start_date', 'plan_end_date'
+        ):
+            if active:
+                due = end_date + timedelta(days=1)
+            else:
+                due = start_date
+            if due <= until:
+                self.push(max(due, today), EXPIRE if active else ACTIVATE, subscription_id)
+
+    def refill(self, today):
+        """Catch up on overdue work with set-based updates, then queue events up to the horizon."""
+        for _ in expire_subscriptions(today):
+            pass
+        self.queue = []
+        until = today + self.horizon
+        self.last_seen_id = Subscription.objects.aggregate(last=Max('id'))['last'] or 0
+
+        self.load(today, pending_subscriptions(today).filter(plan_start_date__lte=until), until)
+        self.load(
+            today,
+            Subscription.objects.filter(active=True, plan_end_date__lt=until),
+            until,
+        )
+        self.loaded_until = until
+
+    def sync_new(self, today):
+        """Queue subscriptions created since the last sync, e.g. renewals made by the API."""
+        last_id = Subscription.objects.aggregate(last=Max('id'))['last'] or self.last_seen_id
+        created = Subscription.objects.filter(
+            id__gt=self.last_seen_id, id__lte=last_id, plan_end_date__gte=today
+        )
+        self.load(today, created, self.loaded_until)
+        self.last_seen_id = last_id
+
+    def tick(self, today=None):
+        """Apply every event due on or before `today`. Returns (activated, expired)."""
+        today = today or timezone.now().date()
+        if self.loaded_until is None or today >= self.loaded_until:
+            self.refill(today)
+        else:
+            self.sync_new(today)
+
+        to_activate, to_expire = [], []
+        while self.queue and self.queue[0][0] <= today:
+            _, action, subscription_id = heapq.heappop(self.queue)
+            (to_activate if action == ACTIVATE else to_expire).append(subscription_id)
+
+        expired = 0
+        if to_expire:
+            expired = Subscription.objects.filter(
+                id__in=to_expire, active=True, plan_end_date__lt=today
+            ).update(active=False, updated_at=timezone.now())
+        activated = activate_subscriptions(to_activate, today) if to_activate else 0
+        return activated, expired
@@ -0,0 +1,88 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from business.models.models import Business
+from business.models.subscription_models import Plan, Subscriber, Subscription, Transaction
+from users.models import User, UserBusinessMapping
+
+PASSWORD = 'bench-password'
+
+
+class SeededData:
+    def __init__(self, tag):
+        self.tag = tag
+        self.owners = []
+        self.businesses = []
+        self.plans = {}
+        self.subscribers = {}
+
+
+def seed(businesses=5, plans_per_business=3, subscribers_per_business=200, expired_ratio=0.2, tag=None):
+    """
+    Generate businesses with an owner each, plans, and subscribers holding one paid
+    subscription (a share of them already expired). Everything is written with bulk_create;
+    ids are read back with queries so this also works on backends without bulk RETURNING.
+    Every owner can log in with PASSWORD.
+    """
+    tag = tag or str(time.time_ns())
+    data = SeededData(tag)
+    today = timezone.now().date()
+    password = make_password(PASSWORD)
+
+    User.objects.bulk_create(
+        User(email=f'bench-{tag}-owner{i}@bizzlers.local', password=password) for i in range(businesses)
+    )
+    data.owners = list(User.objects.filter(email__startswith=f'bench-{tag}-owner').order_by('id'))
+    Business.objects.bulk_create(
+        Business(name=f'Bench {tag} {i}', owner=owner, type=Business.SUBSCRIPTION_BASED)
+        for i, owner in enumerate(data.owners)
+    )
+    data.businesses = list(Business.objects.filter(owner__in=data.owners).order_by('id'))
+    UserBusinessMapping.objects.bulk_create(
+        UserBusinessMapping(user_id=business.owner_id, business=business, role='OWNER') for business in data.businesses
+    )
+
+    Plan.objects.bulk_create(
+        Plan(
+            name=f'plan {i}', duration_count=i + 1, duration_unit=Plan.MONTHLY,
+            price=Decimal(100 * (i + 1)), added_by_id=business.owner_id, business=business,
+        )
+        for business in data.businesses for i in range(plans_per_business)
+    )
+    for plan in Plan.objects.filter(business__in=data.businesses).order_by('id'):
+        data.plans.setdefault(plan.business_id, []).append(plan)
+
+    Subscriber.objects.bulk_create(
+        Subscriber(name=f'subscriber {i}', business=business, email=f'bench-{tag}-{business.id}-{i}@bizzlers.local', phone=None)
+        for business in data.businesses for i in range(subscribers_per_business)
+    )
+    subscribers = list(Subscriber.objects.filter(business__in=data.businesses).order_by('id'))
+    for subscriber in subscribers:
+        data.subscribers.setdefault(subscriber.business_id, []).append(subscriber)
+
+    expired = int(subscribers_per_business * expired_ratio)
+    periods = []
+    for business in data.businesses:
+        plans = data.plans.get(business.id) or [None]
+        for i, subscriber in enumerate(data.subscribers.get(business.id, [])):
+            plan = plans[i % len(plans)]
+            start_date = today - timedelta(days=60) if i < expired else today - timedelta(days=i % 28)
+            periods.append((business, subscriber, plan, start_date, plan.end_date(start_date) if plan else start_date))
+
+    Transaction.objects.bulk_create(
+        Transaction(plan=plan, amount=plan.price if plan else Decimal(0), conducted_by_id=business.owner_id, business=business)
+        for business, _, plan, _, _ in periods
+    )
+    transactions = list(Transaction.objects.filter(business__in=data.businesses).order_by('id'))
+    Subscription.objects.bulk_create(
+        Subscription(
+            subscriber=subscriber, plan=plan, transaction=transaction,
+            plan_start_date=start_date, plan_end_date=end_date, active=end_date >= today,
+        )
+        for transaction, (_, subscriber, plan, start_date, end_date) in zip(transactions, periods)
+    )
+    return data
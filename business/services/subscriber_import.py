@@ -0,0 +1,167 @@
+import uuid
+
+from django.db import IntegrityError, connection, transaction as db_transaction
+from django.utils import timezone
+
+from business.models.subscription_models import Plan, Subscriber, Subscription, Transaction
+from business.serializers import AddSubscriberSerializer
+from business.services.rollups import record_subscriptions
+from utils.common import chunked, first_error_message
+
+CSV_FIELDS = ['name', 'email', 'phone', 'plan', 'start_date', 'end_date', 'amount']
+
+
+def csv_rows(reader):
+    """Normalise csv.DictReader rows: blank cells become missing values."""
+    for row in reader:
+        yield {key: value.strip() for key, value in row.items() if key in CSV_FIELDS and value and value.strip()}
+
+
+class SubscriberImport:
+    """
+    Imports subscribers in chunks. Each chunk is validated up front, then its subscribers,
+    transactions, subscriptions and rollups are written with bulk_create inside one atomic
+    block. Invalid rows are reported back and skipped; they never abort the rest of the import.
+    """
+
+    def __init__(self, business, user, chunk_size=1000):
+        self.business = business
+        self.user = user
+        self.chunk_size = chunk_size
+        self.plans = {}
+        self.created = 0
+        self.errors = []
+
+    def run(self, rows):
+        for chunk in chunked(enumerate(rows, start=1), self.chunk_size):
+            self.import_chunk(chunk)
+        return {"created": self.created, "failed": len(self.errors), "errors": self.errors}
+
+    def fail(self, row_number, message):
+        self.errors.append({"row": row_number, "message": message})
+
+    def load_plans(self, plan_ids):
+        """Fetch the plans of this business not seen in earlier chunks."""
+        missing = set(plan_ids) - set(self.plans)
+        if not missing:
+            return
+        for plan in Plan.objects.filter(id__in=missing, business=self.business):
+            self.plans[plan.id] = plan
+        for plan_id in missing - set(self.plans):
+            self.plans[plan_id] = None
+
+    def validate_chunk(self, chunk):
+        valid = []
+        for row_number, row in chunk:
+            serializer = AddSubscriberSerializer(data=row)
+            if not serializer.is_valid():
+                self.fail(row_number, first_error_message(serializer.errors))
+                continue
+            valid.append((row_number, serializer.validated_data))
+
+        self.load_plans(data['plan'] for _, data in valid if data.get('plan'))
+
+        emails = [data['email'] for _, data in valid]
+        phones = [data['phone'] for _, data in valid if data.get('phone')]
+        taken_emails = set(Subscriber.objects.filter(email__in=emails).values_list('email', flat=True))
+        taken_phones = set(Subscriber.objects.filter(phone__in=phones).values_list('phone', flat=True)) if phones else set()
+
+        today = timezone.now().date()
+        rows = []
+        for row_number, data in valid:
+            email, phone = data['email'], data.get('phone') or None
+            if email in taken_emails:
+                self.fail(row_number, f"Subscriber with email {email} already exists.")
+                continue
+            if phone and phone in taken_phones:
+                self.fail(row_number, f"Subscriber with phone {phone} already exists.")
+                continue
+
+            plan = None
+            if data.get('plan'):
+                plan = self.plans[data['plan']]
+                if plan is None:
+                    self.fail(row_number, "Invalid plan.")
+                    continue
+
+            start_date = data.get('start_date') or today
+            end_date = data.get('end_date')
+            if end_date is None:
+                try:
+                    end_date = plan.end_date(start_date)
+                except ValueError as e:
+                    self.fail(row_number, str(e))
+                    continue
+
+            taken_emails.add(email)
+            if phone:
+                taken_phones.add(phone)
+            rows.append((row_number, data, plan, start_date, end_date))
+        return rows
+
+    def import_chunk(self, chunk):
+        rows = self.validate_chunk(chunk)
+        if not rows:
+            return
+
+        try:
+            with db_transaction.atomic():
+                self.write(rows)
+            self.created += len(rows)
+        except IntegrityError:
+            # e.g. an email taken since validation: retry the rows one by one to find the culprits
+            for row in rows:
+                try:
+                    with db_transaction.atomic():
+                        self.write([row])
+                    self.created += 1
+                except IntegrityError as e:
+                    self.fail(row[0], f"Could not be saved: {e}")
+
+    def write(self, rows):
+        """Write the subscribers, transactions, subscriptions and rollups of valid rows; call in an atomic block."""
+        today = timezone.now().date()
+        subscribers = Subscriber.objects.bulk_create([
+            Subscriber(name=data['name'], business=self.business, email=data['email'], phone=data.get('phone') or None)
+            for _, data, _, _, _ in rows
+        ])
+        if subscribers and subscribers[0].pk is None:
+            # backends without RETURNING on bulk inserts (MySQL): look ids up by the unique email
+            ids = dict(Subscriber.objects.filter(
+                email__in=[subscriber.email for subscriber in subscribers]
+            ).values_list('email', 'id'))
+            for subscriber in subscribers:
+                subscriber.pk = ids[subscriber.email]
+
+        batch = uuid.uuid4().hex
+        transactions = Transaction.objects.bulk_create([
+            Transaction(
+                plan=plan, conducted_by=self.user, business=self.business, amount=data.get('amount') or plan.price,
+                # lets the ids be read back on backends without RETURNING on bulk inserts (MySQL)
+                idempotency_key=f'import-{batch}-{row_number}',
+            )
+            for row_number, data, plan, _, _ in rows
+        ])
+        if not connection.features.can_return_rows_from_bulk_insert:
+            ids = dict(Transaction.objects.filter(
+                business=self.business, idempotency_key__startswith=f'import-{batch}-'
+            ).values_list('idempotency_key', 'id'))
+            for transaction in transactions:
+                transaction.pk = ids[transaction.idempotency_key]
+
+        Subscription.objects.bulk_create([
+            Subscription(
+                subscriber=subscriber,
+                plan=plan,
+                plan_start_date=start_date,
+                plan_end_date=end_date,
+                transaction=transaction,
+                active=start_date <= today,
+            )
+            for subscriber, transaction, (_, _, plan, start_date, end_date) in zip(subscribers, transactions, rows)
+        ])
+
+        record_subscriptions(self.business.id, [
+            (start_date, end_date, transaction.amount, None)
+            for transaction, (_, _, _, start_date, end_date) in zip(transactions, rows)
+        ])
@@ -0,0 +1,36 @@
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from business.models.subscription_models import Subscriber, Subscription, Transaction
+from business.services.rollups import record_subscriptions
+
+
+def add_subscriber(business, user, name, email, phone, plan, start_date, end_date, amount=None):
+    """
+    Create a subscriber with its first paid subscription and roll it up, in one atomic block so
+    a failure leaves neither a subscriber without a subscription nor a half counted rollup.
+    Returns the subscription, whose `subscriber` and `transaction` are the new rows.
+    """
+    with db_transaction.atomic():
+        subscriber = Subscriber.objects.create(
+            name=name,
+            business=business,
+            email=email,
+            phone=phone,
+        )
+        transaction = Transaction.objects.create(
+            plan=plan,
+            conducted_by=user,
+            business=business,
+            amount=amount if amount else plan.price,
+        )
+        subscription = Subscription.objects.create(
+            subscriber=subscriber,
+            plan=plan,
+            plan_start_date=start_date,
+            plan_end_date=end_date,
+            transaction=transaction,
+            active=start_date <= timezone.now().date(),
+        )
+        record_subscriptions(business.id, [(start_date, end_date, transaction.amount, None)])
+    return subscription
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from business.context import forget_membership
+from business.models.models import Business
+from business.models.subscription_models import Plan
+from business.services import plan_catalog
+from users.models import UserBusinessMapping
+
+
+@receiver([post_save, post_delete], sender=UserBusinessMapping)
+def invalidate_business_role(instance, **kwargs):
+    forget_membership(instance.user_id, instance.business_id)
+
+
+@receiver(post_save, sender=Business)
+def invalidate_business_type(instance, created, **kwargs):
+    # a new business has no members yet; deleting one deletes its memberships, which drop their own roles
+    if not created:
+        for user_id in UserBusinessMapping.objects.filter(business_id=instance.id).values_list('user_id', flat=True):
+            forget_membership(user_id, instance.id)
+
+
+@receiver([post_save, post_delete], sender=Plan)
+def invalidate_plan_catalog(instance, **kwargs):
+    # on commit: dropping it earlier would let a request still reading the old rows cache them again
+    business_id = instance.business_id
+    transaction.on_commit(lambda: plan_catalog.invalidate(business_id))
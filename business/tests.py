@@ -1,3 +1,660 @@
-from django.test import TestCase
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DatabaseError, close_old_connections, connection, connections
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from business.context import resolve_business_context, role_cache
+from business.management.commands.explain_hot_queries import full_scans, hot_queries
+from business.models.idempotency_models import IdempotencyKey
+from business.models.models import Business, Invitation
+from business.models.rollup_models import BusinessDailySummary
+from business.models.subscription_models import Plan, Subscriber, Subscription, Transaction
+from business.services import idempotency
+from business.services.notifications import expiring_subscriptions
+from business.services.plan_catalog import catalog_cache, get_catalog
+from business.services.renewals import IdempotencyKeyReused, renew_subscription
+from business.services.rollups import dashboard, rebuild_rollups, record_subscriptions
+from business.services.subscriber_import import SubscriberImport
+from middlewares.replicas import pinned_users
+from users.models import User, UserBusinessMapping
+from utils import async_api, metrics
+from utils.cache import LayeredCache
+from utils.parsers import FastJSONParser
+
+
+def clear_caches():
+    # caches outlive the rolled back test transactions, whose ids get reused
+    for cache in caches.all():
+        cache.clear()
+
+
+class BusinessFixture:
+    """An owner with a subscription business and one monthly plan, and a client authenticated as them."""
+
+    def setUp(self):
+        clear_caches()
+        self.owner = User.objects.create_user(email='owner@bizzlers.local', password='secret-pass-1')
+        self.business = Business.objects.create(name='Gym', owner=self.owner, type=Business.SUBSCRIPTION_BASED)
+        UserBusinessMapping.objects.create(user=self.owner, business=self.business, role='OWNER')
+        self.plan = Plan.objects.create(
+            name='Monthly', duration_count=1, duration_unit=Plan.MONTHLY, price=10, added_by=self.owner, business=self.business
+        )
+        self.client = self.client_for(self.owner, self.business)
+
+    def client_for(self, user, business=None):
+        client = APIClient()
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+        if business is not None:
+            headers['HTTP_X_BUSINESS_ID'] = str(business.id)
+        client.credentials(**headers)
+        return client
+
+
+class BusinessAPITestCase(BusinessFixture, TestCase):
+    pass
+
+
+class InviteTests(BusinessAPITestCase):
+    def test_inviting_a_member_again_does_not_fail(self):
+        staff = User.objects.create_user(email='staff@bizzlers.local', password='secret-pass-1')
+        url = reverse('invite-to-business')
+
+        first = self.client.post(url, {'email': staff.email, 'role': 'STAFF'}, format='json')
+        again = self.client.post(url, {'email': staff.email, 'role': 'STAFF'}, format='json')
+        owner = self.client.post(url, {'email': self.owner.email, 'role': 'STAFF'}, format='json')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(owner.status_code, 200)
+        self.assertEqual(UserBusinessMapping.objects.filter(business=self.business).count(), 2)
+        self.assertEqual(UserBusinessMapping.objects.get(user=self.owner, business=self.business).role, 'OWNER')
+
+
+
+class ParseOnceTests(BusinessAPITestCase):
+    """The plan permission and the view read the same parsed body."""
+
+    def setUp(self):
+        super().setUp()
+        self.subscriber = Subscriber.objects.create(name='Ann', business=self.business, email='ann@bizzlers.local')
+
+    def test_drf_views_parse_the_body_once(self):
+        for name, payload in [
+            ('add-subscriber', {'name': 'Bob', 'email': 'bob@bizzlers.local', 'plan': self.plan.id}),
+            ('renew-subscription', {'subscriber': self.subscriber.id, 'plan': self.plan.id}),
+        ]:
+            with self.subTest(name), mock.patch.object(FastJSONParser, 'parse', autospec=True, side_effect=FastJSONParser.parse) as parse:
+                response = self.client.post(reverse(name), payload, format='json')
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(parse.call_count, 1)
+
+    async def test_async_views_parse_the_body_once(self):
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.owner).access_token}', 'X-Business-Id': str(self.business.id)}
+        for name, payload in [
+            ('async-add-subscriber', {'name': 'Bob', 'email': 'bob@bizzlers.local', 'plan': self.plan.id}),
+            ('async-renew-subscription', {'subscriber': self.subscriber.id, 'plan': self.plan.id}),
+        ]:
+            with self.subTest(name), mock.patch.object(async_api, 'parse_body', side_effect=async_api.parse_body) as parse_body:
+                response = await self.async_client.post(reverse(name), payload, content_type='application/json', headers=headers)
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(parse_body.call_count, 1)
+
+
+class PlanCatalogCacheTests(BusinessAPITestCase):
+    def test_plan_changes_reach_other_processes(self):
+        # another worker: its own local copies, the same shared cache
+        other = LayeredCache(catalog_cache.alias, maxsize=10, ttl=60)
+        with mock.patch('business.services.plan_catalog.catalog_cache', other):
+            self.assertEqual(list(get_catalog(self.business.id).plans), [self.plan.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            yearly = Plan.objects.create(
+                name='Yearly', duration_count=1, duration_unit=Plan.YEARLY, price=100, added_by=self.owner, business=self.business
+            )
+
+        with mock.patch('business.services.plan_catalog.catalog_cache', other), self.assertNumQueries(1):
+            self.assertEqual(list(get_catalog(self.business.id).plans), [self.plan.id, yearly.id])
+        with self.assertNumQueries(0):
+            self.assertEqual(list(get_catalog(self.business.id).plans), [self.plan.id, yearly.id])
+
+
+class BusinessContextCacheTests(BusinessAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(email='staff@bizzlers.local', password='secret-pass-1')
+        self.membership = UserBusinessMapping.objects.create(user=self.staff, business=self.business, role='STAFF')
+        # another worker: its own local copies, the same shared cache
+        self.other = LayeredCache(role_cache.alias, maxsize=10, ttl=60)
+
+    def resolve_in_other_process(self):
+        with mock.patch('business.context.role_cache', self.other):
+            return resolve_business_context(self.staff, self.business.id)
+
+    def test_membership_changes_reach_other_processes(self):
+        self.assertEqual(self.resolve_in_other_process().role, 'STAFF')
+        with self.assertNumQueries(0):
+            self.resolve_in_other_process()
+
+        self.membership.delete()
+
+        self.assertIsNone(self.resolve_in_other_process())
+
+    def test_business_type_changes_reach_other_processes(self):
+        self.assertTrue(self.resolve_in_other_process().is_subscription_based)
+
+        self.business.type = Business.PRODUCT_BASED
+        self.business.save()
+
+        self.assertFalse(self.resolve_in_other_process().is_subscription_based)
+
+
+@skipUnlessDBFeature('supports_explaining_query_execution')
+class HotQueryIndexTests(TestCase):
+    # hot query -> index its plan must use
+    indexes = {
+        'plan by name': 'unique_plan_name_per_business',
+        'plan in business': 'PRIMARY KEY',
+        'active subscription': 'subscription_lifecycle_idx',
+        'renewal predecessor': 'subscription_expiry_idx',
+        'expiring range': 'subscription_end_idx',
+        'pending activation': 'subscription_end_idx',
+        'subscriber page': 'subscriber_business_page_idx',
+        'invitation by business': 'invitation_email_business_idx',
+        'pending invitations': 'invitation_email_status_idx',
+        'membership': 'unique_user_business_mapping',
+        'membership with role': 'unique_user_business_mapping',
+        'ledger range': 'transaction_ledger_idx',
+        'idempotency key': 'unique_user_idempotency_key',
+    }
+
+    def index_name(self, model, name):
+        if name == 'PRIMARY KEY':
+            return {'sqlite': 'INTEGER PRIMARY KEY', 'mysql': 'PRIMARY', 'postgresql': f'{model._meta.db_table}_pkey'}[connection.vendor]
+        # SQLite builds unique constraints into the table, as a sqlite_autoindex_<table>_<n> index
+        if connection.vendor == 'sqlite' and any(constraint.name == name for constraint in model._meta.constraints):
+            return f'sqlite_autoindex_{model._meta.db_table}_'
+        return name
+
+    def test_hot_queries_use_their_index(self):
+        if connection.vendor == 'postgresql':
+            # the test tables are empty, where a sequential scan is always the cheapest
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        queries = hot_queries()
+        self.assertEqual(set(queries), set(self.indexes))
+        for name, index in self.indexes.items():
+            with self.subTest(name):
+                self.assertIn(self.index_name(queries[name].model, index), queries[name].explain())
+
+    def test_expiry_notifications_use_the_end_and_lifecycle_indexes(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        tables, plan = full_scans(expiring_subscriptions(timezone.now().date(), 7))
+        self.assertEqual(tables, [])
+        # the range, then the correlated "renewed" subquery
+        self.assertIn('subscription_end_idx', plan)
+        self.assertIn('subscription_lifecycle_idx', plan)
+
+
+class InstrumentationTests(BusinessAPITestCase):
+    def test_unknown_methods_share_one_label(self):
+        for method in ['PROPFIND', 'BREW', 'GET']:
+            self.client.generic(method, reverse('list-plans'))
+
+        methods = {dict(key)['method'] for key in metrics.request_duration.series if dict(key)['view'] == 'list-plans'}
+        self.assertEqual(methods, {'GET', 'OTHER'})
+
+
+class ListSubscribersTests(BusinessAPITestCase):
+    def test_inactive_subscribers_are_filtered_on_their_latest_subscription(self):
+        today = timezone.now().date()
+        yearly = Plan.objects.create(
+            name='Yearly', duration_count=1, duration_unit=Plan.YEARLY, price=100, added_by=self.owner, business=self.business
+        )
+        periods = {
+            'monthly': [(self.plan, 90, 60)],
+            'switched': [(self.plan, 90, 60), (yearly, 60, 30)],
+            'recent': [(self.plan, 20, 10)],
+            'active': [(self.plan, 10, -20)],
+        }
+        ids = {}
+        for name, subscriptions in periods.items():
+            subscriber = Subscriber.objects.create(name=name, business=self.business, email=f'{name}@bizzlers.local')
+            ids[subscriber.id] = name
+            for plan, started, ended in subscriptions:
+                Subscription.objects.create(
+                    subscriber=subscriber, plan=plan, plan_start_date=today - timedelta(days=started),
+                    plan_end_date=today - timedelta(days=ended), active=ended < 0,
+                )
+
+        def names(**params):
+            response = self.client.get(reverse('list-subscribers'), {'active': 'false', **params})
+            self.assertEqual(response.status_code, 200)
+            return [ids[subscriber['id']] for subscriber in response.json()['data']['subscribers']]
+
+        self.assertEqual(names(), ['monthly', 'switched', 'recent'])
+        self.assertEqual(names(plan=self.plan.id), ['monthly', 'recent'])
+        self.assertEqual(names(plan=yearly.id), ['switched'])
+        self.assertEqual(names(expires_after=today - timedelta(days=30)), ['switched', 'recent'])
+        self.assertEqual(names(plan=self.plan.id, expires_before=today - timedelta(days=30)), ['monthly'])
+
+
+class AddSubscriberTests(BusinessAPITestCase):
+    def test_a_failed_rollup_leaves_no_subscriber_behind(self):
+        payload = {'name': 'Ann', 'email': 'ann@bizzlers.local', 'plan': self.plan.id}
+        for name in ['add-subscriber', 'async-add-subscriber']:
+            with self.subTest(name), mock.patch('business.services.subscribers.record_subscriptions', side_effect=DatabaseError):
+                with self.assertRaises(DatabaseError):
+                    self.client.post(reverse(name), payload, format='json')
+                self.assertFalse(Subscriber.objects.filter(business=self.business).exists())
+                self.assertFalse(Transaction.objects.filter(business=self.business).exists())
+
+class SchedulerTests(BusinessAPITestCase):
+    def test_running_twice_on_the_same_day_changes_nothing(self):
+        today = timezone.now().date()
+        subscriber = Subscriber.objects.create(name='Ann', business=self.business, email='ann@bizzlers.local')
+        current = Subscription.objects.create(
+            subscriber=subscriber, plan=self.plan, plan_start_date=today - timedelta(days=30), plan_end_date=today, active=True
+        )
+        queued = Subscription.objects.create(
+            subscriber=subscriber, plan=self.plan, plan_start_date=today, plan_end_date=today + timedelta(days=30), active=False
+        )
+
+        call_command('run_subscription_scheduler', '--once', stdout=StringIO())
+        first = dict(Subscription.objects.values_list('id', 'active'))
+        call_command('run_subscription_scheduler', '--once', stdout=StringIO())
+        second = dict(Subscription.objects.values_list('id', 'active'))
+
+        self.assertEqual(first, {current.id: False, queued.id: True})
+        self.assertEqual(second, first)
+
+
+class RollupTests(BusinessAPITestCase):
+    def subscribe(self, email, **period):
+        payload = {'name': email, 'email': email, 'plan': self.plan.id, **{key: str(value) for key, value in period.items()}}
+        response = self.client.post(reverse('add-subscriber'), payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['data']['subscriber_details']['id']
+
+    def renew(self, subscriber_id, **period):
+        payload = {'subscriber': subscriber_id, 'plan': self.plan.id, **{key: str(value) for key, value in period.items()}}
+        response = self.client.post(reverse('renew-subscription'), payload, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def counts(self):
+        data = dashboard(self.business.id)
+        return data['active_subscriptions'], data['expiring_subscriptions'], data['expired_subscriptions']
+
+    def summaries(self):
+        return sorted(BusinessDailySummary.objects.filter(business=self.business).exclude(
+            subscribers_started=0, subscribers_ending=0, subscribers_returned=0, transactions=0,
+        ).values_list('day', 'revenue', 'transactions', 'subscribers_started', 'subscribers_ending', 'subscribers_returned'))
+
+    def test_dashboard_counts_subscribers_not_subscriptions(self):
+        today = timezone.now().date()
+        loyal = self.subscribe('loyal@bizzlers.local')
+        self.renew(loyal)
+        self.renew(loyal)
+        expiring = self.subscribe('expiring@bizzlers.local', start_date=today - timedelta(days=20), end_date=today + timedelta(days=3))
+        lapsed = self.subscribe('lapsed@bizzlers.local', start_date=today - timedelta(days=60), end_date=today - timedelta(days=30))
+        self.subscribe('gone@bizzlers.local', start_date=today - timedelta(days=60), end_date=today - timedelta(days=30))
+        self.assertEqual(self.counts(), (2, 1, 2))
+
+        self.renew(expiring)
+        self.renew(lapsed)
+        self.assertEqual(self.counts(), (3, 0, 1))
+
+        incremental = self.summaries()
+        rebuild_rollups([self.business.id])
+        self.assertEqual(self.summaries(), incremental)
+
+    def test_applying_deltas_takes_the_same_queries_for_any_number_of_days(self):
+        today = timezone.now().date()
+        periods = [(today, today + timedelta(days=days), 10, None) for days in range(1, 51)]
+        # SELECT, then an INSERT in a savepoint
+        with self.assertNumQueries(4):
+            record_subscriptions(self.business.id, periods)
+        # SELECT, then one UPDATE
+        with self.assertNumQueries(2):
+            record_subscriptions(self.business.id, periods)
+        self.assertEqual(BusinessDailySummary.objects.get(business=self.business, day=today).subscribers_started, 100)
+
+
+class BulkRenewalTests(BusinessAPITestCase):
+    def subscribers_with_distinct_end_dates(self, count, offset):
+        today = timezone.now().date()
+        emails = [f'bulk{offset + i}@bizzlers.local' for i in range(count)]
+        Subscriber.objects.bulk_create([Subscriber(name=email, business=self.business, email=email) for email in emails])
+        subscribers = list(Subscriber.objects.filter(email__in=emails).order_by('id'))
+        Subscription.objects.bulk_create([
+            Subscription(subscriber=subscriber, plan=self.plan, plan_start_date=today, plan_end_date=today + timedelta(days=offset + i + 1))
+            for i, subscriber in enumerate(subscribers)
+        ])
+        return [subscriber.id for subscriber in subscribers]
+
+    def renew(self, subscriber_ids):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('bulk-renew-subscriptions'), {'subscribers': subscriber_ids, 'plan': self.plan.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['renewed'], len(subscriber_ids))
+        return len(queries)
+
+    def test_queries_do_not_grow_with_subscribers_or_dates(self):
+        # fill the user, membership and plan caches and today's summary first
+        self.renew(self.subscribers_with_distinct_end_dates(1, 0))
+        few = self.renew(self.subscribers_with_distinct_end_dates(10, 1))
+        many = self.renew(self.subscribers_with_distinct_end_dates(100, 11))
+        self.assertEqual(many, few)
+
+
+
+class SubscriberImportTests(BusinessAPITestCase):
+    def rows(self, count):
+        return [{'name': f'Imported {i}', 'email': f'imported{i}@bizzlers.local', 'plan': self.plan.id} for i in range(count)]
+
+    def test_rows_failing_on_write_are_reported_one_by_one(self):
+        validate_chunk = SubscriberImport.validate_chunk
+
+        def validate_then_race(importer, chunk):
+            rows = validate_chunk(importer, chunk)
+            # another request takes the second email after it was checked
+            Subscriber.objects.create(name='Racer', business=self.business, email='imported1@bizzlers.local')
+            return rows
+
+        with mock.patch.object(SubscriberImport, 'validate_chunk', autospec=True, side_effect=validate_then_race):
+            summary = SubscriberImport(self.business, self.owner).run(self.rows(3))
+
+        self.assertEqual(summary['created'], 2)
+        self.assertEqual([error['row'] for error in summary['errors']], [2])
+        self.assertEqual(Transaction.objects.filter(business=self.business).count(), 2)
+        self.assertEqual(dashboard(self.business.id)['active_subscriptions'], 2)
+
+    def test_ids_are_read_back_without_returning(self):
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False), self.assertNumQueries(13):
+            summary = SubscriberImport(self.business, self.owner).run(self.rows(5))
+
+        self.assertEqual(summary['created'], 5)
+        subscriptions = Subscription.objects.filter(subscriber__business=self.business).values_list('subscriber__email', 'transaction__business_id')
+        self.assertEqual(sorted(subscriptions), [(f'imported{i}@bizzlers.local', self.business.id) for i in range(5)])
+        self.assertEqual(Subscription.objects.filter(subscriber__business=self.business).values('transaction_id').distinct().count(), 5)
+
+
+class HandoverTests(BusinessAPITestCase):
+    def subscriber_ending_today(self, email):
+        today = timezone.now().date()
+        subscriber = Subscriber.objects.create(name=email, business=self.business, email=email)
+        Subscription.objects.create(subscriber=subscriber, plan=self.plan, plan_start_date=today - timedelta(days=30), plan_end_date=today)
+        return subscriber
+
+    def active_periods(self, subscriber):
+        return list(Subscription.objects.filter(subscriber=subscriber, active=True).values_list('plan_start_date', flat=True))
+
+    def test_a_renewal_starting_today_replaces_the_active_subscription(self):
+        today = timezone.now().date()
+        subscriber = self.subscriber_ending_today('ann@bizzlers.local')
+
+        renew_subscription(self.business, self.owner, subscriber.id, plan=self.plan)
+
+        self.assertEqual(self.active_periods(subscriber), [today])
+
+    def test_a_bulk_renewal_starting_today_replaces_the_active_subscriptions(self):
+        today = timezone.now().date()
+        subscribers = [self.subscriber_ending_today(f'bulk{i}@bizzlers.local') for i in range(3)]
+
+        response = self.client.post(
+            reverse('bulk-renew-subscriptions'), {'subscribers': [subscriber.id for subscriber in subscribers], 'plan': self.plan.id}, format='json'
+        )
+
+        self.assertEqual(response.json()['data']['renewed'], 3)
+        for subscriber in subscribers:
+            self.assertEqual(self.active_periods(subscriber), [today])
+
+    def test_a_backdated_period_that_ended_does_not_replace_the_active_subscription(self):
+        today = timezone.now().date()
+        subscriber = self.subscriber_ending_today('ann@bizzlers.local')
+
+        renew_subscription(
+            self.business, self.owner, subscriber.id, plan=self.plan,
+            start_date=today - timedelta(days=90), end_date=today - timedelta(days=60),
+        )
+
+        self.assertEqual(self.active_periods(subscriber), [today - timedelta(days=30)])
+
+
+class ReplayTests(BusinessAPITestCase):
+    def test_a_key_is_not_replayed_for_another_subscriber_or_plan(self):
+        ann = Subscriber.objects.create(name='Ann', business=self.business, email='ann@bizzlers.local')
+        bob = Subscriber.objects.create(name='Bob', business=self.business, email='bob@bizzlers.local')
+        yearly = Plan.objects.create(
+            name='Yearly', duration_count=1, duration_unit=Plan.YEARLY, price=100, added_by=self.owner, business=self.business
+        )
+        first = renew_subscription(self.business, self.owner, ann.id, plan=self.plan, idempotency_key='renew-ann')
+
+        self.assertEqual(
+            renew_subscription(self.business, self.owner, ann.id, plan=self.plan, idempotency_key='renew-ann').transaction.id,
+            first.transaction.id,
+        )
+        with self.assertRaises(IdempotencyKeyReused):
+            renew_subscription(self.business, self.owner, bob.id, plan=self.plan, idempotency_key='renew-ann')
+        with self.assertRaises(IdempotencyKeyReused):
+            renew_subscription(self.business, self.owner, ann.id, plan=yearly, idempotency_key='renew-ann')
+        self.assertEqual(Transaction.objects.filter(business=self.business).count(), 1)
+
+    def test_replays_are_cached_as_plain_responses_until_the_key_expires(self):
+        def add_plan():
+            return self.client.post(
+                reverse('add-plan'), {'name': 'Yearly', 'duration': 1, 'type': 'Y', 'price': 100}, format='json',
+                headers={'Idempotency-Key': 'plan-yearly'},
+            )
+
+        first = add_plan()
+        # answered an hour before the key expires
+        IdempotencyKey.objects.filter(key='plan-yearly').update(
+            created_at=timezone.now() - timedelta(seconds=idempotency.KEY_TTL - 3600)
+        )
+        with mock.patch.object(idempotency.response_cache, 'set', wraps=idempotency.response_cache.set) as cache_set:
+            replayed = add_plan()
+
+        self.assertEqual((replayed.status_code, replayed.content), (first.status_code, first.content))
+        self.assertEqual(replayed['Content-Type'], first['Content-Type'])
+        self.assertEqual(replayed['Idempotent-Replayed'], 'true')
+        (_, stored), kwargs = cache_set.call_args
+        self.assertEqual(pickle.loads(pickle.dumps(stored)), (first.status_code, (('Content-Type', first['Content-Type']),), first.content))
+        self.assertLessEqual(kwargs['ttl'], 3600)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(add_plan().content, first.content)
+        self.assertEqual(Plan.objects.filter(business=self.business, name='Yearly').count(), 1)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentRenewalTests(BusinessFixture, TransactionTestCase):
+    threads = 8
+
+    def renew_concurrently(self, count, **kwargs):
+        subscriber = self.subscriber
+
+        def worker(i):
+            try:
+                return renew_subscription(self.business, self.owner, subscriber.id, plan=self.plan, **kwargs).transaction.id
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            return list(pool.map(worker, range(count)))
+
+    def setUp(self):
+        super().setUp()
+        self.subscriber = Subscriber.objects.create(name='Ann', business=self.business, email='ann@bizzlers.local')
+
+    def test_concurrent_renewals_chain_without_overlapping(self):
+        self.renew_concurrently(40)
+
+        periods = list(
+            Subscription.objects.filter(subscriber=self.subscriber).order_by('plan_start_date', 'id')
+            .values_list('plan_start_date', 'plan_end_date')
+        )
+        self.assertEqual(len(periods), 40)
+        for previous, current in zip(periods, periods[1:]):
+            self.assertEqual(current[0], previous[1])
+
+    def test_concurrent_retries_sharing_a_key_charge_once(self):
+        transactions = self.renew_concurrently(self.threads, idempotency_key='renew-ann')
+
+        self.assertEqual(len(set(transactions)), 1)
+        self.assertEqual(Transaction.objects.filter(business=self.business).count(), 1)
+
+
+class QueryCountTests(BusinessAPITestCase):
+    """Every route of business.urls takes a fixed number of queries however many rows it touches."""
+
+    def setUp(self):
+        super().setUp()
+        today = timezone.now().date()
+        for i in range(3):
+            subscriber = Subscriber.objects.create(name=f'Sub {i}', business=self.business, email=f'sub{i}@bizzlers.local')
+            for months in range(2):
+                start = today - timedelta(days=30 * (1 - months))
+                transaction = Transaction.objects.create(plan=self.plan, amount=10, conducted_by=self.owner, business=self.business)
+                Subscription.objects.create(
+                    subscriber=subscriber, plan=self.plan, plan_start_date=start, plan_end_date=start + timedelta(days=30),
+                    transaction=transaction, active=months == 1,
+                )
+        self.subscriber = subscriber
+        rebuild_rollups([self.business.id])
+        # fill the user, membership and plan caches
+        self.client.get(reverse('list-plans'))
+
+    def assertQueries(self, count, method, name, data=None, **kwargs):
+        with self.assertNumQueries(count):
+            response = getattr(self.client, method)(reverse(name), data, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400)
+        return response
+
+    def test_create_business(self):
+        self.assertQueries(3, 'post', 'create-business', {'name': 'Shop', 'type': Business.SUBSCRIPTION_BASED}, format='json')
+
+    def test_invite(self):
+        self.assertQueries(4, 'post', 'invite-to-business', {'email': 'new@bizzlers.local', 'role': 'STAFF'}, format='json')
+
+    def test_invite_action(self):
+        invitee = User.objects.create_user(email='invitee@bizzlers.local', password='secret-pass-1')
+        invitation = Invitation.objects.create(email=invitee.email, business=self.business, role='STAFF', invited_by=self.owner)
+        self.client = self.client_for(invitee)
+        # fill the user cache
+        self.client.post(reverse('create-business'), {}, format='json')
+        self.assertQueries(7, 'post', 'invite-action', {'action': 'accept', 'invitation_id': invitation.id}, format='json')
+
+    def test_add_plan(self):
+        self.assertQueries(5, 'post', 'add-plan', {'name': 'Yearly', 'duration': 1, 'type': 'Y', 'price': 100}, format='json')
+
+    def test_get_plan(self):
+        self.assertQueries(0, 'get', 'get-plan', {'id': self.plan.id})
+
+    def test_list_plans(self):
+        self.assertQueries(0, 'get', 'list-plans')
+
+    def test_delete_plan(self):
+        plan = Plan.objects.create(name='Daily', duration_count=1, duration_unit=Plan.DAILY, price=1, added_by=self.owner, business=self.business)
+        self.assertQueries(6, 'delete', 'delete-plan', QUERY_STRING=f'id={plan.id}')
+
+    def test_add_subscriber(self):
+        self.assertQueries(11, 'post', 'add-subscriber', {'name': 'New', 'email': 'new@bizzlers.local', 'plan': self.plan.id}, format='json')
+
+    def test_import_subscribers(self):
+        rows = [{'name': f'Imported {i}', 'email': f'imported{i}@bizzlers.local', 'plan': self.plan.id} for i in range(3)]
+        self.assertQueries(13, 'post', 'import-subscribers', rows, format='json')
+
+    def test_import_subscribers_from_csv(self):
+        upload = BytesIO(b'name,email,plan\n' + b''.join(f'Imported {i},imported{i}@bizzlers.local,{self.plan.id}\n'.encode() for i in range(3)))
+        upload.name = 'subscribers.csv'
+        self.assertQueries(13, 'post', 'import-subscribers', {'file': upload}, format='multipart')
+
+    def test_renew_subscription(self):
+        self.assertQueries(12, 'post', 'renew-subscription', {'subscriber': self.subscriber.id, 'plan': self.plan.id}, format='json')
+
+    def test_bulk_renew_subscriptions(self):
+        subscribers = list(Subscriber.objects.filter(business=self.business).values_list('id', flat=True))
+        self.assertQueries(11, 'post', 'bulk-renew-subscriptions', {'subscribers': subscribers, 'plan': self.plan.id}, format='json')
+
+    def test_get_subscriber(self):
+        self.assertQueries(2, 'get', 'get-subscriber', {'id': self.subscriber.id})
+
+    def test_get_subscriber_history(self):
+        self.assertQueries(3, 'get', 'get-subscriber', {'id': self.subscriber.id, 'history': 'true'})
+
+    def test_list_subscribers(self):
+        self.assertQueries(2, 'get', 'list-subscribers')
+
+    def test_list_inactive_subscribers(self):
+        today = timezone.now().date()
+        for i in range(3):
+            lapsed = Subscriber.objects.create(name=f'Lapsed {i}', business=self.business, email=f'lapsed{i}@bizzlers.local')
+            Subscription.objects.create(
+                subscriber=lapsed, plan=self.plan, plan_start_date=today - timedelta(days=60), plan_end_date=today - timedelta(days=30),
+                active=False,
+            )
+        response = self.assertQueries(2, 'get', 'list-subscribers', {'active': 'false'})
+        self.assertEqual(len(response.json()['data']['subscribers']), 3)
+
+    def test_subscription_dashboard(self):
+        self.assertQueries(2, 'get', 'subscription-dashboard')
+
+    def test_subscription_analytics(self):
+        self.assertQueries(8, 'get', 'subscription-analytics')
+
+    def test_export_transactions(self):
+        self.assertQueries(1, 'get', 'export-transactions')
+
+
+
+@skipUnless('replica' in settings.DATABASES, 'needs a replica alias, e.g. DJANGO_ENV=replicas')
+class ReplicaRoutingTests(BusinessFixture, TransactionTestCase):
+    # the replica mirrors default in tests, so it only sees committed rows
+    databases = {'default', 'replica'} if 'replica' in settings.DATABASES else {'default'}
+
+    def setUp(self):
+        super().setUp()
+        pinned_users.delete(self.owner.id)
+        # fill the user cache, whose misses always read the primary
+        self.client.get(reverse('list-plans'))
+
+    def request(self, method, name, data=None):
+        with CaptureQueriesContext(connections['default']) as primary, CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(reverse(name), data, format='json' if method == 'post' else None)
+        self.assertLess(response.status_code, 400)
+        return response, len(primary), len(replica)
+
+    def test_reads_go_to_the_replica(self):
+        Subscriber.objects.create(name='Ann', business=self.business, email='ann@bizzlers.local')
+
+        response, primary, replica = self.request('get', 'list-subscribers')
+
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        self.assertEqual(len(response.json()['data']['subscribers']), 1)
+
+    def test_a_user_who_wrote_reads_from_the_primary(self):
+        response, _, replica = self.request('post', 'add-subscriber', {'name': 'Ann', 'email': 'ann@bizzlers.local', 'plan': self.plan.id})
+        self.assertEqual(replica, 0)
+
+        subscriber_id = response.json()['data']['subscriber_details']['id']
+        response, primary, replica = self.request('get', 'get-subscriber', {'id': subscriber_id})
+
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
@@ -1,7 +1,7 @@
 from django.urls import path
 
 from business.apis.api import CreateBusinessAndMapping, InviteToBusinessAPIView, AcceptDeclineInviteAPIView
-from business.apis.subscription_api import add_plan,get_plan, delete_plan, add_subscriber, get_subscriber, renew_subscription
+from business.apis.subscription_api import add_plan,get_plan, delete_plan, add_subscriber, get_subscriber, renew_subscription, import_subscribers, list_subscribers, subscription_dashboard, subscription_analytics, export_transactions, list_plans, bulk_renew_subscriptions
 
 urlpatterns = [
     path('create-business/', CreateBusinessAndMapping.as_view(), name='create-business'),
@@ -11,9 +11,16 @@ urlpatterns = [
     # subscriber based business apis
     path('subscribers/add-plan/', add_plan, name='add-plan'),
     path('subscribers/get-plan/', get_plan, name='get-plan'),
+    path('subscribers/list-plans/', list_plans, name='list-plans'),
     path('subscribers/delete-plan/', delete_plan, name='delete-plan'),
     path('subscribers/add--subscription/', add_subscriber, name='add-subscriber'),
+    path('subscribers/import/', import_subscribers, name='import-subscribers'),
     path('subscribers/renew-subscription/', renew_subscription, name='renew-subscription'),
-    path('subscribers/get-subscriber/', get_subscriber, name='get-subscriber')
+    path('subscribers/bulk-renew/', bulk_renew_subscriptions, name='bulk-renew-subscriptions'),
+    path('subscribers/get-subscriber/', get_subscriber, name='get-subscriber'),
+    path('subscribers/list-subscribers/', list_subscribers, name='list-subscribers'),
+    path('subscribers/dashboard/', subscription_dashboard, name='subscription-dashboard'),
+    path('subscribers/analytics/', subscription_analytics, name='subscription-analytics'),
+    path('transactions/export/', export_transactions, name='export-transactions')
     
 ]
@@ -49,6 +49,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'middlewares.instrumentation.InstrumentationMiddleware',
+    'middlewares.replicas.ReplicaRoutingMiddleware',
     'middlewares.headers.HeadersMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +58,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'middlewares.idempotency.IdempotencyMiddleware',
 ]
 
 ROOT_URLCONF = 'bizzlers.urls'
@@ -116,7 +119,16 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'utils.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # use utils.renderers.EnvelopeJSONRenderer to serialize with the stdlib json module
+    'DEFAULT_RENDERER_CLASSES': (
+        'utils.renderers.FastEnvelopeJSONRenderer',
     ),
 }
 
@@ -145,4 +157,91 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': timedelta(minutes=5),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
-}
\ No newline at end of file
+}
+
+# REDIS_URL (e.g. redis://10.0.0.4:6379/0) makes the default cache shared by all workers;
+# without it every process has a cache of its own
+if os.getenv('REDIS_URL'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': os.getenv('REDIS_URL')}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# (user, business) -> role used by the business permission classes, kept in the CACHES alias
+# with a local copy per process so UserBusinessMapping/Business saves reach every worker; 0 disables
+# it. Writes sending no signals (QuerySet.update, raw SQL) must call business.context.forget_membership
+# or wait for the TTL.
+BUSINESS_CONTEXT_CACHE_ALIAS = os.getenv('BUSINESS_CONTEXT_CACHE_ALIAS', 'default')
+BUSINESS_CONTEXT_CACHE_TTL = int(os.getenv('BUSINESS_CONTEXT_CACHE_TTL', 30))
+BUSINESS_CONTEXT_CACHE_SIZE = 10000
+
+# bearer token required by the /metrics/ endpoint, open when unset
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# token user_id -> User used by CachedJWTAuthentication, kept in the CACHES alias with a local
+# copy per process so User saves reach every worker; 0 disables it. Writes sending no signals
+# (QuerySet.update, raw SQL) must call users.authentication.forget_user or wait for the TTL.
+JWT_USER_CACHE_ALIAS = os.getenv('JWT_USER_CACHE_ALIAS', 'default')
+JWT_USER_CACHE_TTL = int(os.getenv('JWT_USER_CACHE_TTL', 30))
+JWT_USER_CACHE_SIZE = 10000
+
+# embed (business, role, type) memberships in issued tokens so permission checks need no
+# queries; revoked memberships then stay valid until the access token expires
+JWT_EMBED_BUSINESS_MEMBERSHIPS = str_to_bool(os.getenv('JWT_EMBED_BUSINESS_MEMBERSHIPS', 'false'))
+
+# write endpoints whose first successful response is stored and replayed for requests
+# repeating its Idempotency-Key header, kept for IDEMPOTENCY_KEY_TTL seconds
+IDEMPOTENT_URL_NAMES = [
+    'add-plan', 'add-subscriber', 'renew-subscription', 'bulk-renew-subscriptions', 'invite-to-business',
+    'async-add-subscriber', 'async-renew-subscription',
+]
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 86400))
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+# CACHES alias shared by all workers for replay lookups, a process-local LRU when unset
+IDEMPOTENCY_CACHE_ALIAS = os.getenv('IDEMPOTENCY_CACHE_ALIAS')
+IDEMPOTENCY_CACHE_SIZE = 10000
+
+# delivery backend for send_expiry_notifications: ConsoleBackend, FileBackend (writes JSON lines
+# to EXPIRY_NOTIFICATION_FILE_PATH) or EmailBackend (Django's EMAIL_* settings)
+EXPIRY_NOTIFICATION_BACKEND = os.getenv('EXPIRY_NOTIFICATION_BACKEND', 'business.services.notifications.ConsoleBackend')
+EXPIRY_NOTIFICATION_FILE_PATH = os.getenv('EXPIRY_NOTIFICATION_FILE_PATH', 'expiry_notifications.jsonl')
+
+# per-business plan catalog used by plan lookups and list-plans, kept in the CACHES alias with a
+# local copy per process; plan changes reach every worker sharing the alias on their next request.
+# An empty PLAN_CATALOG_CACHE_ALIAS keeps it process-local, other workers then wait for the TTL.
+PLAN_CATALOG_CACHE_ALIAS = os.getenv('PLAN_CATALOG_CACHE_ALIAS', 'default')
+PLAN_CATALOG_CACHE_TTL = int(os.getenv('PLAN_CATALOG_CACHE_TTL', 300))
+PLAN_CATALOG_CACHE_SIZE = 1000
+
+# reads of GET requests go to the read replicas in DATABASES (every alias but default unless
+# DATABASE_REPLICAS lists them); a user who wrote reads from the primary for REPLICA_STICKY_SECONDS.
+# Set REPLICA_PIN_CACHE_ALIAS to a shared cache when running more than one worker process.
+DATABASE_ROUTERS = ['utils.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+REPLICA_PIN_CACHE_ALIAS = os.getenv('REPLICA_PIN_CACHE_ALIAS')
+REPLICA_PIN_CACHE_SIZE = 10000
+
+# connection reuse for the MySQL databases of local and prod: connections are kept for
+# DB_CONN_MAX_AGE seconds (0 closes them after every request) and checked before reuse.
+# DB_POOL_SIZE > 0 switches to utils.backends.mysql, which returns connections to an
+# in-process pool when a request ends; use it under ASGI, where requests run in threads
+# of their own and persistent connections are never reused.
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 60))
+DB_CONN_HEALTH_CHECKS = str_to_bool(os.getenv('DB_CONN_HEALTH_CHECKS', 'true'))
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 0))
+DB_POOL_MAX_IDLE = int(os.getenv('DB_POOL_MAX_IDLE', 300))
+
+
+def mysql_database(name, user, password, host, port):
+    database = {
+        'ENGINE': 'django.db.backends.mysql',
+        'NAME': name,
+        'USER': user,
+        'PASSWORD': password,
+        'HOST': host,
+        'PORT': port,
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+    }
+    if DB_POOL_SIZE:
+        database.update(ENGINE='utils.backends.mysql', CONN_MAX_AGE=0, POOL_SIZE=DB_POOL_SIZE, POOL_MAX_IDLE=DB_POOL_MAX_IDLE)
+    return database
@@ -2,15 +2,12 @@ from config.settings.base import *
 
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': os.getenv('NAME'),
-        'USER': os.getenv('USER'),
-        'PASSWORD': os.getenv('PASSWORD'),
-        'HOST': os.getenv('HOST'),
-        'PORT': os.getenv('PORT'),
-    }
+    'default': mysql_database(os.getenv('NAME'), os.getenv('USER'), os.getenv('PASSWORD'), os.getenv('HOST'), os.getenv('PORT')),
 }
 
+# read replicas of default, e.g. REPLICA_HOSTS=10.0.0.2,10.0.0.3, routed by utils.routers.ReplicaRouter
+for number, host in enumerate(filter(None, os.getenv('REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+
 DEBUG = str_to_bool(os.getenv('DEBUG'))
 
@@ -0,0 +1,22 @@
+from config.settings.base import *
+
+# Production (DJANGO_ENV=prod): everything comes from the environment or .env.prod.
+# Connection reuse is tuned with the DB_CONN_* and DB_POOL_* variables of base.
+
+SECRET_KEY = os.environ['SECRET_KEY']
+# base signs tokens with its development key, sign them with the production one instead
+SIMPLE_JWT = {**SIMPLE_JWT, 'SIGNING_KEY': SECRET_KEY}
+
+DEBUG = str_to_bool(os.getenv('DEBUG', 'false'))
+
+ALLOWED_HOSTS = [host.strip() for host in os.getenv('ALLOWED_HOSTS', '*').split(',') if host.strip()]
+
+DATABASES = {
+    'default': mysql_database(
+        os.getenv('DB_NAME'), os.getenv('DB_USER'), os.getenv('DB_PASSWORD'), os.getenv('DB_HOST'), os.getenv('DB_PORT', '3306')
+    ),
+}
+
+# read replicas of default, e.g. REPLICA_HOSTS=10.0.0.2,10.0.0.3, routed by utils.routers.ReplicaRouter
+for number, host in enumerate(filter(None, os.getenv('REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
@@ -0,0 +1,18 @@
+from config.settings.base import *
+
+# Local setup for checking read replica routing without MySQL replication (DJANGO_ENV=replicas):
+# two SQLite files, migrated with `migrate` and `migrate --database replica`. Rows written to the
+# primary are not copied, which makes it visible where each read went; see check_replica_routing.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR.parent / 'db.primary.sqlite3',
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR.parent / 'db.replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DEBUG = True
@@ -1,47 +1,51 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from rest_framework.response import Response
-from rest_framework.renderers import JSONRenderer
 from django.http import JsonResponse
 
+from middlewares.idempotency import ReplayedResponse
+from utils.async_api import APIResponse
+
 
 class HeadersMiddleware:
+    """
+    Answers CORS preflight requests and adds CORS headers to API responses. The
+    status_code/message/data envelope is applied by utils.renderers.EnvelopeJSONRenderer.
+    Supports both sync and async requests so ASGI views are not run through a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         if request.method == 'OPTIONS':
-            response = JsonResponse({})
+            return self.preflight()
+        
+        return self.add_headers(self.get_response(request))
+
+    async def __acall__(self, request):
+        if request.method == 'OPTIONS':
+            return self.preflight()
+
+        return self.add_headers(await self.get_response(request))
+
+    def preflight(self):
+        response = JsonResponse({})
+        response["Access-Control-Allow-Origin"] = "*"
+        response['Access-Control-Allow-Methods'] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
+        response["Access-Control-Allow-Headers"] = "*"
+        return response
+
+    def add_headers(self, response):
+        if isinstance(response, (Response, APIResponse, ReplayedResponse)):
             response["Access-Control-Allow-Origin"] = "*"
-            response['Access-Control-Allow-Methods'] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
+            response["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
             response["Access-Control-Allow-Headers"] = "*"
-            return response
-        
-        response = self.get_response(request)
-        if isinstance(response, Response):
-            if 'status_code' in response.data:
-                status_code = response.data['status_code']
-            else:
-                status_code = 1 if 200 <= response.status_code < 300 else 0
-                
-            if 'message' in response.data:
-                message = response.data['message']
-                response.data.pop('message', None)
-            else:
-                message = 'success' if status_code==1 else 'failed'
-            data = response.data
-            standardized_response = {
-                "status_code": status_code,
-                "message": message,
-                "data": data
-            }
-            
-            res=Response(standardized_response, status=response.status_code)
-            res.accepted_renderer = JSONRenderer()
-            res.accepted_media_type = "application/json"
-            res.renderer_context = {}
-            res.render()
-
-            res["Access-Control-Allow-Origin"] = "*"
-            res["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
-            res["Access-Control-Allow-Headers"] = "*"
-            return res
         
-        return response
\ No newline at end of file
+        return response
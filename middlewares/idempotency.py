@@ -0,0 +1,83 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import status
+
+from business.services import idempotency
+from users.authentication import user_id_from_request
+from utils.async_api import APIResponse
+
+HEADER = 'Idempotency-Key'
+
+
+class ReplayedResponse(HttpResponse):
+    """The stored first response (an idempotency.StoredResponse) for a repeated Idempotency-Key."""
+
+    def __init__(self, stored):
+        super().__init__(stored.content, status=stored.status_code, headers=dict(stored.headers))
+        self['Idempotent-Replayed'] = 'true'
+
+
+class IdempotencyMiddleware:
+    """
+    Makes the write endpoints named in settings.IDEMPOTENT_URL_NAMES safe to retry. The first
+    successful response to a request carrying an Idempotency-Key header is stored per user
+    and key (business.services.idempotency) and replayed for repeats of the same request, so
+    a retry costs one lookup instead of another write. Reusing a key for a different request
+    is rejected, as is a repeat that arrives while the first request is still running.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.url_names = set(getattr(settings, 'IDEMPOTENT_URL_NAMES', ()))
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        response = self.get_response(request)
+        self.finish(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if getattr(request, '_idempotency_key', None) is not None:
+            await sync_to_async(self.finish)(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method != 'POST' or request.resolver_match.url_name not in self.url_names:
+            return None
+        key = request.headers.get(HEADER)
+        if not key:
+            return None
+        if len(key) > 64:
+            return APIResponse({"message": f"{HEADER} must be at most 64 characters."}, status=status.HTTP_400_BAD_REQUEST)
+        user_id = user_id_from_request(request)
+        if user_id is None:
+            return None
+
+        request_fingerprint = idempotency.fingerprint(request.method, request.path, request.body)
+        record = idempotency.begin(user_id, key, request_fingerprint)
+        if record is None:
+            request._idempotency_key = (user_id, key)
+            return None
+        if isinstance(record, idempotency.StoredResponse):
+            return ReplayedResponse(record)
+        if record.fingerprint != request_fingerprint:
+            return APIResponse({"message": f"{HEADER} was already used for a different request."}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return APIResponse({"message": "A request with this Idempotency-Key is still being processed."}, status=status.HTTP_409_CONFLICT)
+
+    def finish(self, request, response):
+        pending = getattr(request, '_idempotency_key', None)
+        if pending is None:
+            return
+        user_id, key = pending
+        if status.is_success(response.status_code) and not response.streaming:
+            idempotency.complete(user_id, key, response.status_code, response.content, response.get('Content-Type', ''))
+        else:
+            idempotency.release(user_id, key)
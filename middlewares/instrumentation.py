@@ -0,0 +1,94 @@
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+# method label values; anything else a client sends is recorded as OTHER so it cannot add series
+METHODS = {'GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+
+class QueryRecorder:
+    """connection.execute_wrapper hook that times every statement and spots repeats."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            if not sql.startswith(TRANSACTION_STATEMENTS):
+                self.statements[(sql, repr(params))] += 1
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+
+class InstrumentationMiddleware:
+    """
+    Records wall time, SQL time, query count, repeated queries and response size for every
+    request. Adds a Server-Timing header and feeds the per URL name histograms served by
+    utils.metrics.metrics_view. Under ASGI the ORM runs in a worker thread, so only wall
+    time and size are recorded for async requests.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            # every alias, so reads sent to replicas are counted too
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, recorder)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, None)
+        return response
+
+    def record(self, request, response, duration, recorder):
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else 'unmatched'
+        size = len(response.content) if not response.streaming else 0
+        method = request.method if request.method in METHODS else 'OTHER'
+
+        metrics.request_duration.observe(duration, view=view, method=method)
+        metrics.response_size.observe(size, view=view)
+        timings = [f'total;dur={duration * 1000:.1f}']
+
+        if recorder is not None:
+            metrics.request_db_duration.observe(recorder.duration, view=view)
+            metrics.request_queries.observe(recorder.count, view=view)
+            timings.append(f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"')
+            if recorder.duplicates:
+                metrics.duplicate_queries.inc(recorder.duplicates, view=view)
+                logger.warning('%s ran %d duplicate queries', view, recorder.duplicates)
+
+        response['Server-Timing'] = ', '.join(timings)
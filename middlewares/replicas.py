@@ -0,0 +1,68 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from users.authentication import user_id_from_request
+from utils.cache import cache_backend
+from utils.routers import Routing, choose_replica, current_routing
+
+# user_id -> True while that user's reads must stay on the primary after a write
+pinned_users = cache_backend(
+    getattr(settings, 'REPLICA_PIN_CACHE_ALIAS', None),
+    maxsize=getattr(settings, 'REPLICA_PIN_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'REPLICA_STICKY_SECONDS', 5),
+)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets utils.routers.ReplicaRouter send the reads of GET/HEAD/OPTIONS requests to a read
+    replica. Writes, and every read of a request after its first write, go to the primary.
+    A user who wrote is pinned to the primary for REPLICA_STICKY_SECONDS, so reading back
+    what they just created never hits a lagging replica.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        routing = self.routing(request)
+        token = current_routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        self.finish(request, routing)
+        return response
+
+    async def __acall__(self, request):
+        routing = self.routing(request)
+        token = current_routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        self.finish(request, routing)
+        return response
+
+    def routing(self, request):
+        replica = choose_replica()
+        if replica is None or request.method not in SAFE_METHODS:
+            return Routing()
+        user_id = user_id_from_request(request)
+        if user_id is not None and pinned_users.get(user_id):
+            return Routing()
+        return Routing(replica)
+
+    def finish(self, request, routing):
+        if routing.wrote:
+            user_id = user_id_from_request(request)
+            if user_id is not None:
+                pinned_users.set(user_id, True)
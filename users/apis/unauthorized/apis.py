@@ -2,11 +2,10 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import login
-from django.shortcuts import get_object_or_404
 from django.db import IntegrityError
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from users.serializers import LoginSerializer
+from users.tokens import tokens_for_user
 from users.models import User
 from business.models.models import Invitation
 
@@ -14,9 +13,7 @@ class LoginAPIView(APIView):
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.validated_data.get('user')
-            user=get_object_or_404(User, id=user)
-            login(request, user)
+            login(request, serializer.user)
             return Response(serializer.validated_data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -33,24 +30,26 @@ class SignupAPIView(APIView):
         except IntegrityError:
             return Response({"error": "User with this email already exists"}, status=status.HTTP_400_BAD_REQUEST)
         
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
         access_token = str(refresh.access_token)
         refresh_token = str(refresh)
 
-        pending_invitations = Invitation.objects.filter(email=email, status=Invitation.PENDING)
+        pending_invitations = Invitation.objects.filter(email=email, status=Invitation.PENDING).values(
+            'id', 'role', 'status', 'business_id', 'business__name', 'invited_by_id', 'invited_by__email'
+        )
         pending_invitations_data = []
         for invitation in pending_invitations:
             pending_invitations_data.append({
-                "id": invitation.id,
+                "id": invitation['id'],
                 "business": {
-                    "id": invitation.business.id,
-                    "name": invitation.business.name
+                    "id": invitation['business_id'],
+                    "name": invitation['business__name']
                 },
-                "role": invitation.role,
-                "status": invitation.status,
+                "role": invitation['role'],
+                "status": invitation['status'],
                 "invited_by": {
-                    "id": invitation.invited_by.id,
-                    "email": invitation.invited_by.email
+                    "id": invitation['invited_by_id'],
+                    "email": invitation['invited_by__email']
                 }
             })
 
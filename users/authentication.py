@@ -0,0 +1,90 @@
+import copy
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from utils.cache import cache_backend
+
+# user_id claim -> User, invalidated in every process by users.signals on User save/delete
+user_cache = cache_backend(
+    getattr(settings, 'JWT_USER_CACHE_ALIAS', None),
+    maxsize=getattr(settings, 'JWT_USER_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'JWT_USER_CACHE_TTL', 30),
+    layered=True,
+)
+
+
+def cache_key(user_id):
+    return f'jwt-user:{user_id}'
+
+
+def user_id_from_token(validated_token):
+    try:
+        return str(validated_token[api_settings.USER_ID_CLAIM])
+    except KeyError as e:
+        raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+
+def user_id_from_request(request):
+    """
+    The user_id claim of the request's valid Bearer token, or None, for middleware that runs
+    before DRF authenticates the request. Remembered on the request.
+    """
+    if not hasattr(request, '_token_user_id'):
+        authentication = JWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header else None
+        try:
+            request._token_user_id = user_id_from_token(authentication.get_validated_token(raw_token)) if raw_token else None
+        except (InvalidToken, TokenError):
+            # the view answers with 401
+            request._token_user_id = None
+    return request._token_user_id
+
+
+def cached_user(user_id):
+    user = user_cache.get(cache_key(user_id))
+    # each request gets its own copy so per-request mutations never leak between threads
+    return copy.copy(user) if user is not None else None
+
+
+def cache_user(user_id, user):
+    user_cache.set(cache_key(user_id), copy.copy(user))
+
+
+def forget_user(user_id):
+    """Drop a cached user, for writes that send no signals such as QuerySet.update()."""
+    user_cache.delete(cache_key(user_id))
+
+
+def check_user(user, validated_token):
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    if getattr(api_settings, 'CHECK_REVOKE_TOKEN', False):
+        from rest_framework_simplejwt.utils import get_md5_hash_password
+        if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user from a local copy kept per process,
+    checked against the shared user cache, instead of loading the User row on every request.
+    """
+
+    def get_user(self, validated_token):
+        user_id = user_id_from_token(validated_token)
+        user = cached_user(user_id)
+        if user is None:
+            # read from the primary: a user who just signed up may not be on a read replica yet
+            try:
+                user = self.user_model.objects.db_manager(DEFAULT_DB_ALIAS).get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache_user(user_id, user)
+        return check_user(user, validated_token)
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:30
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_mappings(apps, schema_editor):
+    # keep one mapping per user and business, preferring the OWNER role like business.context does
+    UserBusinessMapping = apps.get_model('users', 'UserBusinessMapping')
+    db_alias = schema_editor.connection.alias
+    duplicates = UserBusinessMapping.objects.using(db_alias).exclude(business__isnull=True).values('user_id', 'business_id').annotate(rows=Count('id')).filter(rows__gt=1)
+    for duplicate in duplicates:
+        mappings = UserBusinessMapping.objects.using(db_alias).filter(user_id=duplicate['user_id'], business_id=duplicate['business_id']).order_by('role', 'id')
+        UserBusinessMapping.objects.using(db_alias).filter(id__in=[mapping.id for mapping in mappings[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_userbusinessmapping_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_mappings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userbusinessmapping',
+            constraint=models.UniqueConstraint(fields=('user', 'business'), name='unique_user_business_mapping'),
+        ),
+    ]
@@ -43,5 +43,8 @@ class UserBusinessMapping(Auditable,models.Model):
     
     class Meta:
         db_table = 'user_business_mapping'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'business'], name='unique_user_business_mapping'),
+        ]
     
     
\ No newline at end of file
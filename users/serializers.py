@@ -1,8 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from users.models import UserBusinessMapping
+from users.tokens import tokens_for_user
 
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -19,16 +19,22 @@ class LoginSerializer(serializers.Serializer):
         if not user.is_active:
             raise serializers.ValidationError('User account is disabled')
 
-        refresh = RefreshToken.for_user(user)
+        self.user = user
         
-        businesses = UserBusinessMapping.objects.filter(user=user)
+        businesses = UserBusinessMapping.objects.filter(
+            user=user, business__isnull=False
+        ).values('business_id', 'business__name', 'business__type', 'role')
         business_info = []
         for business in businesses:
             business_info.append({
-                'business_id': business.business.id,
-                'business_name': business.business.name,
-                'role': business.role,
+                'business_id': business['business_id'],
+                'business_name': business['business__name'],
+                'role': business['role'],
             })
+        
+        refresh = tokens_for_user(user, [
+            (business['business_id'], business['role'], business['business__type']) for business in businesses
+        ])
 
         return {
             'access': str(refresh.access_token),
@@ -18,3 +18,14 @@
 #             UserBusinessMapping.objects.create(user=instance, business=business, role=role)
 #             invitation.status = Invitation.ACCEPTED
 #             invitation.save()
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from users.authentication import forget_user
+from users.models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(instance, **kwargs):
+    forget_user(instance.pk)
@@ -1,3 +1,67 @@
+from unittest import mock
+
+from django.core.cache import caches
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from business.models.models import Business, Invitation
+from users.authentication import CachedJWTAuthentication, user_cache
+from users.models import User, UserBusinessMapping
+from utils.cache import LayeredCache
+
+
+class QueryCountTests(TestCase):
+    """Login and signup take a fixed number of queries however many businesses or invitations there are."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(email='owner@bizzlers.local', password='secret-pass-1')
+        self.businesses = [
+            Business.objects.create(name=f'Gym {i}', owner=self.owner, type=Business.SUBSCRIPTION_BASED) for i in range(3)
+        ]
+
+    def test_login(self):
+        for business in self.businesses:
+            UserBusinessMapping.objects.create(user=self.owner, business=business, role='OWNER')
+
+        # the user, their businesses, then django.contrib.auth.login's session and last_login writes
+        with self.assertNumQueries(10):
+            response = self.client.post(reverse('login'), {'email': self.owner.email, 'password': 'secret-pass-1'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['data']['businesses']), 3)
+
+    def test_signup(self):
+        for business in self.businesses:
+            Invitation.objects.create(email='staff@bizzlers.local', business=business, role='STAFF', invited_by=self.owner)
+
+        with self.assertNumQueries(2):
+            response = self.client.post(reverse('signup'), {'email': 'staff@bizzlers.local', 'password': 'secret-pass-1'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['data']['invitations']), 3)
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.user = User.objects.create_user(email='staff@bizzlers.local', password='secret-pass-1')
+        self.token = RefreshToken.for_user(self.user).access_token
+
+    def test_user_changes_reach_other_processes(self):
+        # another worker: its own local copies, the same shared cache
+        other = LayeredCache(user_cache.alias, maxsize=10, ttl=60)
+        with mock.patch('users.authentication.user_cache', other):
+            self.assertEqual(CachedJWTAuthentication().get_user(self.token), self.user)
+            with self.assertNumQueries(0):
+                CachedJWTAuthentication().get_user(self.token)
+
+        self.user.is_active = False
+        self.user.save()
 
-# Create your tests here.
+        with mock.patch('users.authentication.user_cache', other), self.assertRaises(AuthenticationFailed):
+            CachedJWTAuthentication().get_user(self.token)
@@ -0,0 +1,18 @@
+from django.conf import settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+BUSINESSES_CLAIM = 'businesses'
+
+
+def tokens_for_user(user, memberships=()):
+    """
+    Refresh token for `user`. With JWT_EMBED_BUSINESS_MEMBERSHIPS enabled, `memberships`
+    ((business_id, role, business type) tuples) are embedded as a claim that is copied to
+    the access token, so the business permission classes can authorize without queries.
+    """
+    refresh = RefreshToken.for_user(user)
+    if getattr(settings, 'JWT_EMBED_BUSINESS_MEMBERSHIPS', False):
+        refresh[BUSINESSES_CLAIM] = {
+            str(business_id): [role, business_type] for business_id, role, business_type in memberships
+        }
+    return refresh
@@ -0,0 +1,102 @@
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from users.authentication import cache_user, cached_user, check_user, user_id_from_token
+from utils.renderers import envelope
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
+
+class APIResponse(HttpResponse):
+    """JSON response in the standard envelope, returned by async views that bypass DRF."""
+
+    def __init__(self, data=None, status=status.HTTP_200_OK):
+        payload = envelope(data, status)
+        if orjson is not None:
+            content = orjson.dumps(payload, default=JSONEncoder().default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        else:
+            content = json.dumps(payload, cls=JSONEncoder)
+        super().__init__(content, status=status, content_type='application/json')
+
+
+def parse_body(body):
+    if not body:
+        return {}
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+async def aauthenticate(request):
+    """
+    Resolve the user and validated token of a `Bearer` JWT, going to the database through
+    the async ORM only on a user cache miss. Returns (None, None) without credentials.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None, None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None, None
+
+    validated_token = authentication.get_validated_token(raw_token)
+    user_id = user_id_from_token(validated_token)
+    user = cached_user(user_id)
+    if user is None:
+        User = get_user_model()
+        try:
+            user = await User.objects.db_manager(DEFAULT_DB_ALIAS).aget(**{api_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        cache_user(user_id, user)
+    return check_user(user, validated_token), validated_token
+
+
+def async_api_view(methods, permission_classes=()):
+    """
+    Async counterpart of DRF's @api_view + @permission_classes for views served under ASGI:
+    authenticates the JWT, parses the JSON body into `request.data` once and awaits each
+    permission's `ahas_permission`. Authentication is always required.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return APIResponse({"detail": f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+            try:
+                request.user, request.auth = await aauthenticate(request)
+            except (InvalidToken, AuthenticationFailed) as e:
+                return APIResponse(e.detail, status=status.HTTP_401_UNAUTHORIZED)
+            except TokenError as e:
+                return APIResponse({"detail": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+            if request.user is None:
+                return APIResponse({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
+
+            try:
+                request.data = parse_body(request.body) if request.method in ('POST', 'PUT', 'PATCH') else {}
+            except ValueError as e:
+                return APIResponse({"detail": f"JSON parse error - {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+            for permission_class in permission_classes:
+                if not await permission_class().ahas_permission(request, view):
+                    return APIResponse({"detail": "You do not have permission to perform this action."}, status=status.HTTP_403_FORBIDDEN)
+
+            return await view(request, *args, **kwargs)
+
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
@@ -0,0 +1,14 @@
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from utils.pool import PooledDatabaseWrapper
+
+
+class DatabaseWrapper(PooledDatabaseWrapper, MySQLDatabaseWrapper):
+    """django.db.backends.mysql with an in-process connection pool, ENGINE 'utils.backends.mysql'."""
+
+    def ping(self, connection):
+        try:
+            connection.ping()
+            return True
+        except Exception:
+            return False
@@ -0,0 +1,136 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache whose entries also expire after `ttl` seconds, or after the
+    shorter ttl given to set().
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LocalCache:
+    """TTLCache behind the same interface as DjangoCache, private to this process."""
+
+    def __init__(self, maxsize, ttl):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.cache.set(key, value, ttl)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+
+class DjangoCache:
+    """One of the CACHES aliases, shared by every process using it."""
+
+    def __init__(self, alias, ttl):
+        self.alias = alias
+        self.ttl = ttl
+
+    def get(self, key):
+        return caches[self.alias].get(key)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl > 0:
+            caches[self.alias].set(key, value, timeout=ttl)
+
+    def delete(self, key):
+        caches[self.alias].delete(key)
+
+
+class LayeredCache:
+    """
+    A process-local LRU in front of one of the CACHES aliases. Values are stored in the shared
+    cache under a version of their key, which delete() drops: every process then misses its
+    local copy on the next get. A get costs one shared cache lookup of the version, plus one
+    of the value when the process has no local copy of that version.
+    """
+
+    def __init__(self, alias, maxsize, ttl):
+        self.alias = alias
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        version = caches[self.alias].get(f'{key}:version')
+        if version is None:
+            return None
+        value = self.local.get((key, version))
+        if value is None:
+            value = caches[self.alias].get(f'{key}:{version}')
+            if value is not None:
+                self.local.set((key, version), value)
+        return value
+
+    def set(self, key, value):
+        cache = caches[self.alias]
+        cache.add(f'{key}:version', uuid.uuid4().hex, timeout=self.ttl)
+        version = cache.get(f'{key}:version')
+        if version is None:
+            return
+        cache.set(f'{key}:{version}', value, timeout=self.ttl)
+        self.local.set((key, version), value)
+
+    def delete(self, key):
+        caches[self.alias].delete(f'{key}:version')
+
+
+def cache_backend(alias, maxsize, ttl, layered=False):
+    """
+    A DjangoCache on `alias` when one is configured, or a LayeredCache keeping local copies
+    of its entries with `layered`; a process-local LocalCache otherwise.
+    """
+    if alias and layered:
+        return LayeredCache(alias, maxsize, ttl)
+    if alias:
+        return DjangoCache(alias, ttl)
+    return LocalCache(maxsize, ttl)
@@ -1,5 +1,7 @@
 import re
+from calendar import monthrange
 from datetime import timedelta
+from functools import lru_cache
 from rest_framework.exceptions import ValidationError
 
 def validate_required_fields(required_fields, data):
@@ -9,18 +11,53 @@ def validate_required_fields(required_fields, data):
 
 
 def parse_duration(duration):
-    match = re.match(r'(\d+)\s*([DMY])', duration)
+    """Split a legacy duration string such as "3 M" into (3, "M")."""
+    match = re.match(r'(\d+)\s*([DMY])', duration or '')
     if not match:
         raise ValueError("Invalid duration format")
     
     value, unit = match.groups()
-    value = int(value)
-    
+    return int(value), unit
+
+
+@lru_cache(maxsize=4096)
+def add_duration(start_date, count, unit):
+    """
+    Calendar-correct end of a period: months and years keep the day of month, clamped to
+    the last day of shorter months (Jan 31 + 1 M = Feb 28/29). Memoized because bulk
+    operations resolve the same (start, plan) pairs many times.
+    """
     if unit == 'D':
-        return timedelta(days=value)
-    elif unit == 'M':
-        return timedelta(days=30 * value)  
-    elif unit == 'Y':
-        return timedelta(days=365 * value)
+        return start_date + timedelta(days=count)
+    elif unit in ('M', 'Y'):
+        months = start_date.month - 1 + count * (12 if unit == 'Y' else 1)
+        year, month = start_date.year + months // 12, months % 12 + 1
+        return start_date.replace(year=year, month=month, day=min(start_date.day, monthrange(year, month)[1]))
     else:
-        raise ValueError("Unsupported duration unit")
\ No newline at end of file
+        raise ValueError("Unsupported duration unit")
+
+
+def first_error_message(errors):
+    """Collapse serializer errors into the single message the API responds with."""
+    error = next(iter(errors.values()))
+    while isinstance(error, (list, dict)):
+        error = next(iter(error.values())) if isinstance(error, dict) else error[0]
+    return str(error)
+
+
+def chunked(iterable, size):
+    """Yield lists of at most `size` items without materialising the whole iterable."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of measurements."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
@@ -0,0 +1,90 @@
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def format_labels(labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels)
+
+
+def sample(name, labels):
+    return f'{name}{{{labels}}}' if labels else name
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = defaultdict(lambda: [[0] * len(buckets), 0.0, 0])
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            counts, _, _ = series = self.series[key]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            for key, (counts, total, count) in self.series.items():
+                labels = format_labels(key)
+                prefix = f'{labels},' if labels else ''
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+                lines.append(f"{sample(self.name + '_sum', labels)} {total}")
+                lines.append(f"{sample(self.name + '_count', labels)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.series = defaultdict(float)
+        self.lock = threading.Lock()
+
+    def inc(self, value=1, **labels):
+        with self.lock:
+            self.series[tuple(sorted(labels.items()))] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self.lock:
+            for key, value in self.series.items():
+                lines.append(f'{sample(self.name, format_labels(key))} {value}')
+        return lines
+
+
+# Process-local: with several server workers each one exposes its own numbers.
+request_duration = Histogram('bizzlers_request_duration_seconds', 'Wall time per request by URL name.', DURATION_BUCKETS)
+request_db_duration = Histogram('bizzlers_request_db_duration_seconds', 'Time spent in SQL per request by URL name.', DURATION_BUCKETS)
+request_queries = Histogram('bizzlers_request_queries', 'SQL queries per request by URL name.', QUERY_BUCKETS)
+response_size = Histogram('bizzlers_response_size_bytes', 'Response body size by URL name.', SIZE_BUCKETS)
+duplicate_queries = Counter('bizzlers_duplicate_queries_total', 'Identical SQL statements repeated within one request.')
+
+REGISTRY = [request_duration, request_db_duration, request_queries, response_size, duplicate_queries]
+
+
+def metrics_view(request):
+    """Prometheus text exposition of the metrics collected by InstrumentationMiddleware."""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and request.META.get('HTTP_AUTHORIZATION') != f'Bearer {token}':
+        return HttpResponseForbidden()
+
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4')
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import deque
+
+# alias -> ConnectionPool, shared by every thread of the process
+pools = {}
+pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    Idle raw DB-API connections of one database alias. Connections idle for longer than
+    `max_idle` seconds are closed instead of handed out, so the server's wait_timeout never
+    hits a pooled connection; `size` caps how many are kept, not how many can be open.
+    """
+
+    def __init__(self, size, max_idle):
+        self.size = size
+        self.max_idle = max_idle
+        self.idle = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        now = time.monotonic()
+        while True:
+            with self.lock:
+                if not self.idle:
+                    return None
+                connection, released_at = self.idle.pop()
+            if now - released_at <= self.max_idle:
+                return connection
+            discard(connection)
+
+    def release(self, connection):
+        with self.lock:
+            if len(self.idle) < self.size:
+                self.idle.append((connection, time.monotonic()))
+                return True
+        return False
+
+    def clear(self):
+        with self.lock:
+            idle, self.idle = self.idle, deque()
+        for connection, _ in idle:
+            discard(connection)
+
+    def __len__(self):
+        return len(self.idle)
+
+
+def discard(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def get_pool(alias, settings_dict):
+    with pools_lock:
+        if alias not in pools:
+            pools[alias] = ConnectionPool(settings_dict.get('POOL_SIZE', 10), settings_dict.get('POOL_MAX_IDLE', 300))
+        return pools[alias]
+
+
+class PooledDatabaseWrapper:
+    """
+    Mixin for a backend's DatabaseWrapper that takes connections from the alias's pool and
+    puts them back on close instead of disconnecting. Under ASGI every request runs its
+    queries in a thread of its own, so CONN_MAX_AGE connections, which are kept per thread,
+    are never reused; with the pool and CONN_MAX_AGE=0 each request still closes its
+    connection when it finishes, which returns it for the next request. Connections are
+    pinged on checkout when CONN_HEALTH_CHECKS is set.
+    """
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        while True:
+            connection = self.pool.acquire()
+            if connection is None:
+                return super().get_new_connection(conn_params)
+            if not self.settings_dict['CONN_HEALTH_CHECKS'] or self.ping(connection):
+                return connection
+            discard(connection)
+
+    def ping(self, connection):
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute('SELECT 1')
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _close(self):
+        # a connection closed inside an atomic block or after errors is not handed on
+        if self.connection is None or self.in_atomic_block or self.errors_occurred:
+            return super()._close()
+        try:
+            if not self.autocommit:
+                self.connection.rollback()
+        except Exception:
+            return super()._close()
+        if not self.pool.release(self.connection):
+            return super()._close()
@@ -0,0 +1,58 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def envelope(data, http_status):
+    """Wrap a response payload in the API's standard status_code/message/data envelope."""
+    if data is None:
+        data = {}
+
+    if isinstance(data, dict) and 'status_code' in data:
+        status_code = data['status_code']
+    else:
+        status_code = 1 if 200 <= http_status < 300 else 0
+
+    if isinstance(data, dict) and 'message' in data:
+        message = data['message']
+        data = {key: value for key, value in data.items() if key != 'message'}
+    else:
+        message = 'success' if status_code==1 else 'failed'
+
+    return {
+        "status_code": status_code,
+        "message": message,
+        "data": data
+    }
+
+
+class EnvelopeJSONRenderer(JSONRenderer):
+    """Renders every API response inside the standard envelope in a single serialization pass."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        http_status = response.status_code if response is not None else 200
+        return super().render(envelope(data, http_status), accepted_media_type, renderer_context)
+
+
+class FastEnvelopeJSONRenderer(EnvelopeJSONRenderer):
+    """EnvelopeJSONRenderer backed by orjson when it is installed."""
+
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        response = (renderer_context or {}).get('response')
+        http_status = response.status_code if response is not None else 200
+        # dates go through DRF's encoder so the output matches JSONRenderer exactly
+        return orjson.dumps(
+            envelope(data, http_status),
+            default=self.encoder.default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME,
+        )
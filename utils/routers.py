@@ -0,0 +1,52 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Routing of the request being served, set by middlewares.replicas.ReplicaRoutingMiddleware.
+# Outside requests (commands, workers) there is none and everything uses the primary.
+current_routing = ContextVar('current_routing', default=None)
+
+
+class Routing:
+    """Database the current request reads from. Once it writes, its reads stay on the primary."""
+
+    def __init__(self, replica=None):
+        self.replica = replica
+        self.wrote = False
+
+
+def replicas():
+    configured = getattr(settings, 'DATABASE_REPLICAS', None)
+    if configured is not None:
+        return list(configured)
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def choose_replica():
+    aliases = replicas()
+    return random.choice(aliases) if aliases else None
+
+
+class ReplicaRouter:
+    """
+    Sends the reads of read-only requests to a replica picked for the whole request and
+    everything else to the primary. Replicas are assumed to hold the same data as the
+    primary, give or take replication lag.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = current_routing.get()
+        if routing is None or routing.wrote or routing.replica is None:
+            return DEFAULT_DB_ALIAS
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = current_routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True